@@ -46,14 +46,11 @@ except ImportError:
         "ENSO requires the module subprocess. Please install the module subprocess."
     )
 try:
-    from multiprocessing import JoinableQueue as Queue
+    from queue import Queue, Empty
 except ImportError:
-    raise ImportError(
-        "ENSO requires the module multiprocessing. Please install the module "
-        "multiprocessing."
-    )
+    raise ImportError("ENSO requires the module queue. Please install the module queue.")
 try:
-    from threading import Thread
+    from threading import Thread, Lock, Event, Condition, current_thread
 except ImportError:
     raise ImportError(
         "ENSO requires the module threading. Please install the module threading."
@@ -66,6 +63,12 @@ try:
     import csv
 except ImportError:
     raise ImportError("ENSO requires the module csv. Please install the module csv.")
+try:
+    import itertools
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module itertools. Please install the module itertools."
+    )
 try:
     import math
 except ImportError:
@@ -84,6 +87,57 @@ try:
     import traceback
 except ImportError:
     raise ImportError("ENSO uses the module traceback.")
+try:
+    import asyncio
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module asyncio. Please install the module asyncio."
+    )
+try:
+    import signal
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module signal. Please install the module signal."
+    )
+try:
+    import mmap
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module mmap. Please install the module mmap."
+    )
+try:
+    import re
+except ImportError:
+    raise ImportError("ENSO requires the module re. Please install the module re.")
+try:
+    from array import array
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module array. Please install the module array."
+    )
+try:
+    import hashlib
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module hashlib. Please install the module hashlib."
+    )
+try:
+    import atexit
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module atexit. Please install the module atexit."
+    )
+try:
+    import functools
+except ImportError:
+    raise ImportError(
+        "ENSO requires the module functools. Please install the module functools."
+    )
+try:
+    import numpy as np
+except ImportError:
+    # optional, speeds up RMSDs, the Gsolv(T) fit and mRRHO
+    np = None
 
 
 def cml(
@@ -171,6 +225,32 @@ def cml(
         required=False,
         help="Temperature in Kelvin for thermostatistical evaluation.",
     )
+    group2.add_argument(
+        "--temperature-scan",
+        dest="temperaturescan",
+        type=temperature_grid,
+        required=False,
+        metavar="TMIN:TMAX:STEP",
+        help="Additionally evaluate the free energies and Boltzmann "
+        "populations of part2 and part3 for every temperature from TMIN to "
+        "TMAX (in Kelvin) from the same calculations, e.g. 200:300:10.",
+    )
+    group2.add_argument(
+        "--imagthr",
+        dest="imagthr",
+        action="store",
+        required=False,
+        help="Imaginary frequencies (in cm-1) above this threshold are "
+        "inverted for GRRHO with xTB, the others are skipped. Default: -50.0",
+    )
+    group2.add_argument(
+        "--sthr",
+        dest="sthr",
+        action="store",
+        required=False,
+        help="Rotor cutoff (in cm-1) for the interpolation between harmonic "
+        "and free rotor entropies in GRRHO with xTB. Default: 50.0",
+    )
 
     group3 = parser.add_argument_group("Programms")
     group3.add_argument(
@@ -546,7 +626,9 @@ def cml(
         type=int,
         action="store",
         help="Number of cores each thread can use. E.g. (maxthreads) 5 threads "
-        "with each (omp) 4 cores --> 20 cores need to be available on the machine.",
+        "with each (omp) 4 cores --> 20 cores need to be available on the machine. "
+        "When less jobs than threads are left, the idle cores are handed "
+        "to the remaining jobs.",
     )
     group7.add_argument(
         "-P",
@@ -557,6 +639,49 @@ def cml(
         help="Number of threads during the ENSO calculation. E.g. (maxthreads) 5"
         " threads with each (omp) 4 cores --> 20 cores need to be available on the machine.",
     )
+    group7.add_argument(
+        "--cosmothermbatch",
+        dest="cosmothermbatch",
+        type=int,
+        action="store",
+        required=False,
+        metavar="N",
+        help="Number of COSMOtherm processes which evaluate COSMO-RS for the "
+        "whole ensemble together (default: maxthreads). With 0, COSMOtherm "
+        "is run separately for every conformer.",
+    )
+    group7.add_argument(
+        "--timeout",
+        dest="timeout",
+        nargs="+",
+        required=False,
+        metavar="HOURS",
+        help="Wall-clock limit in hours for each calculation, either one value "
+        "for all or per jobtype, e.g. --timeout opt=24 sp=2. Calculations "
+        "exceeding the limit are killed and marked as failed.",
+    )
+    group7.add_argument(
+        "--progress",
+        dest="progress",
+        type=float,
+        action="store",
+        default=0.0,
+        metavar="SECONDS",
+        help="Print a progress report of the running calculations (done, "
+        "running and queued jobs, ETA, optimization cycles) every SECONDS "
+        "and write it to enso_progress.json, e.g. --progress 60. "
+        "Default: 0 (off)",
+    )
+    group7.add_argument(
+        "--trace",
+        dest="trace",
+        action="store",
+        required=False,
+        metavar="FILE",
+        help="Write a trace of the run (external programs, jobs per worker "
+        "slot, stages and ENSO phases) in the Chrome trace event format to "
+        "FILE, e.g. for ui.perfetto.dev or chrome://tracing.",
+    )
     group7.add_argument(
         "--debug",
         dest="debug",
@@ -568,6 +693,113 @@ def cml(
     return args
 
 
+class trace_span():
+    """time spent inside a with block, recorded as one trace event; further
+    arguments of the event can be added to args inside the block"""
+
+    def __init__(self, recorder, name, cat, args):
+        self.recorder = recorder
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.recorder is not None:
+            self.recorder.add(
+                self.name, self.cat, self.start, time.perf_counter(), self.args
+            )
+        return False
+
+
+class trace_recorder():
+    """records trace events (Chrome trace event format, which can be
+    loaded in Perfetto or chrome://tracing) of the external programs, the
+    jobs, the stages and the phases of ENSO itself. Nothing is recorded
+    unless a filename is set (--trace), the file is written at exit. Each
+    worker slot of run_in_parallel is one thread (row) of the trace."""
+
+    def __init__(self):
+        self.filename = None
+        self.events = []
+        self.threads = {}  # thread name: tid
+        self.lock = Lock()
+        self.start = time.perf_counter()
+
+    def enable(self, filename):
+        self.filename = os.path.abspath(filename)
+        self.start = time.perf_counter()
+        atexit.register(self.write)
+
+    def span(self, name, cat, **args):
+        """with trace.span('ridft', 'program', conformer='CONF1'): ..."""
+        if self.filename is None:
+            return trace_span(None, name, cat, args)
+        return trace_span(self, name, cat, args)
+
+    def add(self, name, cat, start, end, args=None):
+        """add a complete event from start to end (time.perf_counter)"""
+        if self.filename is None:
+            return
+        thread = current_thread().name
+        with self.lock:
+            if thread not in self.threads:
+                self.threads[thread] = len(self.threads)
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": round((start - self.start) * 1.0e6, 1),
+                    "dur": round((end - start) * 1.0e6, 1),
+                    "pid": 1,
+                    "tid": self.threads[thread],
+                    "args": args or {},
+                }
+            )
+
+    def write(self):
+        if self.filename is None:
+            return
+        with self.lock:
+            events = [
+                {"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+                 "args": {"name": "ENSO"}}
+            ]
+            for thread, tid in self.threads.items():
+                events.append(
+                    {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                     "args": {"name": thread}}
+                )
+            events.extend(self.events)
+        try:
+            with open(self.filename, "w", newline=None) as out:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, out)
+            print("Trace of the run is written to {}.".format(self.filename))
+        except OSError as error:
+            print("ERROR: could not write {}: {}".format(self.filename, error))
+
+
+trace = trace_recorder()
+
+
+def traced(cat):
+    """decorator, every call of the function is recorded as trace event"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace.span(func.__name__, cat):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 def mkdir_p(path):
     """ create mkdir -p like behaviour"""
     try:
@@ -632,20 +864,357 @@ def check_for_float(line):
             break
     return value
 
+class xyz_ensemble():
+    """Read access to a multi-structure xyz file (e.g. crest_conformers.xyz)
+    without reading the whole file. The byte offset of every structure is
+    determined once and cached in path.index (in the run directory if the
+    folder of path is not writable, not at all if neither is), structure i
+    (starting at 1) is then read directly from the memory-mapped file."""
+
+    def __init__(self, path):
+        self.path = path
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.access(folder, os.W_OK):
+            # e.g. a read-only or shared folder with the input
+            folder = os.getcwd()
+        self.indexfile = os.path.join(folder, os.path.basename(path) + ".index")
+        self.nat = 0
+        self.offsets = []
+        self.size = 0
+        self._load_index()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _load_index(self):
+        """read the cached index or build it if the file has changed"""
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        try:
+            with open(self.indexfile, "r", encoding=coding, newline=None) as inp:
+                index = json.load(inp)
+            if index["size"] == stat.st_size and index["mtime"] == stat.st_mtime:
+                self.nat = int(index["nat"])
+                self.offsets = [int(i) for i in index["offsets"]]
+                return
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self.nat, self.offsets = self._build_index()
+        try:
+            with open(self.indexfile, "w", encoding=coding, newline=None) as out:
+                json.dump(
+                    {
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                        "nat": self.nat,
+                        "offsets": self.offsets,
+                    },
+                    out,
+                )
+        except OSError:
+            # the index is only a cache
+            pass
+
+    def _build_index(self):
+        """get the number of atoms and the byte offsets of all complete
+        structures"""
+        if self.size == 0:
+            raise ValueError("{} is empty!".format(self.path))
+        with open(self.path, "rb") as inp:
+            with mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                nat = int(mm[: mm.find(b"\n")])
+                nlines = nat + 2
+                # every structure starts with a line containing only nat
+                pattern = re.compile(
+                    br"\n[ \t]*" + str(nat).encode() + br"[ \t]*\r?\n"
+                )
+                offsets = [0] + [m.start() + 1 for m in pattern.finditer(mm)]
+                consistent = True
+                for j in range(len(offsets) - 1):
+                    if mm[offsets[j] : offsets[j + 1]].count(b"\n") != nlines:
+                        consistent = False
+                        break
+                if consistent and offsets:
+                    # the last structure has to be complete
+                    last = mm[offsets[-1] :]
+                    if last.count(b"\n") + (not last.endswith(b"\n")) < nlines:
+                        offsets.pop()
+                    return nat, offsets
+                # a comment line equals nat, go through the file line by line
+                offsets = []
+                pos = 0
+                while pos < self.size:
+                    start = pos
+                    found = 0
+                    while found < nlines and pos < self.size:
+                        end = mm.find(b"\n", pos)
+                        pos = self.size if end == -1 else end + 1
+                        found += 1
+                    if found == nlines:
+                        offsets.append(start)
+        return nat, offsets
+
+    def _lines(self, i, nlines):
+        """return the first nlines lines of structure i"""
+        with open(self.path, "rb") as inp:
+            with mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = self.offsets[i - 1]
+                if i < len(self.offsets):
+                    end = self.offsets[i]
+                else:
+                    end = self.size
+                return mm[start:end].decode(coding).splitlines()[:nlines]
+
+    def energy(self, i):
+        """energy from the comment line of structure i"""
+        return check_for_float(self._lines(i, 2)[1])
+
+    def energies(self, numbers):
+        """energies of the structures in numbers, only the comment lines are
+        read"""
+        energies = []
+        with open(self.path, "rb") as inp:
+            with mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for i in numbers:
+                    start = mm.find(b"\n", self.offsets[i - 1]) + 1
+                    end = mm.find(b"\n", start)
+                    if end == -1:
+                        end = self.size
+                    energies.append(check_for_float(mm[start:end].decode(coding)))
+        return energies
+
+    def geometry(self, i):
+        """element symbols (lowercase) and cartesian coordinates in Angstrom
+        of structure i, every atom line is split only once"""
+        atoms = []
+        coords = []
+        for line in self._lines(i, self.nat + 2)[2:]:
+            tmp = line.split()
+            atoms.append(tmp[0].lower())
+            coords.append([float(tmp[1]), float(tmp[2]), float(tmp[3])])
+        return atoms, coords
+
+
+class geometry_ensemble():
+    """All structures of the molecule in one flat array of doubles
+    (nstructures x nat x 3, in Angstrom) plus the element symbols, which
+    are the same for all structures. Structures read from files are stored
+    under the file name and are only read again if the file has changed.
+    Structures can be written as TURBOMOLE coord file, xyz file or as the
+    coordinate block of an ORCA input."""
+
+    bohr2ang = 0.52917721067
+    # resolution of the timestamps of coarse filesystems (FAT: 2 s) in ns
+    granularity = 2000000000
+
+    def __init__(self):
+        self.nat = None
+        self.atoms = []
+        self.names = []
+        self.index = {}
+        self.stamps = {}
+        self.xyz = array("d")
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def set(self, name, atoms, coords):
+        """store structure name, atoms are lowercase element symbols and
+        coords are in Angstrom, returns the number of the structure"""
+        flat = array("d", [value for atom in coords for value in atom])
+        with self.lock:
+            if self.nat is None:
+                self.nat = len(atoms)
+                self.atoms = list(atoms)
+            elif list(atoms) != self.atoms:
+                raise ValueError(
+                    "The atoms in {} differ from the other structures!".format(name)
+                )
+            if name in self.index:
+                start = self.index[name] * self.nat * 3
+                self.xyz[start : start + self.nat * 3] = flat
+            else:
+                self.index[name] = len(self.names)
+                self.names.append(name)
+                self.xyz.extend(flat)
+            return self.index[name]
+
+    def coordinates(self, i):
+        """list of [x, y, z] in Angstrom of structure i"""
+        start = i * self.nat * 3
+        data = self.xyz[start : start + self.nat * 3]
+        return [list(data[j : j + 3]) for j in range(0, len(data), 3)]
+
+    def _remember(self, filename, stat, data):
+        """stamp of the file filename with the content data, stat was taken
+        before data was read: (mtime_ns, size, sha1 of data, time of the
+        stamp in ns)"""
+        stamp = (
+            stat.st_mtime_ns,
+            stat.st_size,
+            hashlib.sha1(data).hexdigest(),
+            time.time_ns(),
+        )
+        with self.lock:
+            self.stamps[filename] = stamp
+
+    def _cached(self, filename, stat):
+        """number of the structure of filename if the file is unchanged,
+        else None. The content is only hashed if the file was modified
+        shortly before it was stamped, then a rewrite of the same size can
+        have the same timestamp."""
+        with self.lock:
+            stamp = self.stamps.get(filename, None)
+        if stamp is None or stamp[:2] != (stat.st_mtime_ns, stat.st_size):
+            return None
+        if stat.st_mtime_ns + self.granularity >= stamp[3]:
+            with open(filename, "rb") as inp:
+                if hashlib.sha1(inp.read()).hexdigest() != stamp[2]:
+                    return None
+            stamp = stamp[:3] + (time.time_ns(),)
+        with self.lock:
+            if filename not in self.index:
+                return None
+            self.stamps[filename] = stamp
+            return self.index[filename]
+
+    def discard(self, path=None):
+        """forget all structures of files below the folder path (e.g. of a
+        removed conformer), all structures if path is None"""
+        with self.lock:
+            if path is None:
+                keep = []
+            else:
+                path = os.path.join(os.path.abspath(path), "")
+                keep = [
+                    name for name in self.names
+                    if not os.path.abspath(name).startswith(path)
+                ]
+            if len(keep) == len(self.names):
+                return
+            xyz = array("d")
+            for name in keep:
+                start = self.index[name] * self.nat * 3
+                xyz.extend(self.xyz[start : start + self.nat * 3])
+            self.xyz = xyz
+            self.names = keep
+            self.index = {name: i for i, name in enumerate(keep)}
+            self.stamps = {
+                name: self.stamps[name] for name in keep if name in self.stamps
+            }
+
+    def _parse_coord(self, lines):
+        """atoms and coordinates in Angstrom from the lines of a coord file"""
+        atoms = []
+        coords = []
+        for line in lines[1:]:
+            if "$" in line:  # stop at $end ...
+                break
+            tmp = line.split()
+            coords.append(
+                [
+                    float(tmp[0]) * self.bohr2ang,
+                    float(tmp[1]) * self.bohr2ang,
+                    float(tmp[2]) * self.bohr2ang,
+                ]
+            )
+            atoms.append(tmp[3].lower())
+        return atoms, coords
+
+    def read_coord(self, filename):
+        """read TURBOMOLE coord file, returns the number of the structure"""
+        stat = os.stat(filename)
+        i = self._cached(filename, stat)
+        if i is not None:
+            return i
+        with open(filename, "rb") as inp:
+            data = inp.read()
+        atoms, coords = self._parse_coord(data.decode(coding).splitlines())
+        i = self.set(filename, atoms, coords)
+        self._remember(filename, stat, data)
+        return i
+
+    def read_xyz(self, filename):
+        """read the first structure of a xyz file, returns the number of the
+        structure"""
+        stat = os.stat(filename)
+        i = self._cached(filename, stat)
+        if i is not None:
+            return i
+        with open(filename, "rb") as inp:
+            data = inp.read()
+        lines = data.decode(coding).splitlines()
+        atoms = []
+        coords = []
+        for line in lines[2 : int(lines[0]) + 2]:
+            tmp = line.split()
+            atoms.append(tmp[0].lower())
+            coords.append([float(tmp[1]), float(tmp[2]), float(tmp[3])])
+        i = self.set(filename, atoms, coords)
+        self._remember(filename, stat, data)
+        return i
+
+    def coord_lines(self, i):
+        """TURBOMOLE coord lines (in Bohr) of structure i"""
+        return [
+            "{: 09.7f} {: 09.7f}  {: 09.7f}  {}".format(
+                x / self.bohr2ang, y / self.bohr2ang, z / self.bohr2ang, atom
+            )
+            for atom, (x, y, z) in zip(self.atoms, self.coordinates(i))
+        ]
+
+    def xyz_lines(self, i):
+        """xyz lines (in Angstrom) of structure i, these are also used as
+        coordinate block of ORCA inputs"""
+        return [
+            "{:3} {: 19.10f}  {: 19.10f}  {: 19.10f}".format(
+                atom[0].upper() + atom[1:], x, y, z
+            )
+            for atom, (x, y, z) in zip(self.atoms, self.coordinates(i))
+        ]
+
+    def write_coord(self, i, filename):
+        """write structure i to the TURBOMOLE coord file filename, the written
+        structure is stored under filename as well"""
+        lines = ["$coord"] + self.coord_lines(i)
+        with open(filename, "w", newline=None) as coord:
+            for line in lines:
+                coord.write(line + "\n")
+            coord.write("$end")
+        # store the rounded coordinates as they would be read from the file
+        atoms, coords = self._parse_coord(lines)
+        self.set(filename, atoms, coords)
+        stat = os.stat(filename)
+        with open(filename, "rb") as inp:
+            self._remember(filename, stat, inp.read())
+
+    def write_xyz(self, i, out, comment):
+        """append structure i to the open xyz file out"""
+        out.write("  {}\n".format(self.nat))  ### number of atoms
+        out.write("{}\n".format(comment))
+        for line in self.xyz_lines(i):
+            out.write(line + "\n")
+
+
+# all structures read or written by ENSO during this run
+geometries = geometry_ensemble()
+
+
 def conformersxyz2coord(conformersxyz, nat, foldername, nconf, conflist, input_object, onlyenergy=False):
     """read crest_conformers.xyz and write coord into 
     designated folders, also get GFNn/GFNFF-xTB energies """
-    with open(conformersxyz, "r", encoding=coding, newline=None) as xyzfile:
-        stringfile_lines = xyzfile.readlines()
-    if (int(nconf) * (int(nat) + 2)) > len(stringfile_lines):
+    ensemble = xyz_ensemble(conformersxyz)
+    if int(nconf) > len(ensemble) or int(nat) != ensemble.nat:
         print(
             "ERROR: Either the number of conformers ({}) or the number of "
             "atoms ({}) is wrong!".format(str(nconf), str(nat))
         )
         input_object.write_json("save_and_exit")
-    for conf in conflist:
+    xtb_energies = ensemble.energies([int(conf.name[4:]) for conf in conflist])
+    for conf, xtb_energy in zip(conflist, xtb_energies):
         i = int(conf.name[4:])
-        conf.xtb_energy = check_for_float(stringfile_lines[(i - 1) * (nat + 2) + 1])
+        conf.xtb_energy = xtb_energy
         if conf.xtb_energy is None:
             print(
                 "Error in float conversion while reading file"
@@ -654,120 +1223,280 @@ def conformersxyz2coord(conformersxyz, nat, foldername, nconf, conflist, input_o
             conf.xtb_energy = None
         input_object.json_dict[conf.name]["xtb_energy"] = conf.xtb_energy
         if not onlyenergy:
-            atom = []
-            x = []
-            y = []
-            z = []
-            start = (i - 1) * (nat + 2) + 2
-            end = i * (nat + 2)
-            bohr2ang = 0.52917721067
-            for line in stringfile_lines[start:end]:
-                atom.append(str(line.split()[0].lower()))
-                x.append(float(line.split()[1]) / bohr2ang)
-                y.append(float(line.split()[2]) / bohr2ang)
-                z.append(float(line.split()[3]) / bohr2ang)
-            coordxyz = []
-            for j in range(len(x)):
-                coordxyz.append(
-                    "{: 09.7f} {: 09.7f}  {: 09.7f}  {}".format(
-                        x[j], y[j], z[j], atom[j]
-                    )
-                )
             tmppath = os.path.join(conf.name, foldername, "coord")
             if not os.path.isfile(tmppath):
+                atom, xyz = ensemble.geometry(i)
                 print(
                     "Write new coord file in {}".format(tmppath)
                     )
-                with open(tmppath,"w", newline=None) as coord:
-                    coord.write("$coord\n")
-                    for line in coordxyz:
-                        coord.write(line + "\n")
-                    coord.write("$end")
+                geometries.write_coord(geometries.set(tmppath, atom, xyz), tmppath)
     return conflist
 
-def crest_routine(args, results, func, crestcheck, json_dict, crestpath, environsettings):
+# standard atomic weights of H to Rn
+atomic_masses = dict(zip(
+    [
+        "h", "he", "li", "be", "b", "c", "n", "o", "f", "ne", "na", "mg", "al",
+        "si", "p", "s", "cl", "ar", "k", "ca", "sc", "ti", "v", "cr", "mn",
+        "fe", "co", "ni", "cu", "zn", "ga", "ge", "as", "se", "br", "kr", "rb",
+        "sr", "y", "zr", "nb", "mo", "tc", "ru", "rh", "pd", "ag", "cd", "in",
+        "sn", "sb", "te", "i", "xe", "cs", "ba", "la", "ce", "pr", "nd", "pm",
+        "sm", "eu", "gd", "tb", "dy", "ho", "er", "tm", "yb", "lu", "hf", "ta",
+        "w", "re", "os", "ir", "pt", "au", "hg", "tl", "pb", "bi", "po", "at",
+        "rn",
+    ],
+    [
+        1.008, 4.0026, 6.94, 9.0122, 10.81, 12.011, 14.007, 15.999, 18.998,
+        20.180, 22.990, 24.305, 26.982, 28.085, 30.974, 32.06, 35.45, 39.948,
+        39.098, 40.078, 44.956, 47.867, 50.942, 51.996, 54.938, 55.845,
+        58.933, 58.693, 63.546, 65.38, 69.723, 72.630, 74.922, 78.971, 79.904,
+        83.798, 85.468, 87.62, 88.906, 91.224, 92.906, 95.95, 98.0, 101.07,
+        102.91, 106.42, 107.87, 112.41, 114.82, 118.71, 121.76, 127.60,
+        126.90, 131.29, 132.91, 137.33, 138.91, 140.12, 140.91, 144.24, 145.0,
+        150.36, 151.96, 157.25, 158.93, 162.50, 164.93, 167.26, 168.93,
+        173.05, 174.97, 178.49, 180.95, 183.84, 186.21, 190.23, 192.22,
+        195.08, 196.97, 200.59, 204.38, 207.2, 208.98, 209.0, 210.0, 222.0,
+    ],
+))
+
+
+def rotational_constants(atoms, coords):
+    """rotational constants in MHz (ascending) of a structure, atoms are
+    element symbols and coords are in Angstrom"""
+    masses = [atomic_masses.get(atom.lower(), 0.0) for atom in atoms]
+    mtot = math.fsum(masses)
+    com = [
+        math.fsum(m * xyz[k] for m, xyz in zip(masses, coords)) / mtot
+        for k in range(3)
+    ]
+    ixx = iyy = izz = ixy = ixz = iyz = 0.0
+    for m, xyz in zip(masses, coords):
+        x, y, z = xyz[0] - com[0], xyz[1] - com[1], xyz[2] - com[2]
+        ixx += m * (y * y + z * z)
+        iyy += m * (x * x + z * z)
+        izz += m * (x * x + y * y)
+        ixy -= m * x * y
+        ixz -= m * x * z
+        iyz -= m * y * z
+    # eigenvalues of the symmetric inertia tensor (trigonometric solution)
+    q = (ixx + iyy + izz) / 3.0
+    p1 = ixy ** 2 + ixz ** 2 + iyz ** 2
+    p2 = (ixx - q) ** 2 + (iyy - q) ** 2 + (izz - q) ** 2 + 2.0 * p1
+    p = math.sqrt(p2 / 6.0)
+    if p < 1e-12:
+        moments = [q, q, q]
+    else:
+        bxx, byy, bzz = (ixx - q) / p, (iyy - q) / p, (izz - q) / p
+        bxy, bxz, byz = ixy / p, ixz / p, iyz / p
+        det = (
+            bxx * (byy * bzz - byz * byz)
+            - bxy * (bxy * bzz - byz * bxz)
+            + bxz * (bxy * byz - byy * bxz)
+        )
+        phi = math.acos(max(-1.0, min(1.0, det / 2.0))) / 3.0
+        large = q + 2.0 * p * math.cos(phi)
+        small = q + 2.0 * p * math.cos(phi + 2.0 * math.pi / 3.0)
+        moments = [large, 3.0 * q - large - small, small]
+    # B = h / (8 pi**2 I) with I in amu Angstrom**2
+    return sorted(505379.07 / i if i > 1e-8 else 0.0 for i in moments)
+
+
+def symmetry_number(pointgroup):
+    """rotational symmetry number of a point group (Schoenflies symbol)"""
+    pg = str(pointgroup).strip().lower()
+    if pg in ("t", "td", "th"):
+        return 12
+    if pg in ("o", "oh"):
+        return 24
+    if pg in ("i", "ih"):
+        return 60
+    if pg in ("dinfh", "d*h"):
+        return 2
+    match = re.match(r"^([cds])(\d+)", pg)
+    if match is None:
+        # c1, ci, cs, cinfv
+        return 1
+    n = int(match.group(2))
+    if match.group(1) == "d":
+        return 2 * n
+    if match.group(1) == "s":
+        return n // 2
+    return n
+
+
+def mrrho(freqs, rotconst, mass, sigma, temperatures, imagthr=-50.0, sthr=50.0):
+    """modified rigid-rotor-harmonic-oscillator free energy G(T) - E in Eh
+    (Grimme, Chem. Eur. J. 2012, 18, 9955) for each temperature in K:
+    vibrational entropies below the rotor cutoff sthr (cm-1) are
+    interpolated to free rotor entropies, imaginary frequencies above
+    imagthr (cm-1) are inverted, the others are skipped. freqs in cm-1
+    without translations and rotations, rotconst in MHz, mass in amu,
+    ideal gas at 1 atm."""
+    h = 6.62607015e-34  # J s
+    kb = 1.380649e-23  # J/K
+    c = 2.99792458e10  # cm/s
+    hartree = 4.3597447222071e-18  # J
+    bav = 1.0e-44  # average moment of inertia in kg m**2
+    nu = [abs(f) for f in freqs if f > imagthr and abs(f) > 0.0]
+    if np is not None:
+        nu = np.array(nu)
+        exp, log, fsum = np.exp, np.log, np.sum
+    else:
+        exp, log, fsum = math.exp, math.log, math.fsum
+    rot = [b * 1.0e6 for b in rotconst if b > 0.0]  # Hz
+    m = mass * 1.66053906660e-27  # kg
+    zpve = 0.5 * h * c * fsum(nu) if len(nu) else 0.0
+    values = []
+    for temp in temperatures:
+        temp = float(temp)
+        if temp == 0.0:
+            values.append(float(zpve) / hartree)
+            continue
+        kt = kb * temp
+        if len(nu):
+            if np is not None:
+                x = h * c * nu / kt
+                hvib = fsum(h * c * nu / (exp(x) - 1.0))
+                sv = kb * (x / (exp(x) - 1.0) - log(1.0 - exp(-x)))
+                mu = h / (8.0 * math.pi ** 2 * c * nu)
+                mu = mu * bav / (mu + bav)
+                sr = kb * (0.5 + log(np.sqrt(8.0 * math.pi ** 3 * mu * kt / h ** 2)))
+                w = 1.0 / (1.0 + (sthr / nu) ** 4)
+                svib = fsum(w * sv + (1.0 - w) * sr)
+            else:
+                hvib, svib = 0.0, 0.0
+                for n in nu:
+                    x = h * c * n / kt
+                    hvib += h * c * n / (exp(x) - 1.0)
+                    sv = kb * (x / (exp(x) - 1.0) - log(1.0 - exp(-x)))
+                    mu = h / (8.0 * math.pi ** 2 * c * n)
+                    mu = mu * bav / (mu + bav)
+                    sr = kb * (0.5 + log(math.sqrt(8.0 * math.pi ** 3 * mu * kt / h ** 2)))
+                    w = 1.0 / (1.0 + (sthr / n) ** 4)
+                    svib += w * sv + (1.0 - w) * sr
+        else:
+            hvib, svib = 0.0, 0.0
+        # translation
+        htr = 2.5 * kt
+        str_ = kb * (
+            math.log((2.0 * math.pi * m * kt / h ** 2) ** 1.5 * kt / 101325.0) + 2.5
+        )
+        # rotation
+        if not rot:  # atom
+            hrot, srot = 0.0, 0.0
+        elif len(rot) < 3:  # linear
+            hrot = kt
+            srot = kb * (math.log(kt / (sigma * h * rot[-1])) + 1.0)
+        else:
+            hrot = 1.5 * kt
+            srot = kb * (
+                math.log(
+                    math.sqrt(math.pi) / sigma
+                    * math.sqrt(kt ** 3 / (h ** 3 * rot[0] * rot[1] * rot[2]))
+                )
+                + 1.5
+            )
+        g = zpve + hvib + htr + hrot - temp * (svib + str_ + srot)
+        values.append(float(g) / hartree)
+    return values
+
+
+def find_rotamers(energies, structures, atoms, ethr=0.05, bthr=0.01, rthr=0.125):
+    """Identify conformers which are identical to or rotamers of a conformer
+    with lower energy (same criteria as CREGEN of CREST): the energies
+    (in Eh, ascending) differ by less than ethr (kcal/mol) and either the
+    rotational constants differ by less than bthr (relative) or the RMSD after
+    superposition is below rthr (Angstrom). The conformers are sorted into
+    buckets of the logarithmic rotational constants with width bthr, only
+    conformers in the same or a neighbouring bucket are compared.
+    returns list of (a, b): conformer a is a rotamer/duplicate of b (indices)"""
+    window = ethr / 627.509474
+    width = -math.log(1.0 - bthr)
+    buckets = {}
+    pairs = []
+    for a in range(len(energies)):
+        rota = rotational_constants(atoms, structures[a])
+        key = tuple(
+            int(math.floor(math.log(i) / width)) if i > 0.0 else 0 for i in rota
+        )
+        similar = []
+        candidates = []
+        for shift in itertools.product((-1, 0, 1), repeat=len(key)):
+            neighbour = tuple(k + d for k, d in zip(key, shift))
+            # unique conformers are sorted by energy, start with the closest
+            for b, rotb in reversed(buckets.get(neighbour, ())):
+                if energies[a] - energies[b] >= window:
+                    break
+                if all(
+                    abs(ba - bb) <= bthr * max(ba, bb) for ba, bb in zip(rota, rotb)
+                ):
+                    similar.append(b)
+                else:
+                    candidates.append(b)
+        if candidates:
+            rmsd = rmsd_batch(
+                [structures[a]] * len(candidates), [structures[b] for b in candidates]
+            )
+            similar.extend(b for b, i in zip(candidates, rmsd) if i < rthr)
+        if similar:
+            # the conformer with the lowest energy is the reference
+            pairs.append((a, min(similar)))
+        else:
+            buckets.setdefault(key, []).append((a, rota))
+    return pairs
+
+
+@traced("enso")
+def crest_routine(args, results, func, crestcheck, json_dict, part="part2"):
     """check if two conformers are rotamers of each other,
     this check is always performed, but removing conformers depends on 
     the value of crestcheck"""
     error_logical = False
+    if part == "part1":
+        consider = "consider_for_part2"
+        relative = "rel_energy"
+        delta = "ΔE"
+        optimization = "crude DFT-optimization"
+    else:
+        consider = "consider_for_part3"
+        relative = "rel_free_energy"
+        delta = "ΔG"
+        optimization = "DFT-optimization"
     cwd = os.getcwd()
-    dirn = "conformer_rotamer_check"  ### directory name
-    fn = "conformers.xyz"  ### file name
-    dirp = os.path.join(cwd, dirn)  ### directory path
-    fp = os.path.join(dirp, fn)  ### file path
-
-    ### create new directory
-    if not os.path.isdir(dirp):
-        mkdir_p(dirp)
-    ### delete file if it already exists
-    if os.path.isfile(fp):
-        os.remove(fp)
 
     ### sort conformers according to energy of optimization
     results.sort(key=lambda x: float(x.energy_opt))
-    ### cp coord file of lowest conformer in directory
+    structures = []
     try:
-        shutil.copy(
-            os.path.join(results[0].name, func, "coord"), os.path.join(dirp, "coord")
-        )
-    except:
+        for i in results:
+            structures.append(geometries.coordinates(
+                geometries.read_coord(os.path.join(cwd, i.name, func, "coord"))
+            ))
+    except (OSError, ValueError, IndexError):
         print(
-            "ERROR: while copying the coord file from {}! Probably, the "
+            "ERROR: while reading the coord file from {}! Probably, the "
             "corresponding directory or file does not exist.".format(
-                os.path.join(results[0].name, func)
+                os.path.join(i.name, func)
             )
         )
         error_logical = True
 
-    ### write crest file in xyz
-    with open(fp, "a", encoding=coding, newline=None) as inp:
-        for i in results:
-            conf_xyz, nat = coord2xyz(
-                os.path.join(cwd, i.name, func)
-            )  ### coordinates in xyz
-            inp.write("  {}\n".format(nat))  ### number of atoms
-            inp.write("{:20.8f}        !{}\n".format(i.energy_opt, i.name))  ### energy
-            for line in conf_xyz:
-                inp.write(line + "\n")
-
     print(
         "\nChecking if conformers became rotamers of each other during "
-        "the DFT-optimization.\nThe check is performed in the directory"
-        " {}.".format(dirn)
+        "the {}.".format(optimization)
     )
-
-    ### call crest
-    print("Calling CREST to identify rotamers.")
-    with open(os.path.join(dirp, "crest.out"), "w", newline=None) as outputfile:
-        subprocess.call(
-            [crestpath, "-cregen", fn, "-enso"],
-            shell=False,
-            stdin=None,
-            stderr=subprocess.STDOUT,
-            universal_newlines=False,
-            cwd=dirp,
-            stdout=outputfile,
-            env=environsettings,
+    if not error_logical:
+        pairs = find_rotamers(
+            [float(i.energy_opt) for i in results], structures, geometries.atoms
         )
-    time.sleep(0.05)
-    ### read in crest results
-    try:
-        with open(
-            os.path.join(dirp, "cregen.enso"), "r", encoding=coding, newline=None
-        ) as inp:
-            store = inp.readlines()
-    except:
-        print("ERROR: output file (cregen.enso) of CREST routine does not exist!")
-        error_logical = True
 
     if error_logical:
         print("ERROR: CREST-CHECK can not be performed!")
     else:
         rotlist = []
         rotdict = {}
-        if " ALL UNIQUE\n" in store:
+        if not pairs:
             print("No conformers are identified as rotamers or identical.")
-        elif " DUPLICATES FOUND\n" in store:
+        else:
             if args.crestcheck:
                 print(
                     "\nWARNING: The following conformers are identified as "
@@ -779,28 +1508,26 @@ def crest_routine(args, results, func, crestcheck, json_dict, crestpath, environ
                     "rotamers or identical.\nWARNING: They are NOT sorted out "
                     "since crestcheck is switched off."
                 )
-            try:
-                length = max([len(str(j)) for i in store[1:] for j in i.split()]) + 4
-            except ValueError:
-                length = 4 + int(args.nconf) + 1
+            length = max([len(results[i].name) for pair in pairs for i in pair]) + 1
             print(
                 "{:{digits}} {:10}  {:5}<--> {:{digits}} {:10}  {:5}".format(
-                    "CONFA", "E(A):", "ΔG(A):", "CONFB", "E(B):", "ΔG(B):", digits=length
+                    "CONFA", "E(A):", delta + "(A):", "CONFB", "E(B):", delta + "(B):",
+                    digits=length,
                 )
             )
-            for line in store[1:]:
-                confa = results[int(line.split()[0]) - 1]
-                confb = results[int(line.split()[1]) - 1]
+            for a, b in pairs:
+                confa = results[a]
+                confb = results[b]
                 rotlist.append(confa.name)
                 rotdict[confa.name] = confb.name
                 print(
                     "{:{digits}} {:>10.5f} {:>5.2f} <--> {:{digits}} {:>10.5f} {:>5.2f}".format(
                         confa.name,
                         confa.energy_opt,
-                        confa.rel_free_energy,
+                        getattr(confa, relative),
                         confb.name,
                         confb.energy_opt,
-                        confb.rel_free_energy,
+                        getattr(confb, relative),
                         digits=length,
                     )
                 )
@@ -810,23 +1537,20 @@ def crest_routine(args, results, func, crestcheck, json_dict, crestpath, environ
                     if json_dict[confa]["removed_by_user"]:
                         for i in list(results):
                             if i.name == confa:
-                                json_dict[confa]["consider_for_part3"] = False
+                                json_dict[confa][consider] = False
                                 results.remove(i)
                     if json_dict[confb]["removed_by_user"]:
                         for i in list(results):
                             if i.name == confb:
-                                json_dict[confb]["consider_for_part3"] = False
+                                json_dict[confb][consider] = False
                                 results.remove(i)
 
             if args.crestcheck and rotlist:
                 for i in list(results):
                     if i.name in rotlist:
-                        json_dict[i.name]["consider_for_part3"] = False
+                        json_dict[i.name][consider] = False
                         results.remove(i)
                         print("Removing {:{digits}}.".format(i.name, digits=length))
-        else:
-            print("ERROR: could not read CREST output (cregen.enso)!.")
-            error_logical = True
     if error_logical:
         rotdict = {}
     return rotdict
@@ -860,39 +1584,33 @@ def get_degeneracy(cwd, results, tmp_results, input_object):
         input_object.json_dict[conf.name]["degeneracy"] = conf.degeneracy
     return results, tmp_results, input_object
 
+@traced("enso")
 def write_trj(results, cwd, outpath, optfolder, nat):
     """Write trajectory to file"""
     try:
         with open(outpath, "a", encoding=coding, newline=None) as out:
             for i in results:
-                conf_xyz, nat = coord2xyz(
-                    os.path.join(cwd, i.name, optfolder)
-                )  ### coordinates in xyz
-                out.write("  {}\n".format(nat))  ### number of atoms
-                out.write(
-                    "E= {:20.8f}  G= {:20.8f}      !{}\n".format(
+                geometries.write_xyz(
+                    geometries.read_coord(os.path.join(cwd, i.name, optfolder, "coord")),
+                    out,
+                    "E= {:20.8f}  G= {:20.8f}      !{}".format(
                         i.sp3_energy, i.free_energy, i.name
-                    )
-                )  ### energy
-                for line in conf_xyz:
-                    out.write(line + "\n")
+                    ),
+                )
     except (FileExistsError, ValueError):
         print("Could not write trajectory: {}.".format(last_folders(outpath, 1)))
     newoutpath = outpath.split('.')[0]+'_G.xyz'
     try:
         with open(newoutpath, "w", encoding=coding, newline=None) as out:
             for i in results:
-                conf_xyz, nat = coord2xyz(
-                    os.path.join(cwd, i.name, optfolder)
-                )  ### coordinates in xyz
-                out.write("  {}\n".format(nat))  ### number of atoms
-                out.write(
-                    "G= {:20.8f}  E= {:20.8f}      !{}\n".format(
+                # the coord files are not read again
+                geometries.write_xyz(
+                    geometries.read_coord(os.path.join(cwd, i.name, optfolder, "coord")),
+                    out,
+                    "G= {:20.8f}  E= {:20.8f}      !{}".format(
                         i.free_energy, i.sp3_energy, i.name
-                    )
-                )  ### free energy
-                for line in conf_xyz:
-                    out.write(line + "\n")
+                    ),
+                )
     except (FileExistsError, ValueError):
         print("Could not write trajectory: {}.".format(last_folders(outpath, 1)))
     return
@@ -900,111 +1618,109 @@ def write_trj(results, cwd, outpath, optfolder, nat):
 
 def coord2xyz(path):
     """convert TURBOMOLE coord file to xyz"""
-    time.sleep(0.1)
-    bohr2ang = 0.52917721067
-    with open(os.path.join(path, "coord"), "r", encoding=coding, newline=None) as f:
-        coord = f.readlines()
-    x = []
-    y = []
-    z = []
-    atom = []
-    for line in coord[1:]:
-        if "$" in line:  # stop at $end ...
-            break
-        x.append(float(line.split()[0]) * bohr2ang)
-        y.append(float(line.split()[1]) * bohr2ang)
-        z.append(float(line.split()[2]) * bohr2ang)
-        atom.append(str(line.split()[3].lower()))
-    # natoms = int(len(coord[1:-1])) # unused
-    coordxyz = []
-    for i in range(len(x)):
-        coordxyz.append(
-            "{:3} {: 19.10f}  {: 19.10f}  {: 19.10f}".format(
-                atom[i][0].upper() + atom[i][1:], x[i], y[i], z[i]
-            )
-        )
+    coordxyz = geometries.xyz_lines(
+        geometries.read_coord(os.path.join(path, "coord"))
+    )
     return coordxyz, len(coordxyz)
 
 
-def RMSD_routine(workdir, nat):
-    bohr2ang = 0.52917721067
-    new = [[0.0, 0.0, 0.0] for _ in range(nat)]
-    old = [[0.0, 0.0, 0.0] for _ in range(nat)]
-    squared_difference_x = []
-    squared_difference_y = []
-    squared_difference_z = []
-    with open(os.path.join(workdir, "coord"), "r", encoding=coding, newline=None) as f:
-        coord = f.readlines()
-        x = []
-        y = []
-        z = []
-        for line in coord[1:]:
-            if "$" in line:  # stop at $end ...
-                break
-            x.append(float(line.split()[0]) * bohr2ang)
-            y.append(float(line.split()[1]) * bohr2ang)
-            z.append(float(line.split()[2]) * bohr2ang)
-    for i in range(len(x)):
-        # old.append("{: 09.7f}  {: 09.7f}  {: 09.7f}".format(float(x[i]),float(y[i]),float(z[i])))
-        old[i][0] = float(x[i])
-        old[i][1] = float(y[i])
-        old[i][2] = float(z[i])
-
-    with open(
-        os.path.join(workdir, "xtbopt.coord"), "r", encoding=coding, newline=None
-    ) as f:
-        coord = f.readlines()
-        x = []
-        y = []
-        z = []
-        for line in coord[1:]:
-            if "$" in line:  # stop at $end ...
-                break
-            x.append(float(line.split()[0]) * bohr2ang)
-            y.append(float(line.split()[1]) * bohr2ang)
-            z.append(float(line.split()[2]) * bohr2ang)
-    for i in range(len(x)):
-        # old.append("{: 09.7f}  {: 09.7f}  {: 09.7f}".format(float(x[i]),float(y[i]),float(z[i])))
-        new[i][0] = float(x[i])
-        new[i][1] = float(y[i])
-        new[i][2] = float(z[i])
-
-    for i in range(len(old)):
-        squared_difference_x.append(float((old[i][0] - new[i][0]) ** 2))
-        squared_difference_y.append(float((old[i][1] - new[i][1]) ** 2))
-        squared_difference_z.append(float((old[i][2] - new[i][2]) ** 2))
-
-    sumdiff = math.fsum(
-        squared_difference_x[i] + squared_difference_y[i] + squared_difference_z[i]
-        for i in range(nat)
+def _center(coords):
+    """coordinates moved to their centroid and the sum of their squares"""
+    nat = len(coords)
+    cx = math.fsum(a[0] for a in coords) / nat
+    cy = math.fsum(a[1] for a in coords) / nat
+    cz = math.fsum(a[2] for a in coords) / nat
+    centered = [(a[0] - cx, a[1] - cy, a[2] - cz) for a in coords]
+    return centered, math.fsum(x * x + y * y + z * z for x, y, z in centered)
+
+
+def _qcp_rmsd(a, ga, b, gb):
+    """RMSD after optimal superposition of the centered structures a and b
+    (quaternion characteristic polynomial method of Theobald), ga and gb
+    are the sums of squares of a and b"""
+    nat = len(a)
+    sxx = sxy = sxz = syx = syy = syz = szx = szy = szz = 0.0
+    for (x1, y1, z1), (x2, y2, z2) in zip(a, b):
+        sxx += x1 * x2
+        sxy += x1 * y2
+        sxz += x1 * z2
+        syx += y1 * x2
+        syy += y1 * y2
+        syz += y1 * z2
+        szx += z1 * x2
+        szy += z1 * y2
+        szz += z1 * z2
+    # key matrix, the largest eigenvalue gives the best superposition
+    k = [
+        [sxx + syy + szz, syz - szy, szx - sxz, sxy - syx],
+        [syz - szy, sxx - syy - szz, sxy + syx, szx + sxz],
+        [szx - sxz, sxy + syx, -sxx + syy - szz, syz + szy],
+        [sxy - syx, szx + sxz, syz + szy, -sxx - syy + szz],
+    ]
+    # characteristic polynomial x**4 + c2*x**2 + c1*x + c0
+    c2 = -2.0 * (
+        sxx ** 2 + sxy ** 2 + sxz ** 2 + syx ** 2 + syy ** 2 + syz ** 2
+        + szx ** 2 + szy ** 2 + szz ** 2
     )
-
-    return math.sqrt(sumdiff / nat)
-
-def RMSD_subprocess(workdir, environsettings):
-    rmsd = None
-    with open(os.path.join(workdir, "rmsd"), "w", newline=None) as outputfile:
-        callargs = ["rmsd", "coord", "xtbopt.coord"]
-        subprocess.call(
-            callargs,
-            shell=False,
-            stdin=None,
-            stderr=subprocess.STDOUT,
-            universal_newlines=False,
-            cwd=workdir,
-            stdout=outputfile,
-            env=environsettings,
+    c1 = -8.0 * (
+        sxx * (syy * szz - syz * szy)
+        - sxy * (syx * szz - syz * szx)
+        + sxz * (syx * szy - syy * szx)
+    )
+    c0 = 0.0
+    for col in range(4):
+        minor = [row[:col] + row[col + 1 :] for row in k[1:]]
+        c0 += (-1) ** col * k[0][col] * (
+            minor[0][0] * (minor[1][1] * minor[2][2] - minor[1][2] * minor[2][1])
+            - minor[0][1] * (minor[1][0] * minor[2][2] - minor[1][2] * minor[2][0])
+            + minor[0][2] * (minor[1][0] * minor[2][1] - minor[1][1] * minor[2][0])
         )
-    with open(os.path.join(workdir, "rmsd"), "r", encoding=coding, newline=None) as out:
-        stor = out.readlines()
-    for line in stor:
-        if " rmsd (Angstroem) =" in line:
-            try:
-                rmsd = float(line.split()[3])
-            except:
-                rmsd = None
-    return rmsd
+    # Newton iteration from the upper bound of the largest eigenvalue
+    lmax = (ga + gb) / 2.0
+    for _ in range(50):
+        old = lmax
+        p = ((lmax * lmax + c2) * lmax + c1) * lmax + c0
+        dp = (4.0 * lmax * lmax + 2.0 * c2) * lmax + c1
+        if dp == 0.0:
+            break
+        lmax -= p / dp
+        if abs(lmax - old) < 1e-11 * abs(lmax):
+            break
+    return math.sqrt(max(0.0, (ga + gb - 2.0 * lmax) / nat))
 
+
+def kabsch_rmsd(first, second):
+    """RMSD in Angstrom between two structures (lists of [x, y, z]) after
+    optimal superposition"""
+    a, ga = _center(first)
+    b, gb = _center(second)
+    return _qcp_rmsd(a, ga, b, gb)
+
+
+def _np_rmsd(a, b):
+    """RMSD after optimal superposition of the centered structures in the
+    arrays a and b (..., nat, 3) (Kabsch with reflection correction)"""
+    cov = np.einsum("...ai,...aj->...ij", a, b)
+    sv = np.linalg.svd(cov, compute_uv=False)
+    sv[..., 2] *= np.sign(np.linalg.det(cov))
+    dev = (a ** 2).sum(axis=(-2, -1)) + (b ** 2).sum(axis=(-2, -1))
+    dev -= 2.0 * sv.sum(axis=-1)
+    return np.sqrt(np.maximum(dev, 0.0) / a.shape[-2])
+
+
+def rmsd_batch(first, second):
+    """RMSD after optimal superposition of first[i] and second[i] for all i,
+    with NumPy all pairs are calculated at once"""
+    if np is not None and first:
+        a = np.asarray(first, dtype=float)
+        b = np.asarray(second, dtype=float)
+        a = a - a.mean(axis=1, keepdims=True)
+        b = b - b.mean(axis=1, keepdims=True)
+        return [float(i) for i in _np_rmsd(a, b)]
+    return [kabsch_rmsd(a, b) for a, b in zip(first, second)]
+
+
+@traced("enso")
 def write_anmr_enso(cwd, results):
     """write anmr_enso"""
     try:
@@ -3311,6 +4027,359 @@ def move_recursively(path, filename):
     return
 
 
+def fsync_dir(path):
+    """make the renames and removals in the folder path durable"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # folders can not be opened e.g. on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# process groups of all external programs which are currently running
+running_processes = set()
+running_lock = Lock()
+
+
+def kill_process_group(pid, sig):
+    """send sig to the process group of pid"""
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_running_processes(grace=2.0):
+    """kill all external programs started by ENSO, e.g. after Ctrl-C"""
+    with running_lock:
+        pids = list(running_processes)
+    for pid in pids:
+        kill_process_group(pid, signal.SIGTERM)
+    if pids:
+        time.sleep(grace)
+    for pid in pids:
+        kill_process_group(pid, signal.SIGKILL)
+
+
+def exitcode(status):
+    """returncode from the status of os.wait4 (negative for signals)"""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+async def supervise(callargs, cwd, outputfile, env, timeout):
+    """run one external program in its own process group, kill the
+    whole group if it exceeds timeout (in seconds). The program is reaped
+    with os.wait4 which also returns its resource usage (and that of its
+    children). Returns returncode (None if it was killed) and rusage."""
+    loop = asyncio.get_event_loop()
+    proc = subprocess.Popen(
+        callargs,
+        stdin=None,
+        stdout=outputfile,
+        stderr=subprocess.STDOUT,
+        cwd=cwd,
+        env=env,
+        start_new_session=True,
+    )
+    with running_lock:
+        running_processes.add(proc.pid)
+    finished = loop.run_in_executor(None, os.wait4, proc.pid, 0)
+    try:
+        _, status, rusage = await asyncio.wait_for(asyncio.shield(finished), timeout)
+        proc.returncode = exitcode(status)
+        return proc.returncode, rusage
+    except asyncio.TimeoutError:
+        kill_process_group(proc.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(finished), 5.0)
+        except asyncio.TimeoutError:
+            pass
+        # remaining children of the group
+        kill_process_group(proc.pid, signal.SIGKILL)
+        _, status, rusage = await finished
+        proc.returncode = exitcode(status)
+        return None, rusage
+    finally:
+        with running_lock:
+            running_processes.discard(proc.pid)
+
+
+def run_supervised(callargs, cwd, outputfile, env=None, timeout=None, usage=None):
+    """Replacement for subprocess.call, the program is started with asyncio
+    and is killed (together with its children) after timeout seconds.
+    Returns the returncode or None if the program was killed. The CPU time,
+    peak memory and returncode are added to the dictionary usage."""
+    loop = asyncio.new_event_loop()
+    try:
+        returncode, rusage = loop.run_until_complete(
+            supervise(callargs, cwd, outputfile, env, timeout)
+        )
+    finally:
+        loop.close()
+    if usage is not None:
+        usage["cpu"] = usage.get("cpu", 0.0) + rusage.ru_utime + rusage.ru_stime
+        # ru_maxrss is in kB on Linux
+        usage["maxrss"] = max(usage.get("maxrss", 0), rusage.ru_maxrss)
+        usage["returncode"] = returncode
+        usage["calls"] = usage.get("calls", 0) + 1
+    return returncode
+
+
+class output_data():
+    """values read from the output of a program by read_output. The flags
+    terminated, converged and error are True if their marker was found,
+    energy, gsolv and rrho are floats, cycles, scf_cycles and lines are ints
+    and None if they were not found. invalid is True if a value was found but could
+    not be converted, exists is False if the file could not be read."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.exists = False
+        self.invalid = False
+        self.terminated = False
+        self.converged = False
+        self.error = False
+        self.energy = None
+        self.gsolv = None
+        self.rrho = None
+        self.cycles = None
+        self.scf_cycles = None
+        self.lines = None
+
+
+# The rules (attribute, kind, marker, field) for the program outputs, kind:
+# found: the marker is somewhere in the file, line: a line equals the
+# marker, last/first: field of the last/first line containing the marker,
+# count: number of lines containing the marker, sum: sum of the field after
+# the marker over all lines containing it, tail: field of line number
+# marker counted from the end, lines: number of lines.
+xtb_errors = [
+    ("error", "found", "external code error", None),
+    ("error", "found", "|grad| > 500, something is totally wrong!", None),
+    ("error", "found", "abnormal termination of xtb", None),
+    ("scf_cycles", "sum", "convergence criteria satisfied after", 0),
+]
+orca_scf = [("scf_cycles", "sum", "SCF CONVERGED AFTER", 0)]
+orca_sp = orca_scf + [
+    ("energy", "last", "FINAL SINGLE POINT ENERGY", 4),
+    ("terminated", "found", "ORCA TERMINATED NORMALLY", None),
+]
+xtb_opt = xtb_errors + [
+    ("cycles", "last", "   *** GEOMETRY OPTIMIZATION CONVERGED AFTER ", 5),
+]
+output_formats = {
+    # TURBOMOLE
+    "ridft": [
+        ("converged", "line", " ENERGY CONVERGED !", None),
+        ("scf_cycles", "sum", "convergence criteria satisfied after", 0),
+    ],
+    "energy": [("energy", "tail", 2, 1), ("lines", "lines", None, None)],
+    "job.last": [
+        ("energy", "last", "                 |  total energy      =", 4),
+        ("converged", "found", "CONVERGENCY CRITERIA FULFILLED IN CYCLE", None),
+        ("scf_cycles", "sum", "convergence criteria satisfied after", 0),
+    ],
+    "rdgrad": [
+        (
+            "terminated",
+            "line",
+            "     --- calculation of the energy gradient finished ---",
+            None,
+        )
+    ],
+    "thermo": [("rrho", "first", "G(T)           ", 1)],
+    "escf": [("terminated", "line", "   ****  escf : all done  ****", None)],
+    "mpshift": [
+        (
+            "terminated",
+            "line",
+            "   ***  nmr shielding constants written onto general input/output "
+            "file!  ***",
+            None,
+        )
+    ],
+    "cosmors": [("gsolv", "last", " Gsolv(", 2)],
+    # ORCA
+    "orca": orca_sp,
+    "orca_opt": orca_sp + [("cycles", "count", "GEOMETRY OPTIMIZATION CYCLE", None)],
+    "orca_freq": orca_scf + [
+        ("rrho", "last", "G-E(el)                           ...", 2),
+        ("terminated", "found", "ORCA TERMINATED NORMALLY", None),
+    ],
+    "orca_nmr": orca_scf + [
+        ("terminated", "found", "ORCA TERMINATED NORMALLY", None)
+    ],
+    # xTB
+    "xtb_sp": xtb_errors + [("energy", "last", "| TOTAL ENERGY", 3)],
+    "xtb_opt": xtb_opt,
+    "xtb_orca_opt": xtb_opt + orca_sp,
+}
+
+
+def _find_line(buf, marker, reverse=True, whole=False):
+    """the line of buf (bytes or mmap) containing marker, searched from the
+    end if reverse, with whole the line has to be equal to marker"""
+    size = len(buf)
+    start, end = 0, size
+    while True:
+        if reverse:
+            pos = buf.rfind(marker, 0, end)
+        else:
+            pos = buf.find(marker, start)
+        if pos == -1:
+            return None
+        first = buf.rfind(b"\n", 0, pos) + 1
+        last = buf.find(b"\n", pos)
+        if not whole:
+            return buf[first : size if last == -1 else last]
+        # the line has to be terminated as well
+        if first == pos and last != -1 and buf[pos:last].rstrip(b"\r") == marker:
+            return marker
+        if reverse:
+            end = pos
+        else:
+            start = pos + 1
+
+
+def _count_lines(buf, marker=None):
+    """number of lines of buf or of the lines containing marker"""
+    count = 0
+    if marker is None:
+        chunk = 1 << 20
+        for i in range(0, len(buf), chunk):
+            count += buf[i : i + chunk].count(b"\n")
+        if len(buf) and buf[len(buf) - 1 :] != b"\n":
+            count += 1
+        return count
+    pos = buf.find(marker)
+    while pos != -1:
+        count += 1
+        pos = buf.find(b"\n", pos)
+        if pos == -1:
+            break
+        pos = buf.find(marker, pos)
+    return count
+
+
+def _sum_field(buf, marker, field):
+    """sum of the field after marker over all lines of buf containing
+    marker, values which can not be converted are skipped"""
+    total = 0
+    pos = buf.find(marker)
+    while pos != -1:
+        pos += len(marker)
+        end = buf.find(b"\n", pos)
+        if end == -1:
+            end = len(buf)
+        try:
+            total += int(buf[pos:end].split()[field])
+        except (ValueError, IndexError):
+            pass
+        pos = buf.find(marker, end)
+    return total
+
+
+def read_output(filename, rules):
+    """read the values of rules (or the name of a format in output_formats)
+    from filename, returns output_data. The file is memory-mapped and not
+    split into lines: markers at the end of the file (termination, final
+    energies) are searched from the end."""
+    if isinstance(rules, str):
+        rules = output_formats[rules]
+    data = output_data(filename)
+    try:
+        with open(filename, "rb") as inp:
+            data.exists = True
+            if os.fstat(inp.fileno()).st_size == 0:
+                _apply_rules(data, b"", rules)
+            else:
+                with mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    _apply_rules(data, mm, rules)
+    except OSError:
+        data.exists = False
+    return data
+
+
+def _apply_rules(data, buf, rules):
+    for attribute, kind, marker, field in rules:
+        convert = int if attribute in ("cycles", "scf_cycles", "lines") else float
+        if isinstance(marker, str):
+            marker = marker.encode(coding)
+        if kind in ("found", "line"):
+            if _find_line(buf, marker, whole=(kind == "line")) is not None:
+                setattr(data, attribute, True)
+            continue
+        if kind == "count":
+            setattr(data, attribute, _count_lines(buf, marker))
+            continue
+        if kind == "lines":
+            setattr(data, attribute, _count_lines(buf))
+            continue
+        if kind == "sum":
+            setattr(data, attribute, _sum_field(buf, marker, field))
+            continue
+        if kind == "tail":
+            lines = bytes(buf[-4096 * marker :]).splitlines()
+            line = lines[-marker] if len(lines) >= marker else None
+        else:
+            line = _find_line(buf, marker, reverse=(kind == "last"))
+        if line is None:
+            continue
+        try:
+            setattr(data, attribute, convert(line.split()[field]))
+        except (ValueError, IndexError):
+            data.invalid = True
+
+
+def set_timeouts(timeout):
+    """set the wall-clock limits (in hours) of the external programs,
+    either one value for all jobtypes or jobtype=hours, e.g. opt=24 sp=2"""
+    if not timeout:
+        return
+    for item in timeout:
+        try:
+            if "=" in item:
+                jobtype, hours = item.split("=", 1)
+                if jobtype not in qm_job.jobtypes:
+                    print(
+                        "ERROR: unknown jobtype {} for --timeout! Options are: "
+                        "{}".format(jobtype, ", ".join(qm_job.jobtypes))
+                    )
+                    sys.exit(1)
+                qm_job.timeouts[jobtype] = float(hours) * 3600.0
+            else:
+                for jobtype in qm_job.jobtypes:
+                    qm_job.timeouts.setdefault(jobtype, float(item) * 3600.0)
+        except ValueError:
+            print("ERROR: could not convert --timeout {}!".format(item))
+            sys.exit(1)
+
+
+def temperature_grid(value):
+    """temperatures in K of --temperature-scan TMIN:TMAX:STEP (TMAX
+    included)"""
+    try:
+        tmin, tmax, step = [float(x) for x in value.split(":")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "could not convert {}, expected TMIN:TMAX:STEP!".format(value)
+        )
+    if tmin <= 0.0 or tmax < tmin or step <= 0.0:
+        raise argparse.ArgumentTypeError(
+            "{} requires 0 < TMIN <= TMAX and STEP > 0!".format(value)
+        )
+    n = int(math.floor((tmax - tmin) / step + 1.0e-6))
+    return [round(tmin + k * step, 6) for k in range(n + 1)]
+
+
 class qm_job():
     # class attributes:
     name = ""
@@ -3350,6 +4419,27 @@ class qm_job():
     temperature = 298.15
     nat = 0
     environ = None
+    failedjob = None  # jobtype at which a chain of jobs stopped
+    timedout = False  # an external program exceeded the time limit
+    # wall-clock limits in seconds for each jobtype (set by --timeout)
+    timeouts = {}
+    # mRRHO thresholds in cm-1, the same as in the xTB input
+    imagthr = -50.0
+    sthr = 50.0
+    jobtypes = (
+        "prep", "sp", "opt", "xtbopt", "rrhoxtb", "rrhotm", "rrhoorca",
+        "solv", "cosmotherm", "gbsa_gsolv", "smd_gsolv", "nmrJ", "nmrS",
+    )
+    # jobtypes which run on one core only (cefine, writing inputs)
+    serialjobs = ("prep", "genericout")
+    timings = None  # measured wall times {walltime_key: seconds}
+    # resources of the external programs of the running job (run_supervised)
+    usage = None
+    resources = None  # resources of the finished jobs {walltime_key: {...}}
+    # folders of the conformer (tried in order) with converged orbitals
+    # which are used as start guess
+    guess = None
+    guessfiles = ()  # files needed for the start guess
     progsettings = {
         "tempprogpath": "",
         "xtbpath": "",
@@ -3363,9 +4453,114 @@ class qm_job():
     def execute(self):
         pass
 
-    def _sp(self, silent=False):
-        pass
-
+    def _call(self, callargs, outputfile, env=None, cwd=None):
+        """run an external program in the workdir (or cwd), it is killed if
+        the time limit of the jobtype is exceeded"""
+        if cwd is None:
+            cwd = self.workdir
+        timeout = self.timeouts.get(self.jobtype, None)
+        with trace.span(
+            os.path.basename(callargs[0]),
+            "program",
+            conformer=self.name,
+            jobtype=self.jobtype,
+            workdir=last_folders(cwd, 2),
+        ) as span:
+            returncode = run_supervised(
+                callargs, cwd, outputfile, env=env, timeout=timeout, usage=self.usage
+            )
+            span.args["returncode"] = returncode
+        if returncode is None:
+            self.timedout = True
+            print(
+                "ERROR: {} in {} exceeded the time limit of {:.2f} h and was "
+                "killed!".format(
+                    os.path.basename(callargs[0]),
+                    last_folders(cwd, 2),
+                    timeout / 3600.0,
+                ),
+                file=sys.stderr,
+            )
+        return returncode
+
+    def _read_output(self, output, rules):
+        """read_output of output in the workdir, the SCF cycles are added to
+        the resources of the job"""
+        out = read_output(os.path.join(self.workdir, output), rules)
+        if self.usage is not None and out.scf_cycles:
+            self.usage["scf_cycles"] = (
+                self.usage.get("scf_cycles", 0) + out.scf_cycles
+            )
+        return out
+
+    def maxcores(self):
+        """the number of cores the job can use, None if not limited"""
+        if self.jobtype in self.serialjobs:
+            return 1
+        return None
+
+    def set_cores(self, ncores):
+        """set the number of cores of this job consistently for all programs:
+        PARNODES (TM), %pal nprocs and -smpcpus (progsettings['omp']) and
+        OMP_NUM_THREADS/MKL_NUM_THREADS (xTB)"""
+        self.progsettings = dict(self.progsettings)
+        self.progsettings["omp"] = int(ncores)
+        if self.environ is not None:
+            self.environ = dict(self.environ)
+            self.environ["PARNODES"] = str(ncores)
+            self.environ["OMP_NUM_THREADS"] = str(ncores)
+            self.environ["MKL_NUM_THREADS"] = str(ncores)
+
+    def _keep_guess(self):
+        """mark the orbitals in the workdir as converged in guess.json, later
+        jobs of this conformer can start from them (see self.guess)"""
+        if self.onlyread:
+            return
+        files = {}
+        for name in self.guessfiles:
+            try:
+                stat = os.stat(os.path.join(self.workdir, name))
+            except OSError:
+                continue
+            files[name] = [stat.st_mtime_ns, stat.st_size]
+        info = {"chrg": self.chrg, "unpaired": self.unpaired, "files": files}
+        with open(os.path.join(self.workdir, "guess.json"), "w", newline=None) as out:
+            json.dump(info, out)
+
+    def _read_guess(self):
+        """return the content of the guessfiles {name: bytes} of the first
+        folder in self.guess with converged orbitals for the same charge and
+        number of unpaired electrons, files which were changed after the
+        orbitals were converged are not used. None if there is no guess."""
+        for folder in self.guess or []:
+            files = {}
+            try:
+                folder = os.path.join(os.getcwd(), self.name, folder)
+                with open(
+                    os.path.join(folder, "guess.json"), "r", encoding=coding, newline=None
+                ) as inp:
+                    info = json.load(inp)
+                if int(info["chrg"]) != int(self.chrg) or int(info["unpaired"]) != int(
+                    self.unpaired
+                ):
+                    continue
+                for name, stamp in info["files"].items():
+                    if name not in self.guessfiles:
+                        continue
+                    stat = os.stat(os.path.join(folder, name))
+                    if [stat.st_mtime_ns, stat.st_size] != stamp:
+                        raise ValueError
+                    with open(os.path.join(folder, name), "rb") as inp:
+                        files[name] = inp.read()
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if files:
+                return files
+        return None
+
+    def _sp(self, silent=False):
+        pass
+
     def _opt(self):
         pass
 
@@ -3379,8 +4574,6 @@ class qm_job():
         """ Calculate additive GBSA solvation contribution by Gsolv = Esolv - Egas,
         using xTB and the GFNn or GFN-FF hamiltonian."""
         if not self.onlyread:
-            tmp_gas = 0
-            tmp_solv = 0
             exchange_name = {'gfn1': 'gfn 1', 'gfn2': 'gfn 2', 'gfnff': 'gfnff'}
             gfnhamiltonian = exchange_name[str(self.gfnv)]
             print("Running GBSA-Gsolv calculation in " + last_folders(self.workdir, 2))
@@ -3397,7 +4590,7 @@ class qm_job():
                     os.remove(os.path.join(self.workdir, "charges"))
             # run gas phase single-point:
             with open(os.path.join(self.workdir, "gas.out"), "w", newline=None) as outputfile:
-                returncode = subprocess.call(
+                returncode = self._call(
                     [self.progsettings["xtbpath"],
                     "coord",
                     "--" + gfnhamiltonian,
@@ -3406,12 +4599,7 @@ class qm_job():
                     str(self.chrg),
                     "--norestart",
                     ],
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                     env=self.environ,
                 )
             if returncode != 0:
@@ -3425,53 +4613,8 @@ class qm_job():
                 )
                 return
             # read gas phase single-point:
-            if os.path.isfile(os.path.join(self.workdir, "gas.out")):
-                with open(
-                    os.path.join(self.workdir, "gas.out"),
-                    "r",
-                    encoding=coding,
-                    newline=None,
-                ) as inp:
-                    store = inp.readlines()
-                    for line in store:
-                        if "| TOTAL ENERGY" in line:
-                            try:
-                                tmp_gas = float(line.split()[3])
-                                self.success = True
-                            except:
-                                print(
-                                    "Error while converting gas phase "
-                                    "single-point in: {}".format(
-                                        last_folders(self.workdir, 2)
-                                    ),
-                                    file=sys.stderr,
-                                )
-                                tmp_gas = None
-                                self.gsolv = None
-                                self.success = False
-                                return
-                        if (
-                            "external code error" in line
-                            or "|grad| > 500, something is totally wrong!" in line
-                            or "abnormal termination" in line
-                        ):
-                            print(
-                                "ERROR: GFN-xTB error in {:18}".format(
-                                    last_folders(self.workdir, 2)
-                                ),
-                                file=sys.stderr,
-                            )
-                            self.gsolv = None
-                            self.success = False
-                            return
-            else:
-                print(
-                    "WARNING: File {} doesn't exist!".format(
-                        os.path.join(self.workdir, "gas.out")
-                    )
-                )
-                self.gsolv = None
-                self.success = False
+            tmp_gas = self._read_xtb_sp("gas.out", "gas phase single-point")
+            if tmp_gas is None:
                 return
             # run single point in solvent:
             # ``reference'' corresponds to 1\;bar of ideal gas and 1\;mol/L of liquid
@@ -3479,7 +4622,7 @@ class qm_job():
             with open(
                 os.path.join(self.workdir, "solv.out"), "w", newline=None
             ) as outputfile:
-                returncode = subprocess.call(
+                returncode = self._call(
                     [
                     self.progsettings["xtbpath"],
                     "coord",
@@ -3492,12 +4635,7 @@ class qm_job():
                     str(self.chrg),
                     "--norestart",
                     ],
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                     env=self.environ,
                 )
             if returncode != 0:
@@ -3510,68 +4648,170 @@ class qm_job():
                     file=sys.stderr,
                 )
                 return
-            time.sleep(0.05)
             # read solv.out:
-            if os.path.isfile(os.path.join(self.workdir, "solv.out")):
-                with open(
-                    os.path.join(self.workdir, "solv.out"),
-                    "r",
-                    encoding=coding,
-                    newline=None,
-                ) as inp:
-                    store = inp.readlines()
-                    for line in store:
-                        if "| TOTAL ENERGY" in line:
-                            try:
-                                tmp_solv = float(line.split()[3])
-                                self.success = True
-                            except:
-                                print(
-                                    "Error while converting solvation "
-                                    "single-point in: {}".format(
-                                        last_folders(self.workdir, 2)
-                                    ),
-                                    file=sys.stderr,
-                                )
-                                tmp_solv = None
-                                self.success = False
-                                self.gsolve = None
-                                return
-                        if (
-                            "external code error" in line
-                            or "|grad| > 500, something is totally wrong!" in line
-                            or "abnormal termination of xtb" in line
-                        ):
-                            print(
-                                "ERROR: GFN-xTB error in {:18}".format(
-                                    last_folders(self.workdir, 2)
-                                ),
-                                file=sys.stderr,
-                            )
-                            self.gsolv = None
-                            self.success = False
-                            return
-            else:
-                print(
-                    "WARNING: File {} doesn't exist!".format(
-                        os.path.join(self.workdir, "gas.out"))
-                )
-                self.gsolv = None
-                self.success = False
-            if self.success:
-                if tmp_solv is None or tmp_gas is None:
-                    self.gsolv = None
-                    self.success = False
-                else:
-                    self.gsolv = tmp_solv - tmp_gas
-                    self.success = True
+            tmp_solv = self._read_xtb_sp("solv.out", "solvation single-point")
+            if tmp_solv is None:
+                return
+            self.gsolv = tmp_solv - tmp_gas
+            self.success = True
             return
 
+    def _read_xtb_sp(self, output, kind):
+        """total energy of the xTB single-point in output, sets success
+        and returns None on error"""
+        out = self._read_output(output, "xtb_sp")
+        self.success = False
+        self.gsolv = None
+        if not out.exists:
+            print(
+                "WARNING: File {} doesn't exist!".format(
+                    os.path.join(self.workdir, output)
+                )
+            )
+        elif out.error:
+            print(
+                "ERROR: GFN-xTB error in {:18}".format(last_folders(self.workdir, 2)),
+                file=sys.stderr,
+            )
+        elif out.energy is None:
+            print(
+                "Error while converting {} in: {}".format(
+                    kind, last_folders(self.workdir, 2)
+                ),
+                file=sys.stderr,
+            )
+        else:
+            self.success = True
+        return out.energy if self.success else None
+
+    def _rrho_key(self):
+        """everything the xTB hessian depends on, the temperature is not
+        part of it"""
+        with open(os.path.join(self.workdir, "coord"), "rb") as inp:
+            coord = hashlib.sha1(inp.read()).hexdigest()
+        return {
+            "coord": coord,
+            "gfnv": str(self.gfnv),
+            "solv": self.solv,
+            "chrg": self.chrg,
+        }
+
+    def _cached_rrho(self, key):
+        """the content of rrho_cache.json if it was written for key, else
+        None"""
+        try:
+            with open(
+                os.path.join(self.workdir, "rrho_cache.json"),
+                "r",
+                encoding=coding,
+                newline=None,
+            ) as inp:
+                data = json.load(inp)
+            if data["key"] != key:
+                return None
+            for item in ("freqs", "rotconst", "mass", "sigma"):
+                data[item]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return data
+
+    def _keep_rrho(self, key):
+        """collect frequencies, rotational constants, mass and symmetry
+        number of the xTB hessian calculation in rrho_cache.json, returns
+        the cache or None"""
+        try:
+            with open(
+                os.path.join(self.workdir, "xtb_enso.json"),
+                "r",
+                encoding=coding,
+                newline=None,
+            ) as inp:
+                xtbdata = json.load(inp)
+            freqs = []
+            with open(
+                os.path.join(self.workdir, "vibspectrum"),
+                "r",
+                encoding=coding,
+                newline=None,
+            ) as inp:
+                for line in inp:
+                    if line.lstrip().startswith(("$", "#")):
+                        continue
+                    items = line.split()
+                    if len(items) < 3:
+                        continue
+                    # the symmetry label is missing for translations and
+                    # rotations
+                    try:
+                        freqs.append(float(items[1]))
+                    except ValueError:
+                        freqs.append(float(items[2]))
+            coordfile = os.path.join(self.workdir, "xtbopt.coord")
+            if not os.path.isfile(coordfile):
+                coordfile = os.path.join(self.workdir, "coord")
+            with open(coordfile, "r", encoding=coding, newline=None) as inp:
+                atoms, coords = geometries._parse_coord(inp.readlines())
+        except (OSError, ValueError, IndexError):
+            return None
+        rotconst = rotational_constants(atoms, coords)
+        # remove translations and rotations (smallest absolute values)
+        ntr = 3 + len([b for b in rotconst if b > 0.0])
+        if len(atoms) == 1:
+            ntr = 3
+        freqs = sorted(sorted(freqs, key=abs)[ntr:])
+        pointgroup = xtbdata.get("point group", "c1")
+        data = {
+            "key": key,
+            "freqs": freqs,
+            "rotconst": rotconst,
+            "mass": math.fsum(atomic_masses.get(atom, 0.0) for atom in atoms),
+            "pointgroup": pointgroup,
+            "sigma": symmetry_number(pointgroup),
+            "nimag": xtbdata.get("number of imags", 0),
+            "ZPVE": xtbdata.get("ZPVE", 0.0),
+            "G(T)": xtbdata.get("G(T)", None),
+            "temperature": float(self.temperature),
+            "imagthr": float(self.imagthr),
+            "sthr": float(self.sthr),
+        }
+        with open(
+            os.path.join(self.workdir, "rrho_cache.json"), "w", newline=None
+        ) as out:
+            json.dump(data, out)
+        return data
+
+    def _eval_rrho(self, data):
+        """G(T) at self.temperature from the cached xTB hessian. The
+        difference to the temperature and thresholds of the xTB run is
+        calculated with mrrho, so the result for the settings of the xTB run
+        is exactly the one of xTB."""
+        temp = float(self.temperature)
+        if temp == 0.0:
+            return data["ZPVE"]
+        args = (data["freqs"], data["rotconst"], data["mass"], data["sigma"])
+        if data.get("G(T)") is None:
+            return mrrho(*args, [temp], imagthr=self.imagthr, sthr=self.sthr)[0]
+        # thresholds of the xTB run
+        imagthr = data.get("imagthr", -50.0)
+        sthr = data.get("sthr", 50.0)
+        if (temp == data["temperature"] and imagthr == self.imagthr
+                and sthr == self.sthr):
+            return data["G(T)"]
+        gnew = mrrho(*args, [temp], imagthr=self.imagthr, sthr=self.sthr)[0]
+        gref = mrrho(*args, [data["temperature"]], imagthr=imagthr, sthr=sthr)[0]
+        return data["G(T)"] + gnew - gref
+
     def _xtbrrho(self):
         """
-        RRHO contribution with GFNn/GFN-FF-XTB, available both to ORCA and TM
+        RRHO contribution with GFNn/GFN-FF-XTB, available both to ORCA and TM,
+        the hessian is only calculated for new geometries (rrho_cache.json)
         """
-        if not self.onlyread:
+        try:
+            key = self._rrho_key()
+        except OSError:
+            key = None
+        data = self._cached_rrho(key)
+        if not self.onlyread and data is None:
             exchange_name = {'gfn1': 'gfn 1', 'gfn2': 'gfn 2', 'gfnff': 'gfnff'}
             gfnhamiltonian = exchange_name[str(self.gfnv)]
             print("Running {}-xTB RRHO in {}".format(str(self.gfnv).upper(), last_folders(self.workdir, 2)))
@@ -3593,11 +4833,11 @@ class qm_job():
             ) as xcout:
                 xcout.write("$thermo\n")
                 xcout.write("    temp={}\n".format(self.temperature))
-                xcout.write("    imagthr={}\n".format('-50'))
+                xcout.write("    imagthr={}\n".format(self.imagthr))
+                xcout.write("    sthr={}\n".format(self.sthr))
                 xcout.write("$symmetry\n")
                 xcout.write("    desy=0.3\n")
                 xcout.write("$end")
-            time.sleep(0.05)
             with open(
                 os.path.join(self.workdir, "ohess.out"), "w", newline=None
             ) as outputfile:
@@ -3631,17 +4871,11 @@ class qm_job():
                         "-I",
                         "xcontrol-inp",
                     ]
-                returncode = subprocess.call(
+                returncode = self._call(
                     callargs,
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                     env=self.environ,
                 )
-            time.sleep(0.05)
             # check if converged:
             if returncode != 0:
                 self.rrho = None
@@ -3653,7 +4887,19 @@ class qm_job():
                     file=sys.stderr,
                 )
                 return
-        if os.path.isfile(os.path.join(self.workdir, "xtb_enso.json")):
+            if key is not None:
+                data = self._keep_rrho(key)
+        elif data is not None and not self.onlyread:
+            print("Reusing {}-xTB hessian in {}".format(
+                str(self.gfnv).upper(), last_folders(self.workdir, 2)))
+        if data is not None:
+            if data["nimag"] > 0:
+                print("WARNING: found {} significant imaginary frequencies "
+                "in {}".format(data["nimag"], last_folders(self.workdir, 2)))
+            self.rrho = self._eval_rrho(data)
+            self.symmetry = data["pointgroup"]
+            self.success = True
+        elif os.path.isfile(os.path.join(self.workdir, "xtb_enso.json")):
             with open(
                 os.path.join(self.workdir, "xtb_enso.json"),
                 "r",
@@ -3698,7 +4944,97 @@ class qm_job():
 
 
 class tm_job(qm_job):
+    # control templates: settings key --> template directory
+    templates = {}
+    templates_lock = Lock()
+    template_locks = {}  # settings key --> [lock, number of the template]
+    template_numbers = itertools.count(1)
+    # files written by _cefine which are copied from the template
+    templatefiles = ("control", "basis", "auxbasis", "mos", "alpha", "beta")
+    guessfiles = ("mos", "alpha", "beta", "basis")
+    conductoronly = False  # jobtype solv stops before COSMOtherm
+
+    def _template_key(self):
+        """all settings which change the files written by _cefine"""
+        key = [self.func, self.basis, self.chrg, self.unpaired, self.solv, self.sm]
+        if self.jobtype in ("rrhotm", "solv"):
+            key.append(self.jobtype)
+        if self.jobtype == "solv":
+            key.append(self.progsettings["cosmors_param"])
+        elif self.NMR:
+            key += [
+                "NMR", self.hactive, self.cactive, self.factive, self.pactive,
+                self.siactive,
+            ]
+        return tuple(str(i) for i in key)
+
     def cefine(self):
+        """Set up control, basis, auxbasis and start orbitals for func. They
+        are created with cefine only once for all conformers with the same
+        settings (in tm_templates) and copied from there into the workdir,
+        cefine is only called in the workdir if the template fails. The
+        start orbitals are replaced by converged orbitals of self.guess."""
+        # read before cefine, the guess can be in the workdir itself
+        guess = self._read_guess()
+        key = self._template_key()
+        with tm_job.templates_lock:
+            if key not in tm_job.template_locks:
+                tm_job.template_locks[key] = [Lock(), next(tm_job.template_numbers)]
+            lock, number = tm_job.template_locks[key]
+        with lock:
+            templatedir = tm_job.templates.get(key, None)
+            if templatedir is None:
+                templatedir = os.path.join(os.getcwd(), "tm_templates", str(number))
+                if os.path.isdir(templatedir):
+                    shutil.rmtree(templatedir)
+                mkdir_p(templatedir)
+                workdir = self.workdir
+                try:
+                    shutil.copy(
+                        os.path.join(workdir, "coord"),
+                        os.path.join(templatedir, "coord"),
+                    )
+                    self.workdir = templatedir
+                    self.success = True
+                    self._cefine()
+                except (OSError, subprocess.CalledProcessError):
+                    self.success = False
+                finally:
+                    self.workdir = workdir
+                if self.success:
+                    tm_job.templates[key] = templatedir
+                else:
+                    templatedir = None
+        if templatedir is None:
+            # fall back to cefine in the workdir
+            self.success = True
+            self._cefine()
+        else:
+            for item in tm_job.templatefiles:
+                if os.path.isfile(os.path.join(templatedir, item)):
+                    shutil.copy(
+                        os.path.join(templatedir, item), os.path.join(self.workdir, item)
+                    )
+            self.success = True
+        if self.success and guess is not None:
+            self._use_guess(guess)
+
+    def _use_guess(self, guess):
+        """overwrite the start orbitals with the converged orbitals in guess,
+        TURBOMOLE can not project orbitals, so they are only used if the
+        basis set is the same"""
+        try:
+            with open(os.path.join(self.workdir, "basis"), "rb") as inp:
+                if inp.read() != guess.get("basis", None):
+                    return
+            for name, content in guess.items():
+                if name != "basis":
+                    with open(os.path.join(self.workdir, name), "wb") as out:
+                        out.write(content)
+        except OSError:
+            pass
+
+    def _cefine(self):
         """Do cefine for func"""
         removegf = False
         if self.basis == "def2-QZVP(-gf)":
@@ -3956,6 +5292,7 @@ class tm_job(qm_job):
         # remove -fg functions from def2-QZVP basis set
         if removegf:
             cef_calls[self.func] = cef_calls[self.func] + ["-gf"]
+        # cefine is only repeated if the wrong functional was written
         for k in range(2):
             if self.jobtype == "rrhotm":
                 # use higher grid
@@ -4004,7 +5341,6 @@ class tm_job(qm_job):
                         universal_newlines=False,
                         cwd=self.workdir,
                     )
-            time.sleep(0.15)
             output = s.decode("utf-8").splitlines()
             # checkoutput for errors
             for line in output:
@@ -4041,6 +5377,8 @@ class tm_job(qm_job):
                     else:
                         self.success = True
                         break
+            if self.success:
+                break
         # continue with modifications to control
         solvent_dcosmors = {
             "acetone": [
@@ -4203,7 +5541,6 @@ class tm_job(qm_job):
                 newcontrol.write(nucsel2 + '\n')
                 newcontrol.write("$rpaconv 8\n")
                 newcontrol.write("$end")
-        time.sleep(0.15)
 
     def _sp(self, silent=False):
         """Turbomole single-point calculation, needs previous cefine run"""
@@ -4213,36 +5550,14 @@ class tm_job(qm_job):
             with open(
                 os.path.join(self.workdir, "ridft.out"), "w", newline=None
             ) as outputfile:
-                subprocess.call(
+                self._call(
                     ["ridft"],
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                     env=self.environ,
                 )
-        time.sleep(0.02)
         # check if scf is converged:
-        if os.path.isfile(os.path.join(self.workdir, "ridft.out")):
-            with open(
-                os.path.join(self.workdir, "ridft.out"),
-                "r",
-                encoding=coding,
-                newline=None,
-            ) as inp:
-                stor = inp.readlines()
-                if " ENERGY CONVERGED !\n" not in stor:
-                    print(
-                        "ERROR: scf in {:18} not converged!".format(
-                            last_folders(self.workdir, 2)
-                        )
-                    )
-                    self.success = False
-                    self.energy = None
-                    return
-        else:
+        out = self._read_output("ridft.out", "ridft")
+        if not out.exists:
             print(
                 "WARNING: {} doesn't exist!".format(
                     os.path.join(self.workdir, "ridft.out")
@@ -4251,78 +5566,281 @@ class tm_job(qm_job):
             self.success = False
             self.energy = None
             return 1
-        if os.path.isfile(os.path.join(self.workdir, "energy")):
-            with open(
-                os.path.join(self.workdir, "energy"), "r", encoding=coding, newline=None
-            ) as energy:
-                storage = energy.readlines()
-            try:
-                self.energy = float(storage[-2].split()[1])
-                self.success = True
-            except ValueError:
-                print(
-                    "ERROR while converting energy in: {:18}".format(
-                        last_folders(self.workdir, 2)
-                    ),
-                    file=sys.stderr,
+        if not out.converged:
+            print(
+                "ERROR: scf in {:18} not converged!".format(
+                    last_folders(self.workdir, 2)
                 )
-        else:
-            self.energy = None
+            )
             self.success = False
+            self.energy = None
+            return
+        self._read_energy()
+
+    def _read_energy(self):
+        """energy of the last cycle in the file energy, returns True on
+        success"""
+        out = self._read_output("energy", "energy")
+        self.energy = out.energy
+        self.success = out.energy is not None
+        if self.success:
+            self._keep_guess()
+        elif out.exists:
+            print(
+                "ERROR while converting energy in: {:18}".format(
+                    last_folders(self.workdir, 2)
+                ),
+                file=sys.stderr,
+            )
+        return self.success
+
+    def _conductor_key(self):
+        """everything the gas phase and ideal conductor single-points of
+        COSMO-RS depend on, the solvent is not part of it"""
+        with open(os.path.join(self.workdir, "coord"), "rb") as inp:
+            coord = hashlib.sha1(inp.read()).hexdigest()
+        return {
+            "coord": coord,
+            "cosmors_param": self.progsettings["cosmors_param"],
+            "chrg": self.chrg,
+            "unpaired": self.unpaired,
+        }
 
+    def _cached_conductor(self, key):
+        """True if out.cosmo and out.energy in the workdir were calculated
+        for key and were not changed afterwards"""
+        try:
+            with open(
+                os.path.join(self.workdir, "conductor.json"),
+                "r",
+                encoding=coding,
+                newline=None,
+            ) as inp:
+                info = json.load(inp)
+            if info["key"] != key:
+                return False
+            for name, stamp in info["files"].items():
+                stat = os.stat(os.path.join(self.workdir, name))
+                if [stat.st_mtime_ns, stat.st_size] != stamp:
+                    return False
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def _keep_conductor(self, key):
+        """remember for which key out.cosmo and out.energy were calculated"""
+        files = {}
+        for name in ("out.cosmo", "out.energy"):
+            stat = os.stat(os.path.join(self.workdir, name))
+            files[name] = [stat.st_mtime_ns, stat.st_size]
+        with open(
+            os.path.join(self.workdir, "conductor.json"), "w", newline=None
+        ) as out:
+            json.dump({"key": key, "files": files}, out)
+
+    def _conductor(self, fine):
+        """gas phase single-point (out.energy) and single-point in the ideal
+        conductor (out.cosmo) for COSMO-RS, returns True on success"""
+        # run two single-points:
+        # cefine in gas phase
+        tmp_solv = self.solv
+        self.sm = None
+        self.solv = 'gas'
+        self.cefine()
+        #reset solv:
+        self.solv = tmp_solv
+        # running single-point in gas phase
+        self.energy = None
+        self._sp(silent=True)
+        if not self.success:
+            print("Error in COSMO-RS calculation during single-point "
+                  "calculation!")
+            return False
+        with open(
+            os.path.join(self.workdir, "out.energy"), "w", newline=None
+        ) as out:
+            out.write(str(self.energy) + "\n")
+        self.energy = None
+        # running single-point in ideal conductor!
+        with open(
+            os.path.join(self.workdir, "control"),
+            "r",
+            encoding=coding,
+            newline=None,
+        ) as inp:
+            tmp = inp.readlines()
+        with open(os.path.join(self.workdir, "control"), "w", newline=None) as out:
+            for line in tmp[:-1]:
+                out.write(line + "\n")
+            if not fine:
+                # normal
+                out.write("$cosmo \n")
+                out.write(" epsilon=infinity \n")
+                out.write("$cosmo_out file=out.cosmo \n")
+                out.write("$end \n")
+            else:
+                # fine
+                out.write("$cosmo \n")
+                out.write(" epsilon=infinity \n")
+                out.write(" use_contcav \n")
+                out.write(" cavity closed \n")
+                out.write("$cosmo_out file=out.cosmo \n")
+                out.write("$cosmo_isorad \n")
+                out.write("$end \n")
+        self._sp(silent=True)
+        if not self.success:
+            print("Error in COSMO-RS calculation during single-point "
+                  "calculation!")
+            return False
+        return True
+
+    # replacement for cosmothermrc: solvent --> compound in the COSMO database
+    cosmors_solv = {
+        "acetone": "f = propanone.cosmo ",
+        "h2o": "f = h2o.cosmo ",
+        "chcl3": "f = chcl3.cosmo ",
+        "ch2cl2": "f = ch2cl2.cosmo ",
+        "acetonitrile": "f = acetonitrile_c.cosmo",
+        "dmso": "f = dimethylsulfoxide.cosmo ",
+        "methanol": "f = methanol.cosmo ",
+        "thf": "f = thf.cosmo ",
+        "toluene": "f = toluene_c0.cosmo ",
+    }
+    # temperatures in °C for Gsolv(T)
+    cosmors_temperatures = (
+        "-50.0", "-10.0", "0.0", "10.0", "20.0", "25.0", "30.0", "40.0", "50.0",
+        "60.0",
+    )
 
-    def _polyfit(self, n, m, X, Y):
-        """ translation of fortran code from cosmothermrd.f90 into python code
-            necessary for COSMO-RS"""
+    def _cosmors_setup(self):
+        """set the COSMO-RS parametrization from cosmorssetup, returns True
+        for the FINE parametrization"""
+        if "FINE" in self.progsettings["cosmorssetup"].split()[2]:
+            self.progsettings["cosmors_param"] = "fine"
+            if self.progsettings["cosmothermversion"] == 19:
+                self.progsettings["cosmors_param"] = "19-fine"
+            return True
+        self.progsettings["cosmors_param"] = "normal"
+        return False
+
+    def _solv_conductor(self):
+        """solvent independent part of COSMO-RS: the gas phase and ideal
+        conductor single-points in the folder COSMO, they are reused if the
+        geometry is unchanged. Returns True on success."""
+        old_workdir = self.workdir  # starting workdir
+        self.workdir = os.path.join(old_workdir, "COSMO")  # COSMO folder
         try:
-            n1 = n + 1
-            m1 = m + 1
-            m2 = m + 2
-            Xc = [None] * m2
-            for k in range(0, m2, 1):
-                Xc[k] = 0.0
-                for i in range(0, n1, 1):
-                    Xc[k] = Xc[k] + X[i] ** (k + 1)
-            Yc = math.fsum(Y)
-            Yx = [None] * m
-            for k in range(0, m, 1):
-                Yx[k] = 0.0
-                for i in range(0, n1, 1):
-                    Yx[k] = Yx[k] + Y[i] * X[i] ** (k + 1)
-            C = [[None] * m1 for _ in range(m1)]
-            for i in range(0, m1, 1):
-                for j in range(0, m1, 1):
-                    ij = i + j - 1
-                    if i == 0 and j == 0:
-                        C[0][0] = n1
-                    elif ij > len(Xc) - 1:
-                        C[i][j] = 0.0
-                    else:
-                        C[i][j] = Xc[ij]
-            B = [None] * m1
-            B[0] = Yc
-            for i in range(1, m1, 1):
-                B[i] = Yx[i - 1]
-            for k in range(0, m, 1):
-                for i in range(k + 1, m1, 1):
-                    B[i] = B[i] - C[i][k] / C[k][k] * B[k]
-                    for j in range(k + 1, m1, 1):
-                        C[i][j] = C[i][j] - C[i][k] / C[k][k] * C[k][j]
-            A = [None] * m1
-            A[m1 - 1] = B[m1 - 1] / C[m1 - 1][m1 - 1]
-            for i in range(m - 1, -1, -1):
-                s = 0.0
-                for k in range(i + 1, m1, 1):
-                    s = s + C[i][k] * A[k]
-                A[i] = (B[i] - s) / C[i][i]
-
-            a0 = []
-            for item in A:
-                a0.append(item)
-        except ZeroDivisionError:
+            mkdir_p(self.workdir)
+            shutil.copy(
+                os.path.join(old_workdir, "coord"), os.path.join(self.workdir, "coord")
+            )
+            fine = self._cosmors_setup()
+            key = self._conductor_key()
+            if self._cached_conductor(key):
+                self.success = True
+            elif self._conductor(fine):
+                self._keep_conductor(key)
+        finally:
+            self.workdir = old_workdir
+        return self.success
+
+    def _cosmotherm_input(self, workdir, compounds):
+        """write cosmotherm.inp in workdir for Gsolv(T) of compounds (.cosmo
+        files in workdir) in the solvent self.solv"""
+        if self._cosmors_setup():
+            database = "DATABASE-COSMO/BP-TZVPD-FINE"
+        else:
+            database = "DATABASE-COSMO/BP-TZVP-COSMO"
+        # info from .ensorc
+        # fdir=/software/cluster/COSMOthermX16/COSMOtherm/DATABASE-COSMO/BP-TZVP-COSMO autoc
+        solv_data = os.path.join(
+            os.path.split(self.progsettings["cosmorssetup"].split()[5].strip('"'))[0],
+            database,
+        )
+        # mole fractions: pure solvent, all compounds infinitely diluted
+        xh = "{ 1.0" + " 0.0" * len(compounds) + "     }"
+        with open(os.path.join(workdir, "cosmotherm.inp"), "w", newline=None) as out:
+            out.write(self.progsettings["cosmorssetup"] + "\n")
+            # write from ensorc
+            out.write("EFILE VPFILE \n")
+            if self.progsettings["cosmothermversion"] > 16:
+                pass
+            else:  # cosmothermX16
+                out.write("!!\n")  # needs empty line!
+            out.write(self.cosmors_solv[self.solv] + "fdir=" + solv_data + " autoc \n")
+            for compound in compounds:
+                out.write("f = {} \n".format(compound))
+            for tc in self.cosmors_temperatures:
+                out.write("henry  xh={}  tc={} Gsolv\n".format(xh, tc))
+
+    def _cosmotherm(self, workdir):
+        """run COSMOtherm with cosmotherm.inp in workdir, the table of a
+        previous run must not be read"""
+        if os.path.isfile(os.path.join(workdir, "cosmotherm.tab")):
+            os.remove(os.path.join(workdir, "cosmotherm.tab"))
+        with open(
+            os.path.join(workdir, "cosmotherm.out"), "w", newline=None
+        ) as outputfile:
+            self._call(
+                ["cosmotherm", "cosmotherm.inp"],
+                outputfile,
+                env=self.environ,
+                cwd=workdir,
+            )
+
+    def _cosmothermrd(self, fit, i=0):
+        """Gsolv at self.temperature of conformer i of fit (solvation_fit),
+        written to cosmors.out in the workdir (python version of
+        cosmothermrd)"""
+        temp = float(self.temperature)
+        gsolv_out = float(fit.gsolv(temp)[i])
+        if math.isnan(gsolv_out):
             print("Error in Gsolv!")
-            a0 = False
-        return a0
+            self.gsolv = None
+            self.success = False
+            return 1
+        T = fit.T
+        dh = float(fit.gsolv(0.0)[i])
+        ssolv = float(fit.ssolv(temp)[i])
+        hsolv = float(fit.hsolv(temp)[i])
+        hsolv2 = float(fit.hsolv2(temp)[i])
+        ssolv2 = float(fit.ssolv2(temp)[i])
+        volwork = fit.volwork(temp)
+
+        with open(
+            os.path.join(self.workdir, "cosmors.out"), "w", newline=None
+        ) as out:
+            out.write(
+                "This is cosmothermrd (python version in ENSO) (SG,FB,SAW, 06/18)\n"
+            )
+            out.write("final thermochemical solvation properties in kcal/mol\n")
+            out.write(
+                "derived from {} different temperatures\n".format(str(len(T)))
+            )
+            out.write("big differences between the two values for S and H\n")
+            out.write("indicate numerical problems (change cosmotherm T range)\n")
+            out.write(
+                "----------------------------------------------------------\n"
+            )
+            out.write(" Hsolv(0 K,extrapolated)  = {:10.3f}\n".format(dh))
+            out.write(
+                " Ssolv({} K)= {:10.5f} {:10.5f}\n".format(temp, ssolv, ssolv2)
+            )
+            out.write(
+                " Hsolv({} K)= {:10.3f} {:10.3f}\n".format(temp, hsolv, hsolv2)
+            )
+            out.write(" Gsolv({} K)= {:10.3f}\n".format(temp, gsolv_out))
+            out.write(" VWork({} K)= {:10.3f}\n".format(temp, volwork))
+            out.write(
+                " Gsolv+VWork({} K)= {:10.3f}\n".format(temp, (gsolv_out + volwork))
+            )
+        # the whole curve is kept for --temperature-scan
+        with open(
+            os.path.join(self.workdir, "cosmors.json"), "w", newline=None
+        ) as out:
+            json.dump({"T": T, "gsolv": [row[i] for row in fit.G]}, out)
+        self.gsolv = gsolv_out / 627.50947428
+        self.success = True
 
     def _solv_complete(self):
         """complete COSMO-RS within the ENSO script"""
@@ -4332,170 +5850,21 @@ class tm_job(qm_job):
                     last_folders(self.workdir, 2)
                 )
             )
-            # create COSMO folder
-            old_workdir = self.workdir  # starting workdir
-            self.workdir = os.path.join(self.workdir, "COSMO")  # COSMO folder
-            mkdir_p(self.workdir)
-            shutil.copy(
-                os.path.join(old_workdir, "coord"), os.path.join(self.workdir, "coord")
-            )
-            # parametrization and version:
-            if "FINE" in self.progsettings["cosmorssetup"].split()[2]:
-                fine = True
-                self.progsettings["cosmors_param"] = "fine"
-                if self.progsettings["cosmothermversion"] == 19:
-                    self.progsettings["cosmors_param"] = "19-fine"
-            else:
-                fine = False
-                self.progsettings["cosmors_param"] = "normal"
-            # run two single-points:
-            # cefine in gas phase
-            tmp_solv = self.solv
-            self.sm = None
-            self.solv = 'gas'
-            self.cefine()
-            #reset solv:
-            self.solv = tmp_solv
-            # running single-point in gas phase
-            self.energy = None
-            self._sp(silent=True)
-            if not self.success:
-                print("Error in COSMO-RS calculation during single-point "
-                      "calculation!")
-                return 
-            with open(
-                os.path.join(self.workdir, "out.energy"), "w", newline=None
-            ) as out:
-                out.write(str(self.energy) + "\n")
-            self.energy = None
-            # running single-point in ideal conductor!
-            with open(
-                os.path.join(self.workdir, "control"),
-                "r",
-                encoding=coding,
-                newline=None,
-            ) as inp:
-                tmp = inp.readlines()
-            with open(os.path.join(self.workdir, "control"), "w", newline=None) as out:
-                for line in tmp[:-1]:
-                    out.write(line + "\n")
-                if not fine:
-                    # normal
-                    out.write("$cosmo \n")
-                    out.write(" epsilon=infinity \n")
-                    out.write("$cosmo_out file=out.cosmo \n")
-                    out.write("$end \n")
-                else:
-                    # fine
-                    out.write("$cosmo \n")
-                    out.write(" epsilon=infinity \n")
-                    out.write(" use_contcav \n")
-                    out.write(" cavity closed \n")
-                    out.write("$cosmo_out file=out.cosmo \n")
-                    out.write("$cosmo_isorad \n")
-                    out.write("$end \n")
-            self._sp(silent=True)
-            if not self.success:
-                print("Error in COSMO-RS calculation during single-point "
-                      "calculation!")
+            # the gas phase and ideal conductor single-points do not depend
+            # on the solvent, they are reused if the geometry is unchanged
+            if not self._solv_conductor():
                 return 1
-            # info from .ensorc # replacement for cosmothermrc
-            # fdir=/software/cluster/COSMOthermX16/COSMOtherm/DATABASE-COSMO/BP-TZVP-COSMO autoc
-            cosmors_solv = {
-                "acetone": "f = propanone.cosmo ",
-                "h2o": "f = h2o.cosmo ",
-                "chcl3": "f = chcl3.cosmo ",
-                "ch2cl2": "f = ch2cl2.cosmo ",
-                "acetonitrile": "f = acetonitrile_c.cosmo",
-                "dmso": "f = dimethylsulfoxide.cosmo ",
-                "methanol": "f = methanol.cosmo ",
-                "thf": "f = thf.cosmo ",
-                "toluene": "f = toluene_c0.cosmo ",
-            }
-            if fine:
-                solv_data = os.path.join(
-                    os.path.split(
-                        self.progsettings["cosmorssetup"].split()[5].strip('"')
-                    )[0],
-                    "DATABASE-COSMO/BP-TZVPD-FINE",
-                )
-            else:
-                solv_data = os.path.join(
-                    os.path.split(
-                        self.progsettings["cosmorssetup"].split()[5].strip('"')
-                    )[0],
-                    "DATABASE-COSMO/BP-TZVP-COSMO",
-                )
-            # test = ['ctd = BP_TZVP_C30_1601.ctd cdir = "/software/cluster/COSMOthermX16/COSMOtherm/CTDATA-FILES"']
-
-            henry = [
-                "henry  xh={ 1.0 0.0     }  tc=-50.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=-10.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=0.0  Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=10.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=20.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=25.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=30.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=40.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=50.0 Gsolv",
-                "henry  xh={ 1.0 0.0     }  tc=60.0 Gsolv",
-            ]
-            with open(
-                os.path.join(self.workdir, "cosmotherm.inp"), "w", newline=None
-            ) as out:
-                out.write(self.progsettings["cosmorssetup"] + "\n")
-                # write from ensorc
-                out.write("EFILE VPFILE \n")
-                if self.progsettings["cosmothermversion"] > 16:
-                    pass
-                else:  # cosmothermX16
-                    out.write("!!\n")  # needs empty line!
-                out.write(cosmors_solv[self.solv] + "fdir=" + solv_data + " autoc \n")
-                out.write("f = out.cosmo \n")
-                for line in henry:
-                    out.write(line + "\n")
-            # running COSMOtherm
-            with open(
-                os.path.join(self.workdir, "cosmotherm.out"), "w", newline=None
-            ) as outputfile:
-                subprocess.call(
-                    ["cosmotherm", "cosmotherm.inp"],
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
-                    env=self.environ,
-                )
-            time.sleep(0.1)
+            if self.conductoronly:
+                # COSMOtherm runs for all conformers at once (cosmotherm_batch)
+                return
+            cosmodir = os.path.join(self.workdir, "COSMO")
+            self._cosmotherm_input(cosmodir, ["out.cosmo"])
+            self._cosmotherm(cosmodir)
             # get T and Gsolv for version > cosmothermX16
-            try:
-                with open(
-                    os.path.join(self.workdir, "cosmotherm.tab"),
-                    "r",
-                    encoding=coding,
-                    newline=None,
-                ) as inp:
-                    stor = inp.readlines()
-                T = []
-                gsolv = []
-                for line in stor:
-                    if "T=" in line:
-                        T.append(float(line.split()[5]))
-                    elif " out " in line:
-                        gsolv.append(float(line.split()[5]))
-            except (FileNotFoundError, ValueError):
-                print(
-                    "ERROR: cosmotherm.tab was not written, this error can be "
-                    "due to a missing licensefile information, or wrong path "
-                    "to the COSMO-RS Database."
-                )
-                self.gsolv = None
-                self.success = False
-                return 1
-            # cosmothermrd
-            if os.stat(os.path.join(self.workdir, "cosmotherm.tab")).st_size == 0:
+            values = read_cosmotherm_tab(
+                os.path.join(cosmodir, "cosmotherm.tab"), ["out"]
+            )
+            if "out" not in values:
                 print(
                     "ERROR: cosmotherm.tab was not written, this error can be "
                     "due to a missing licensefile information, or wrong path "
@@ -4504,118 +5873,18 @@ class tm_job(qm_job):
                 self.gsolv = None
                 self.success = False
                 return 1
-            z = []
-            for i in range(len(T)):
-                z.append(float(gsolv[i]) / float(T[i]))
-            a0 = self._polyfit(len(T) - 1, 4, T, gsolv)
-            if not a0:
+            T, gsolv = values["out"]
+            try:
+                fit = solvation_fit(T, [gsolv])
+            except ValueError as error:
+                print("Error in Gsolv! {}".format(error))
                 self.gsolv = None
                 self.success = False
                 return 1
-            temp = float(self.temperature)
-            gsolv_out = (
-                a0[0]
-                + a0[1] * temp
-                + a0[2] * temp ** 2
-                + a0[3] * temp ** 3
-                + a0[4] * temp ** 4
-            )
-            dh = a0[0]
-            ssolv = -(
-                a0[1]
-                + 2.0 * a0[2] * temp
-                + 3.0 * a0[3] * temp ** 2
-                + 4.0 * a0[4] * temp ** 3
-            )
-            hsolv = gsolv_out + temp * ssolv
-            a0 = self._polyfit(len(T) - 1, 4, T, z)
-            hsolv2 = (
-                -temp
-                * temp
-                * (
-                    a0[1]
-                    + 2.0 * a0[2] * temp
-                    + 3.0 * a0[3] * temp ** 2
-                    + 4.0 * a0[4] * temp ** 3
-                )
-            )
-            ssolv2 = (hsolv2 - gsolv_out) / temp
-
-            ## volumework:
-            R = 1.987203585e-03  # kcal/(mol*K)
-            videal = (
-                24.789561955 / 298.15
-            )  # molar volume for ideal gas at 298.15 K 100.0 kPa
-            volwork = R * temp * math.log(videal * temp)
-
-            self.workdir = old_workdir
-            with open(
-                os.path.join(self.workdir, "cosmors.out"), "w", newline=None
-            ) as out:
-                out.write(
-                    "This is cosmothermrd (python version in ENSO) (SG,FB,SAW, 06/18)\n"
-                )
-                out.write("final thermochemical solvation properties in kcal/mol\n")
-                out.write(
-                    "derived from {} different temperatures\n".format(str(len(T)))
-                )
-                out.write("big differences between the two values for S and H\n")
-                out.write("indicate numerical problems (change cosmotherm T range)\n")
-                out.write(
-                    "----------------------------------------------------------\n"
-                )
-                out.write(" Hsolv(0 K,extrapolated)  = {:10.3f}\n".format(dh))
-                out.write(
-                    " Ssolv({} K)= {:10.5f} {:10.5f}\n".format(temp, ssolv, ssolv2)
-                )
-                out.write(
-                    " Hsolv({} K)= {:10.3f} {:10.3f}\n".format(temp, hsolv, hsolv2)
-                )
-                out.write(" Gsolv({} K)= {:10.3f}\n".format(temp, gsolv_out))
-                out.write(" VWork({} K)= {:10.3f}\n".format(temp, volwork))
-                out.write(
-                    " Gsolv+VWork({} K)= {:10.3f}\n".format(temp, (gsolv_out + volwork))
-                )
-            time.sleep(0.05)
-            self.gsolv = gsolv_out / 627.50947428
-            self.success = True
+            return self._cosmothermrd(fit)
         else:  # read only output 
-            if os.path.isfile(os.path.join(self.workdir, "cosmors.out")):
-                with open(
-                    os.path.join(self.workdir, "cosmors.out"),
-                    "r",
-                    encoding=coding,
-                    newline=None,
-                ) as inp:
-                    stor = inp.readlines()
-                    for line in stor:
-                        if " Gsolv(" in line:
-                            try:
-                                self.gsolv = (
-                                    float(line.split()[2]) / 627.50947428
-                                )  # with volume work from cosmothermrd
-                                self.success = True
-                            except:
-                                self.success = False
-                                self.gsolv = None
-                                print(
-                                    "\nERROR: could not get Gsolv from COSMO-RS in {:18}!".format(
-                                        last_folders(self.workdir, 2)
-                                    ),
-                                    file=sys.stderr,
-                                )
-                                return 1
-                    if math.isnan(self.gsolv):
-                        self.success = False
-                    if not self.success:
-                        self.gsolv = None
-                        print(
-                            "\nERROR: COSMO-RS in {:18} not converged!".format(
-                                last_folders(self.workdir, 2)
-                            ),
-                            file=sys.stderr,
-                        )
-            else:
+            out = self._read_output("cosmors.out", "cosmors")
+            if not out.exists:
                 print(
                     "WARNING: {} doesn't exist!".format(
                         os.path.join(self.workdir, "cosmors.out")
@@ -4624,6 +5893,28 @@ class tm_job(qm_job):
                 self.success = False
                 self.gsolv = None
                 return
+            if out.invalid:
+                self.success = False
+                self.gsolv = None
+                print(
+                    "\nERROR: could not get Gsolv from COSMO-RS in {:18}!".format(
+                        last_folders(self.workdir, 2)
+                    ),
+                    file=sys.stderr,
+                )
+                return 1
+            # with volume work from cosmothermrd
+            self.success = out.gsolv is not None and not math.isnan(out.gsolv)
+            if self.success:
+                self.gsolv = out.gsolv / 627.50947428
+            else:
+                self.gsolv = None
+                print(
+                    "\nERROR: COSMO-RS in {:18} not converged!".format(
+                        last_folders(self.workdir, 2)
+                    ),
+                    file=sys.stderr,
+                )
 
 
     def _xtbopt(self):
@@ -4661,14 +5952,9 @@ class tm_job(qm_job):
             with open(
                 os.path.join(self.workdir, output), "w", newline=None
             ) as outputfile:
-                returncode = subprocess.call(
+                returncode = self._call(
                     callargs,
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                     env=self.environ,
                 )
             if returncode != 0:
@@ -4681,55 +5967,28 @@ class tm_job(qm_job):
                     file=sys.stderr,
                 )
                 return
-            time.sleep(0.02)
         # check if converged:
-        if os.path.isfile(os.path.join(self.workdir, output)):
-            with open(
-                os.path.join(self.workdir, output), "r", encoding=coding, newline=None
-            ) as inp:
-                stor = inp.readlines()
-                for line in stor:
-                    if (
-                        "external code error" in line
-                        or "|grad| > 500, something is totally wrong!" in line
-                        or "abnormal termination of xtb" in line
-                    ):
-                        print(
-                            "ERROR: optimization in {:18} not converged".format(
-                                last_folders(self.workdir, 2)
-                            ),
-                            file=sys.stderr,
-                        )
-                        self.success = False
-                        self.energy = None
-                        return 1
-                    if "   *** GEOMETRY OPTIMIZATION CONVERGED AFTER " in line:
-                        self.cycles = int(line.split()[5])
-        else:
+        out = self._read_output(output, "xtb_opt")
+        if not out.exists:
             print(
                 "WARNING: {} doesn't exist!".format(os.path.join(self.workdir, output))
             )
             self.success = False
             self.energy = None
             return 1
-        if os.path.isfile(os.path.join(self.workdir, "energy")):
-            with open(
-                os.path.join(self.workdir, "energy"), "r", encoding=coding, newline=None
-            ) as energy:
-                storage = energy.readlines()
-            try:
-                self.energy = float(storage[-2].split()[1])
-                self.success = True
-            except ValueError:
-                print(
-                    "ERROR while converting energy in {:18}".format(
-                        last_folders(self.workdir, 2)
-                    ),
-                    file=sys.stderr,
-                )
-        else:
-            self.energy = None
+        if out.error:
+            print(
+                "ERROR: optimization in {:18} not converged".format(
+                    last_folders(self.workdir, 2)
+                ),
+                file=sys.stderr,
+            )
             self.success = False
+            self.energy = None
+            return 1
+        if out.cycles is not None:
+            self.cycles = out.cycles
+        self._read_energy()
         return
 
     def _opt(self):
@@ -4791,37 +6050,21 @@ class tm_job(qm_job):
             with open(
                 os.path.join(self.workdir, output), "w", newline=None
             ) as outputfile:
-                subprocess.call(
+                self._call(
                     callargs,
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                     env=self.environ,
                 )
 
-            time.sleep(0.02)
             # check if scf is converged:
-        if os.path.isfile(os.path.join(self.workdir, "job.last")) and os.path.isfile(
-            os.path.join(self.workdir, "energy")
-        ):
-            with open(
-                os.path.join(self.workdir, "job.last"),
-                "r",
-                encoding=coding,
-                newline=None,
-            ) as inp:
-                stor = inp.readlines()
-                for line in stor:
-                    if "                 |  total energy      =" in line:
-                        self.energy = float(line.split()[4])
-                    if "CONVERGENCY CRITERIA FULFILLED IN CYCLE" in line:
-                        self.success = True
-            self.cycles = (
-                sum(1 for line in open(os.path.join(self.workdir, "energy"))) - 2
-            )
+        out = self._read_output("job.last", "job.last")
+        energy = self._read_output("energy", "energy")
+        if out.exists and energy.exists:
+            if out.energy is not None:
+                self.energy = out.energy
+            if out.converged:
+                self.success = True
+            self.cycles = energy.lines - 2
         else:
             print(
                 "WARNING: {} or {} doesn't exist!".format(
@@ -4853,6 +6096,7 @@ class tm_job(qm_job):
                 file=sys.stderr,
             )
             return 1
+        self._keep_guess()
         return
 
     def _rrho(self):
@@ -4885,120 +6129,55 @@ class tm_job(qm_job):
                 with open(
                     os.path.join(self.workdir, "rdgrad.out"), "w", newline=None
                 ) as outputfile:
-                    subprocess.call(
+                    self._call(
                         ["rdgrad"],
-                        shell=False,
-                        stdin=None,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=False,
-                        cwd=self.workdir,
-                        stdout=outputfile,
+                        outputfile,
                         env=self.environ,
                     )
-                time.sleep(0.02)
-                with open(
-                    os.path.join(self.workdir, "rdgrad.out"),
-                    "r",
-                    encoding=coding,
-                    newline=None,
-                ) as inp:
-                    stor = inp.readlines()
-                    if (
-                        "     --- calculation of the energy gradient finished ---\n"
-                        not in stor
-                    ):
-                        print(
-                            "ERROR: rdgrad calculation in {:18} not converged!".format(
-                                last_folders(self.workdir, 2)
-                            ),
-                            file=sys.stderr,
-                        )
-                        self.success = False
-                        return 1
+                out = self._read_output("rdgrad.out", "rdgrad")
+                if not out.terminated:
+                    print(
+                        "ERROR: rdgrad calculation in {:18} not converged!".format(
+                            last_folders(self.workdir, 2)
+                        ),
+                        file=sys.stderr,
+                    )
+                    self.success = False
+                    return 1
             # AOFORCE
             print("Running aoforce in {}".format(last_folders(self.workdir, 2)))
             with open(
                 os.path.join(self.workdir, "aoforce.out"), "w", newline=None
             ) as outputfile:
-                subprocess.call(
+                self._call(
                     ["aoforce", "-smpcpus", str(self.progsettings["omp"])],
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                     env=self.environ,
                 )
-            time.sleep(0.05)
             # run thermo
             if os.path.isfile(os.path.join(self.workdir, "aoforce.out")):
                 with open(
                     os.path.join(self.workdir, "thermo.out"), "w", newline=None
                 ) as outputfile:
                     sthr, temp, scalefactor = thermo_dict[self.func]
-                    subprocess.call(
+                    self._call(
                         ["thermo", str(sthr), str(temp), str(scalefactor)],
-                        shell=False,
-                        stdin=None,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=False,
-                        cwd=self.workdir,
-                        stdout=outputfile,
+                        outputfile,
                         env=self.environ,
                     )
-                with open(
-                    os.path.join(self.workdir, "thermo.out"),
-                    "r",
-                    encoding=coding,
-                    newline=None,
-                ) as inp:
-                    stor = inp.readlines()
-                for line in stor:
-                    if "G(T)           " in line:
-                        try:
-                            self.rrho = float(line.split()[1])  # a.u.
-                            self.success = True
-                        except:
-                            print(
-                                "Error while converting energy in: {}".format(
-                                    last_folders(self.workdir, 2)
-                                ),
-                                file=sys.stderr,
-                            )
-                            self.rrho = None
-                            self.success = False
-                        break
+                self._read_thermo()
             else:  # Aoforce not found
                 print("ERROR: aoforce output not found!")
                 self.rrho = None
                 self.success = False
             return
-        time.sleep(0.01)
-        if os.path.isfile(os.path.join(self.workdir, "thermo.out")):
-            with open(
-                os.path.join(self.workdir, "thermo.out"),
-                "r",
-                encoding=coding,
-                newline=None,
-            ) as inp:
-                stor = inp.readlines()
-                for line in stor:
-                    if "G(T)           " in line:
-                        try:
-                            self.rrho = float(line.split()[1])  # a.u.
-                            self.success = True
-                        except:
-                            print(
-                                "Error while converting energy in: {}".format(
-                                    last_folders(self.workdir, 2)
-                                ),
-                                file=sys.stderr,
-                            )
-                            self.rrho = None
-                            self.success = False
-                            return
-        else:
+        self._read_thermo()
+        return
+
+    def _read_thermo(self):
+        """RRHO contribution G(T) from thermo.out"""
+        out = self._read_output("thermo.out", "thermo")
+        if not out.exists:
             print(
                 "ERROR: could not read thermo.out in {}!".format(
                     last_folders(self.workdir, 2)
@@ -5006,8 +6185,18 @@ class tm_job(qm_job):
             )
             self.rrho = None
             self.success = False
-        return
-
+        elif out.invalid:
+            print(
+                "Error while converting energy in: {}".format(
+                    last_folders(self.workdir, 2)
+                ),
+                file=sys.stderr,
+            )
+            self.rrho = None
+            self.success = False
+        elif out.rrho is not None:
+            self.rrho = out.rrho  # a.u.
+            self.success = True
 
     def _nmrJ(self):
         """ TM NMR coupling calculation"""
@@ -5018,36 +6207,25 @@ class tm_job(qm_job):
         with open(
             os.path.join(self.workdir, "escf.out"), "w", newline=None
         ) as outputfile:
-            subprocess.call(
+            self._call(
                 [
                     self.progsettings["tempprogpath"],
                     "-smpcpus",
                     str(self.progsettings["omp"]),
                 ],
-                shell=False,
-                stdin=None,
-                stderr=subprocess.STDOUT,
-                universal_newlines=False,
-                cwd=self.workdir,
-                stdout=outputfile,
+                outputfile,
                 env=self.environ,
             )
-        time.sleep(0.02)
         # check for convergence
-        with open(
-            os.path.join(self.workdir, "escf.out"), "r", encoding=coding, newline=None
-        ) as inp:
-            stor = inp.readlines()
-            if "   ****  escf : all done  ****\n" in stor:
-                self.success = True
-            else:
-                print(
-                    "ERROR: coupling calculation failed in {:18}".format(
-                        last_folders(self.workdir, 1)
-                    ),
-                    file=sys.stderr,
-                )
-                self.success = False
+        out = self._read_output("escf.out", "escf")
+        self.success = out.terminated
+        if not self.success:
+            print(
+                "ERROR: coupling calculation failed in {:18}".format(
+                    last_folders(self.workdir, 1)
+                ),
+                file=sys.stderr,
+            )
         return
 
     def _nmrS(self):
@@ -5059,42 +6237,25 @@ class tm_job(qm_job):
         with open(
             os.path.join(self.workdir, "mpshift.out"), "w", newline=None
         ) as outputfile:
-            subprocess.call(
+            self._call(
                 [
                     self.progsettings["tempprogpath"],
                     "-smpcpus",
                     str(self.progsettings["omp"]),
                 ],
-                shell=False,
-                stdin=None,
-                stderr=subprocess.STDOUT,
-                universal_newlines=False,
-                cwd=self.workdir,
-                stdout=outputfile,
+                outputfile,
                 env=self.environ,
             )
-            time.sleep(0.02)
-            # check if shift calculation is converged:
-            with open(
-                os.path.join(self.workdir, "mpshift.out"),
-                "r",
-                encoding=coding,
-                newline=None,
-            ) as inp:
-                stor = inp.readlines()
-                if (
-                    "   ***  nmr shielding constants written onto general input/output file!  ***\n"
-                    in stor
-                ):
-                    self.success = True
-                else:
-                    print(
-                        "ERROR: shielding calculation failed in {:18}".format(
-                            last_folders(self.workdir, 1)
-                        ),
-                        file=sys.stderr,
-                    )
-                    self.success = False
+        # check if shift calculation is converged:
+        out = self._read_output("mpshift.out", "mpshift")
+        self.success = out.terminated
+        if not self.success:
+            print(
+                "ERROR: shielding calculation failed in {:18}".format(
+                    last_folders(self.workdir, 1)
+                ),
+                file=sys.stderr,
+            )
         return
 
     def _genericoutput(self):
@@ -5177,7 +6338,6 @@ class tm_job(qm_job):
                         atom1[i], atom2[i], jab[i], digits=4
                     )
                 )
-        time.sleep(0.02)
         return
 
     def execute(self):
@@ -5414,105 +6574,274 @@ class orca_job(qm_job):
                     "end",
                 ],
             }
-    def xyz2coord(self):
-        """convert file inp.xyz to TURBOMOLE coord file"""
-        time.sleep(0.1)
-        bohr2ang = 0.52917721067
-        with open(
-            os.path.join(self.workdir, "inp.xyz"), "r", encoding=coding, newline=None
-        ) as f:
-            xyz = f.readlines()
-            atom = []
-            x = []
-            y = []
-            z = []
-            # natoms = xyz[0]     # unused variable
-            for line in xyz[2:]:
-                atom.append(str(line.split()[0].lower()))
-                x.append(float(line.split()[1]) / bohr2ang)
-                y.append(float(line.split()[2]) / bohr2ang)
-                z.append(float(line.split()[3]) / bohr2ang)
-            coordxyz = []
-            for i in range(len(x)):
-                coordxyz.append(
-                    "{: 09.7f} {: 09.7f}  {: 09.7f}  {}".format(
-                        x[i], y[i], z[i], atom[i]
-                    )
-                )
-            with open(os.path.join(self.workdir, "coord"), "w", newline=None) as coord:
-                coord.write("$coord\n")
-                for line in coordxyz:
-                    coord.write(line + "\n")
-                coord.write("$end")
-        return
-
-    def _sp(self, silent=False):
-        """ORCA input generation and single-point calculation"""
-        if not self.onlyread:
-            # convert coord to xyz
-            self.coord, self.nat = coord2xyz(self.workdir)
-            # update sp dictionary
-            self._updateSP()
-            # input generation
-            with open(os.path.join(self.workdir, "inp"), "w", newline=None) as inp:
-                # functionals
-                for line in self.osp_calls[self.func]:
-                    inp.write(line + "\n")
-                # nprocs
-                if int(self.progsettings["omp"]) >= 1:
-                    inp.write("%pal\n")
-                    inp.write("    nprocs {}\n".format(self.progsettings["omp"]))
-                    inp.write("end\n")
-                # add solvent correction to input if solvent is specified and using smd
-                if self.solv not in (None, 'gas') and self.sm == "smd":
-                    if self.progsettings["orca_old"]:
-                        for line in self.solvent_smd_old[self.solv]:
-                            inp.write(line + "\n")
-                    else:
-                        for line in self.solvent_smd_new[self.solv]:
-                            inp.write(line + "\n")
-                if self.solv not in (None, 'gas') and self.sm == "cpcm":
-                    for line in self.solvent_cpcm[self.solv]:
-                        inp.write(line + "\n")
-                # unpaired, charge, and coordinates
-                inp.write(
-                    "*xyz {} {}\n".format(str(self.chrg), str(self.unpaired + 1))
-                )  # unpaired == number of unpaired electrons
-                for line in self.coord:
-                    inp.write(line + "\n")
-                inp.write("*")
-            # Done writing input!
-            time.sleep(0.02)
-            if not silent:
-                print("Running single-point in {}".format(last_folders(self.workdir, 2)))
-            # start SP calculation
-            with open(
-                os.path.join(self.workdir, "sp.out"), "w", newline=None
-            ) as outputfile:
-                call = [os.path.join(self.progsettings["tempprogpath"], "orca"), "inp"]
-                subprocess.call(
-                    call,
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+    # thresholds of the optimization with ORCA
+    opt_thresholds = {
+        "normal": [
+            "%geom",
+            "  TolE  5e-6",
+            "  TolRMSG  1e-3",
+            "  TolMaxG  2e-3",
+            "  TolRMSD  1e-1",
+            "  TolMaxD 1e-1",
+            "end",
+        ],
+        "lax": [
+            "%geom",
+            "  TolE  2e-5",
+            "  TolRMSG  2e-3",
+            "  TolMaxG  2e-3",
+            "  TolRMSD  1e-1",
+            "  TolMaxD 1e-1",
+            "end",
+        ],
+        "crude": [
+            "%geom",
+            "  TolE  5e-4",
+            "  TolRMSG  1e-2",
+            "  TolMaxG  5e-3",
+            "  TolRMSD  1e-1",
+            "  TolMaxD 1e-1",
+            "end",
+        ],
+    }
+    # frequency calculation
+    ofreq_calls = {
+        "b97-3c": [
+            "%MaxCore 8000",
+            "! def2-mTZVP b97-3c grid5 nofinalgrid NumFreq",
+            "!     smallprint printgap noloewdin",
+            "%output",
+            "       print[P_BondOrder_M] 1",
+            "       print[P_Mayer] 1",
+            "       print[P_basis] 2",
+            "end",
+        ],
+        "pbeh-3c": [
+            "%MaxCore 8000",
+            "! def2-mSVP pbeh-3c grid5 nofinalgrid NumFreq",
+            "!     smallprint printgap noloewdin",
+            "%output",
+            "       print[P_BondOrder_M] 1",
+            "       print[P_Mayer] 1",
+            "       print[P_basis] 2",
+            "end",
+        ],
+        "tpss": [
+            "%MaxCore 8000",
+            "! def2-TZVP(-f) tpss grid5 d3bj nofinalgrid NumFreq",
+            "!     smallprint printgap noloewdin",
+            "%output",
+            "       print[P_BondOrder_M] 1",
+            "       print[P_Mayer] 1",
+            "       print[P_basis] 2",
+            "end",
+        ],
+    }
+    # optimization and frequency calculation in the gas phase
+    ooptfreq_calls = {
+        "b97-3c": [
+            "%MaxCore 8000",
+            "! def2-mTZVP b97-3c Opt grid4 NumFreq",
+            "!     smallprint printgap noloewdin",
+            "%output",
+            "       print[P_BondOrder_M] 1",
+            "       print[P_Mayer] 1",
+            "       print[P_basis] 2",
+            "end",
+        ],
+        "pbeh-3c": [
+            "%MaxCore 8000",
+            "! def2-mSVP pbeh-3c Opt grid4 NumFreq",
+            "!     smallprint printgap noloewdin",
+            "%output",
+            "       print[P_BondOrder_M] 1",
+            "       print[P_Mayer] 1",
+            "       print[P_basis] 2",
+            "end",
+        ],
+        "tpss": [
+            "%MaxCore 8000",
+            "! def2-TZVP(-f) tpss Opt d3bj grid4 NumFreq",
+            "!     smallprint printgap noloewdin",
+            "%output",
+            "       print[P_BondOrder_M] 1",
+            "       print[P_Mayer] 1",
+            "       print[P_basis] 2",
+            "end",
+        ],
+    }
+    # rendered inputs: settings --> (text in front of, text behind the coordinates)
+    templates = {}
+    guessfiles = ("inp.gbw",)
+
+    def _template(self, kind):
+        """text of the ORCA input in front of and behind the coordinates for
+        kind (sp, opt, xtbopt, rrho, nmrJ or nmrS), it is rendered only once
+        for every combination of settings"""
+        key = (
+            kind,
+            self.func,
+            self.basis,
+            self.sm,
+            self.solv,
+            self.chrg,
+            self.unpaired,
+            self.full,
+            str(self.progsettings["omp"]),
+            self.progsettings.get("orca_old", False),
+        )
+        if kind in ("nmrJ", "nmrS"):
+            key += (self.hactive, self.cactive, self.factive, self.pactive, self.siactive)
+        template = orca_job.templates.get(key, None)
+        if template is None:
+            template = self._render(kind)
+            orca_job.templates[key] = template
+        return template
+
+    def _render(self, kind):
+        """render the ORCA input for kind without the coordinates"""
+        if kind == "sp":
+            self._updateSP()
+            lines = list(self.osp_calls[self.func])
+        elif kind == "opt":
+            lines = list(self.ogo_orca_calls[self.func])
+            if not self.full:
+                lines += self.opt_thresholds["crude"]
+            elif self.sm == "smd":
+                lines += self.opt_thresholds["lax"]
+            else:
+                lines += self.opt_thresholds["normal"]
+        elif kind == "xtbopt":
+            lines = list(self.ogo_xtb_calls[self.func])
+        elif kind == "rrho":
+            # if the optimization was performed in solution,
+            # the structure has to be optimized again in the gas phase
+            if self.solv not in (None, 'gas'):
+                lines = list(self.ooptfreq_calls[self.func])
+            else:
+                lines = list(self.ofreq_calls[self.func])
+        elif kind == "nmrJ":
+            self._updateNMRJ()
+            lines = list(self.nmrj_calls[self.func])
+            # additional basis functions
+            if self.basis == "pcJ-0":
+                lines += [
+                    "%basis",
+                    "NewGTO 1", '"pcJ-0"', "p 1", "1 1.0 1.0", "end",
+                    "NewGTO 6", '"pcJ-0"', "d 1", "1 0.8 1.0", "end",
+                    "NewGTO 7", '"pcJ-0"', "d 1", "1 0.9 1.0", "end",
+                    "NewGTO 8", '"pcJ-0"', "d 1", "1 1.0 1.0", "end",
+                    "end",
+                ]
+        elif kind == "nmrS":
+            self._updateNMRS()
+            lines = list(self.nmrs_calls[self.func])
+        # nprocs
+        if int(self.progsettings["omp"]) >= 1:
+            lines += ["%pal", "    nprocs {}".format(self.progsettings["omp"]), "end"]
+        # add solvent correction to input if solvent is specified
+        if kind != "rrho" and self.solv not in (None, 'gas'):
+            if self.sm == "smd":
+                if self.progsettings["orca_old"]:
+                    lines += self.solvent_smd_old[self.solv]
+                else:
+                    lines += self.solvent_smd_new[self.solv]
+            if self.sm == "cpcm":
+                lines += self.solvent_cpcm[self.solv]
+        # unpaired, charge, and coordinates
+        # (unpaired == number of unpaired electrons)
+        if kind == "xtbopt":
+            lines.append(
+                "* xyzfile {} {} inp.xyz".format(str(self.chrg), str(self.unpaired + 1))
+            )
+            return "".join(line + "\n" for line in lines), ""
+        lines.append("*xyz {} {}".format(str(self.chrg), str(self.unpaired + 1)))
+        header = "".join(line + "\n" for line in lines)
+        if kind == "nmrJ":
+            trailer = ["*", "%eprnmr"]
+            for active, nuc in (
+                (self.hactive, "H"),
+                (self.factive, "F"),
+                (self.pactive, "P"),
+                (self.cactive, "C"),
+                (self.siactive, "Si"),
+            ):
+                if active:
+                    trailer.append(" Nuclei = all {} {{ ssfc }}".format(nuc))
+            trailer += [" SpinSpinRThresh 8.0", "end", ""]
+        elif kind == "nmrS":
+            trailer = ["*", "%eprnmr"]
+            for active, nuc in (
+                (self.hactive, "H"),
+                (self.cactive, "C"),
+                (self.factive, "F"),
+                (self.pactive, "P"),
+                (self.siactive, "Si"),
+            ):
+                if active:
+                    trailer.append(" Nuclei = all {} {{ shift }}".format(nuc))
+            trailer += [
+                " origin giao",
+                " giao_2el giao_2el_same_as_scf",
+                " giao_1el giao_1el_analytic",
+                "end",
+                "",
+            ]
+        else:
+            trailer = ["*"]
+        return header, "\n".join(trailer)
+
+    def _write_input(self, filename, kind):
+        """write the ORCA input for kind with the coordinates in self.coord,
+        the SCF starts from the converged orbitals of self.guess if there
+        are any (ORCA projects them if the basis set differs)"""
+        header, trailer = self._template(kind)
+        guess = None
+        if kind != "xtbopt":
+            guess = self._read_guess()
+        if guess is not None:
+            with open(os.path.join(self.workdir, "guess.gbw"), "wb") as out:
+                out.write(guess["inp.gbw"])
+        with open(os.path.join(self.workdir, filename), "w", newline=None) as inp:
+            if guess is not None:
+                inp.write('! MORead\n%moinp "guess.gbw"\n')
+            inp.write(header)
+            inp.write("".join(line + "\n" for line in self.coord))
+            inp.write(trailer)
+
+    def xyz2coord(self):
+        """convert file inp.xyz to TURBOMOLE coord file"""
+        geometries.write_coord(
+            geometries.read_xyz(os.path.join(self.workdir, "inp.xyz")),
+            os.path.join(self.workdir, "coord"),
+        )
+        return
+
+    def _sp(self, silent=False):
+        """ORCA input generation and single-point calculation"""
+        if not self.onlyread:
+            # convert coord to xyz
+            self.coord, self.nat = coord2xyz(self.workdir)
+            # input generation
+            self._write_input("inp", "sp")
+            # Done writing input!
+            if not silent:
+                print("Running single-point in {}".format(last_folders(self.workdir, 2)))
+            # start SP calculation
+            with open(
+                os.path.join(self.workdir, "sp.out"), "w", newline=None
+            ) as outputfile:
+                call = [os.path.join(self.progsettings["tempprogpath"], "orca"), "inp"]
+                self._call(
+                    call,
+                    outputfile,
                 )
-            time.sleep(0.1)
         # check if scf is converged:
-        self.success = False
-        if os.path.isfile(os.path.join(self.workdir, "sp.out")):
-            with open(
-                os.path.join(self.workdir, "sp.out"), "r", encoding=coding, newline=None
-            ) as inp:
-                stor = inp.readlines()
-                fspe = "FINAL SINGLE POINT ENERGY"
-                for line in stor:
-                    if fspe in line:
-                        self.energy = float(line.split()[4])
-                    if "ORCA TERMINATED NORMALLY" in line:
-                        self.success = True
+        out = self._read_output("sp.out", "orca")
+        if out.exists:
+            if out.energy is not None:
+                self.energy = out.energy
+            self.success = out.terminated
         else:
             self.energy = None
             self.success = False
@@ -5535,6 +6864,8 @@ class orca_job(qm_job):
                 ),
                 file=sys.stderr,
             )
+        else:
+            self._keep_guess()
         return
 
     def _smd_gsolv(self):
@@ -5564,7 +6895,6 @@ class orca_job(qm_job):
             tmp_solv = self.energy 
             self.energy = None
             self.success = False
-        time.sleep(0.1)
         # mv inp inp_solv sp.out sp_solv.out
         try:
             shutil.move(os.path.join(self.workdir, 'inp'), os.path.join(self.workdir,'inp_solv'))
@@ -5632,38 +6962,10 @@ class orca_job(qm_job):
                     )
                 )
                 newcoord.write("$end")
-            # input generation
+            # input generation, the coordinates are read from inp.xyz
             with open(os.path.join(self.workdir, "inp"), "w", newline=None) as inp:
-                # functionals
-                for line in self.ogo_xtb_calls[self.func]:
-                    inp.write(line + "\n")
-                # limitation of iterations
-                # if not self.full:
-                #    inp.write('%geom\n    TolE 5e-4\n    TolRMSG 1e-2\n    TolMaxG ??\n    TolRMSD ??\n    TolMaxD 1.0\nend\n')
-                # nprocROR: in the optimization of
-                if int(self.progsettings["omp"]) >= 1:
-                    inp.write("%pal\n")
-                    inp.write("    nprocs {}\n".format(self.progsettings["omp"]))
-                    inp.write("end\n")
-                # add solvent correction to input if solvent is specified and using smd
-                if self.solv not in (None, 'gas') and self.sm == "smd":
-                    if self.progsettings["orca_old"]:
-                        for line in self.solvent_smd_old[self.solv]:
-                            inp.write(line + "\n")
-                    else:
-                        for line in self.solvent_smd_new[self.solv]:
-                            inp.write(line + "\n")
-                if self.solv not in (None, 'gas') and self.sm == "cpcm":
-                    for line in self.solvent_cpcm[self.solv]:
-                        inp.write(line + "\n")
-                # unpaired, charge, and coordinates
-                inp.write(
-                    "* xyzfile {} {} inp.xyz\n".format(
-                        str(self.chrg), str(self.unpaired + 1)
-                    )
-                )
+                inp.write(self._template("xtbopt")[0])
             # Done writing input!
-            time.sleep(0.02)
             print("Running optimization in {:18}".format(last_folders(self.workdir, 2)))
             if self.full:
                 if self.sm == "smd" and self.solv not in (None, 'gas'):
@@ -5692,43 +6994,29 @@ class orca_job(qm_job):
             with open(
                 os.path.join(self.workdir, output), "w", newline=None
             ) as outputfile:
-                subprocess.call(
+                self._call(
                     callargs,
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                 )
-            time.sleep(0.1)
         # check if optimization finished correctly:
-        if os.path.isfile(os.path.join(self.workdir, output)):
-            with open(
-                os.path.join(self.workdir, output), "r", encoding=coding, newline=None
-            ) as inp:
-                stor = inp.readlines()
-            for line in stor:
-                if (
-                    "external code error" in line
-                    or "|grad| > 500, something is totally wrong!" in line
-                    or "abnormal termination of xtb" in line
-                ):
-                    print(
-                        "ERROR: optimization in {:18} not converged".format(
-                            last_folders(self.workdir, 2)
-                        ),
-                        file=sys.stderr,
-                    )
-                    self.success = False
-                    self.energy = None
-                    return 1
-                if "   *** GEOMETRY OPTIMIZATION CONVERGED AFTER " in line:
-                    self.cycles = int(line.split()[5])
-                if "ORCA TERMINATED NORMALLY" in line:
-                    self.success = True
-                if "FINAL SINGLE POINT ENERGY" in line:
-                    self.energy = float(line.split()[4])
+        out = self._read_output(output, "xtb_orca_opt")
+        if out.exists:
+            if out.error:
+                print(
+                    "ERROR: optimization in {:18} not converged".format(
+                        last_folders(self.workdir, 2)
+                    ),
+                    file=sys.stderr,
+                )
+                self.success = False
+                self.energy = None
+                return 1
+            if out.cycles is not None:
+                self.cycles = out.cycles
+            if out.terminated:
+                self.success = True
+            if out.energy is not None:
+                self.energy = out.energy
         else:
             self.success = False
             self.energy = None
@@ -5753,6 +7041,8 @@ class orca_job(qm_job):
                 ),
                 file=sys.stderr,
             )
+        else:
+            self._keep_guess()
         # convert optimized xyz to coord file
         self.xyz2coord()
         return
@@ -5767,103 +7057,25 @@ class orca_job(qm_job):
             # convert coord to xyz
             self.coord, self.nat = coord2xyz(self.workdir)
             # input generation
-            thresholds = {
-                "normal": [
-                    "%geom",
-                    "  TolE  5e-6",
-                    "  TolRMSG  1e-3",
-                    "  TolMaxG  2e-3",
-                    "  TolRMSD  1e-1",
-                    "  TolMaxD 1e-1",
-                    "end",
-                ],
-                "lax": [
-                    "%geom",
-                    "  TolE  2e-5",
-                    "  TolRMSG  2e-3",
-                    "  TolMaxG  2e-3",
-                    "  TolRMSD  1e-1",
-                    "  TolMaxD 1e-1",
-                    "end",
-                ],
-                "crude": [
-                    "%geom",
-                    "  TolE  5e-4",
-                    "  TolRMSG  1e-2",
-                    "  TolMaxG  5e-3",
-                    "  TolRMSD  1e-1",
-                    "  TolMaxD 1e-1",
-                    "end",
-                ],
-            }
-            with open(os.path.join(self.workdir, "inp"), "w", newline=None) as inp:
-                # functionals
-                for line in self.ogo_orca_calls[self.func]:
-                    inp.write(line + "\n")
-                # set thresholds:
-                if self.full:
-                    if self.sm == "smd":
-                        for line in thresholds["lax"]:
-                            inp.write(line + "\n")
-                    else:
-                        for line in thresholds["normal"]:
-                            inp.write(line + "\n")
-                else:
-                    for line in thresholds["crude"]:
-                        inp.write(line + "\n")
-                if int(self.progsettings["omp"]) >= 1:
-                    inp.write("%pal\n")
-                    inp.write("    nprocs {}\n".format(self.progsettings["omp"]))
-                    inp.write("end\n")
-                # add solvent correction to input if solvent is specified and using smd
-                if self.solv not in (None, 'gas') and self.sm == "smd":
-                    if self.progsettings["orca_old"]:
-                        for line in self.solvent_smd_old[self.solv]:
-                            inp.write(line + "\n")
-                    else:
-                        for line in self.solvent_smd_new[self.solv]:
-                            inp.write(line + "\n")
-                if self.solv not in (None, 'gas') and self.sm == "cpcm":
-                    for line in self.solvent_cpcm[self.solv]:
-                        inp.write(line + "\n")
-                # unpaired, charge, and coordinates
-                inp.write("*xyz {} {}\n".format(str(self.chrg), str(self.unpaired + 1)))
-                for line in self.coord:
-                    inp.write(line + "\n")
-                inp.write("*")
+            self._write_input("inp", "opt")
             # Done writing input!
-            time.sleep(0.02)
             # start geometry optimization
             print("Running optimization in {:18}".format(last_folders(self.workdir, 2)))
             with open(
                 os.path.join(self.workdir, output), "w", newline=None
             ) as outputfile:
                 call = [os.path.join(self.progsettings["tempprogpath"], "orca"), "inp"]
-                subprocess.call(
+                self._call(
                     call,
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                 )
-            time.sleep(0.1)
         # check if optimization finished correctly:
-        self.success = False
-        if os.path.isfile(os.path.join(self.workdir, output)):
-            with open(
-                os.path.join(self.workdir, output), "r", encoding=coding, newline=None
-            ) as inp:
-                stor = inp.readlines()
-                fspe = "FINAL SINGLE POINT ENERGY"
-                for line in stor:
-                    if "GEOMETRY OPTIMIZATION CYCLE" in line:
-                        self.cycles += 1
-                    if fspe in line:
-                        self.energy = float(line.split()[4])
-                    if "ORCA TERMINATED NORMALLY" in line:
-                        self.success = True
+        out = self._read_output(output, "orca_opt")
+        if out.exists:
+            self.cycles += out.cycles
+            if out.energy is not None:
+                self.energy = out.energy
+            self.success = out.terminated
         else:
             self.success = False
             self.energy = None
@@ -5888,6 +7100,8 @@ class orca_job(qm_job):
                 ),
                 file=sys.stderr,
             )
+        else:
+            self._keep_guess()
         # convert optimized xyz to coord file
         self.xyz2coord()
         return
@@ -5897,93 +7111,8 @@ class orca_job(qm_job):
         if not self.onlyread:
             self.coord, self.nat = coord2xyz(self.workdir)
             # input generation
-            ofreq_calls = {
-                "b97-3c": [
-                    "%MaxCore 8000",
-                    "! def2-mTZVP b97-3c grid5 nofinalgrid NumFreq",
-                    "!     smallprint printgap noloewdin",
-                    "%output",
-                    "       print[P_BondOrder_M] 1",
-                    "       print[P_Mayer] 1",
-                    "       print[P_basis] 2",
-                    "end",
-                ],
-                "pbeh-3c": [
-                    "%MaxCore 8000",
-                    "! def2-mSVP pbeh-3c grid5 nofinalgrid NumFreq",
-                    "!     smallprint printgap noloewdin",
-                    "%output",
-                    "       print[P_BondOrder_M] 1",
-                    "       print[P_Mayer] 1",
-                    "       print[P_basis] 2",
-                    "end",
-                ],
-                "tpss": [
-                    "%MaxCore 8000",
-                    "! def2-TZVP(-f) tpss grid5 d3bj nofinalgrid NumFreq",
-                    "!     smallprint printgap noloewdin",
-                    "%output",
-                    "       print[P_BondOrder_M] 1",
-                    "       print[P_Mayer] 1",
-                    "       print[P_basis] 2",
-                    "end",
-                ],
-            }
-            ooptfreq_calls = {
-                "b97-3c": [
-                    "%MaxCore 8000",
-                    "! def2-mTZVP b97-3c Opt grid4 NumFreq",
-                    "!     smallprint printgap noloewdin",
-                    "%output",
-                    "       print[P_BondOrder_M] 1",
-                    "       print[P_Mayer] 1",
-                    "       print[P_basis] 2",
-                    "end",
-                ],
-                "pbeh-3c": [
-                    "%MaxCore 8000",
-                    "! def2-mSVP pbeh-3c Opt grid4 NumFreq",
-                    "!     smallprint printgap noloewdin",
-                    "%output",
-                    "       print[P_BondOrder_M] 1",
-                    "       print[P_Mayer] 1",
-                    "       print[P_basis] 2",
-                    "end",
-                ],
-                "tpss": [
-                    "%MaxCore 8000",
-                    "! def2-TZVP(-f) tpss Opt d3bj grid4 NumFreq",
-                    "!     smallprint printgap noloewdin",
-                    "%output",
-                    "       print[P_BondOrder_M] 1",
-                    "       print[P_Mayer] 1",
-                    "       print[P_basis] 2",
-                    "end",
-                ],
-            }
-            with open(os.path.join(self.workdir, "inp"), "w", newline=None) as inp:
-                # if the optimization was performed in solution, 
-                # the structure has to be optimized again in the gas phase
-                if self.solv not in (None, 'gas'):
-                    for line in ooptfreq_calls[self.func]:
-                        inp.write(line + "\n")
-                else:
-                    for line in ofreq_calls[self.func]:
-                        inp.write(line + "\n")
-                # nprocs
-                if int(self.progsettings["omp"]) >= 1:
-                    inp.write("%pal\n")
-                    inp.write("    nprocs {}\n".format(self.progsettings["omp"]))
-                    inp.write("end\n")
-                # unpaired, charge, and coordinates
-                inp.write(
-                    "*xyz {} {}\n".format(str(self.chrg), str(self.unpaired + 1))
-                )  # int(args.unpaired) + 1
-                for line in self.coord:
-                    inp.write(line + "\n")
-                inp.write("*")
+            self._write_input("inp", "rrho")
             # Done writing input!
-            time.sleep(0.02)
             # start frequency calculation
             print(
                 "Running ORCA frequency calculation in {:18}".format(
@@ -5994,32 +7123,17 @@ class orca_job(qm_job):
                 os.path.join(self.workdir, "freq.out"), "w", newline=None
             ) as outputfile:
                 call = [os.path.join(self.progsettings["tempprogpath"], "orca"), "inp"]
-                subprocess.call(
+                self._call(
                     call,
-                    shell=False,
-                    stdin=None,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=False,
-                    cwd=self.workdir,
-                    stdout=outputfile,
+                    outputfile,
                 )
-            time.sleep(0.1)
         # check if scf is converged:
-        if os.path.isfile(os.path.join(self.workdir, "freq.out")):
-            with open(
-                os.path.join(self.workdir, "freq.out"),
-                "r",
-                encoding=coding,
-                newline=None,
-            ) as inp:
-                stor = inp.readlines()
-                for line in stor:
-                    if (
-                        "G-E(el)                           ..." in line
-                    ):  # tested with ORCA4.1
-                        self.rrho = float(line.split()[2])
-                    if "ORCA TERMINATED NORMALLY" in line:
-                        self.success = True
+        out = self._read_output("freq.out", "orca_freq")
+        if out.exists:
+            if out.rrho is not None:  # tested with ORCA4.1
+                self.rrho = out.rrho
+            if out.terminated:
+                self.success = True
         else:
             self.success = False
             self.rrho = None
@@ -6092,72 +7206,7 @@ class orca_job(qm_job):
     def _nmrJ(self):
         """ORCA NMR coupling calculation"""
         self.coord, self.nat = coord2xyz(self.workdir)
-        # update for basisset
-        self._updateNMRJ()
-        # generate input   # double hybrids not implemented
-        with open(os.path.join(self.workdir, "inpJ"), "w", newline=None) as inp:
-            # functional
-            for line in self.nmrj_calls[self.func]:
-                inp.write(line + "\n")
-            # additional basis functions
-            if self.basis == "pcJ-0":
-                inp.write("%basis\n")
-                inp.write("NewGTO 1\n")
-                inp.write('"pcJ-0"\n')
-                inp.write("p 1\n")
-                inp.write("1 1.0 1.0\n")
-                inp.write("end\n")
-                inp.write("NewGTO 6\n")
-                inp.write('"pcJ-0"\n')
-                inp.write("d 1\n")
-                inp.write("1 0.8 1.0\n")
-                inp.write("end\n")
-                inp.write("NewGTO 7\n")
-                inp.write('"pcJ-0"\n')
-                inp.write("d 1\n")
-                inp.write("1 0.9 1.0\n")
-                inp.write("end\n")
-                inp.write("NewGTO 8\n")
-                inp.write('"pcJ-0"\n')
-                inp.write("d 1\n")
-                inp.write("1 1.0 1.0\n")
-                inp.write("end\n")
-                inp.write("end\n")
-            # nprocs
-            if int(self.progsettings["omp"]) >= 1:
-                inp.write("%pal\n")
-                inp.write("    nprocs {}\n".format(self.progsettings["omp"]))
-                inp.write("end\n")
-            # add solvent correction to input if solvent is specified and using smd
-            if self.solv not in (None, 'gas') and self.sm == "smd":
-                if self.progsettings["orca_old"]:
-                    for line in self.solvent_smd_old[self.solv]:
-                        inp.write(line + "\n")
-                else:
-                    for line in self.solvent_smd_new[self.solv]:
-                        inp.write(line + "\n")
-            if self.solv not in (None, 'gas') and self.sm == "cpcm":
-                for line in self.solvent_cpcm[self.solv]:
-                    inp.write(line + "\n")
-            # unpaired,charge, and coordinates
-            inp.write("*xyz {} {}\n".format(str(self.chrg), str(self.unpaired + 1)))
-            for line in self.coord:
-                inp.write(line + "\n")
-            inp.write("*\n")
-            # couplings
-            inp.write("%eprnmr\n")
-            if self.hactive:
-                inp.write(" Nuclei = all H { ssfc }\n")
-            if self.factive:
-                inp.write(" Nuclei = all F { ssfc }\n")
-            if self.pactive:
-                inp.write(" Nuclei = all P { ssfc }\n")
-            if self.cactive:
-                inp.write(" Nuclei = all C { ssfc }\n")
-            if self.siactive:
-                inp.write(" Nuclei = all Si { ssfc }\n")
-            inp.write(" SpinSpinRThresh 8.0\n")
-            inp.write("end\n")
+        self._write_input("inpJ", "nmrJ")
         # Done input!
         # start coupling calculation
         print(
@@ -6167,25 +7216,13 @@ class orca_job(qm_job):
             os.path.join(self.workdir, "orcaJ.out"), "w", newline=None
         ) as outputfile:
             call = [os.path.join(self.progsettings["tempprogpath"], "orca"), "inpJ"]
-            subprocess.call(
+            self._call(
                 call,
-                shell=False,
-                stdin=None,
-                stderr=subprocess.STDOUT,
-                universal_newlines=False,
-                cwd=self.workdir,
-                stdout=outputfile,
-            )
-        time.sleep(0.1)
+                outputfile,
+            )
         # check if calculation was successfull:
-        with open(
-            os.path.join(self.workdir, "orcaJ.out"), "r", encoding=coding, newline=None
-        ) as inp:
-            store = inp.readlines()
-            self.success = False
-            for line in store:
-                if "ORCA TERMINATED NORMALLY" in line:
-                    self.success = True
+        out = self._read_output("orcaJ.out", "orca_nmr")
+        self.success = out.terminated
         if not self.success:
             print(
                 "ERROR: coupling calculation in {:18} failed!".format(
@@ -6275,54 +7312,12 @@ class orca_job(qm_job):
     def _nmrS(self):
         """ORCA NMR shielding calculation"""
         self.coord, self.nat = coord2xyz(self.workdir)
-        # update for current basis sets
-        self._updateNMRS()
-        with open(os.path.join(self.workdir, "inpS"), "w", newline=None) as inp:
-            # functional
-            try:
-                for line in self.nmrs_calls[self.func]:
-                    inp.write(line + "\n")
-            except KeyError:
-                print("Error: Functional was not found!")
-                self.success = False
-                return
-            # nprocs
-            if int(self.progsettings["omp"]) >= 1:
-                inp.write("%pal\n")
-                inp.write("    nprocs {}\n".format(self.progsettings["omp"]))
-                inp.write("end\n")
-            # add solvent correction to input if solvent is specified and using smd
-            if self.solv not in (None, 'gas') and self.sm == "smd":
-                if self.progsettings["orca_old"]:
-                    for line in self.solvent_smd_old[self.solv]:
-                        inp.write(line + "\n")
-                else:
-                    for line in self.solvent_smd_new[self.solv]:
-                        inp.write(line + "\n")
-            if self.solv not in (None, 'gas') and self.sm == "cpcm":
-                for line in self.solvent_cpcm[self.solv]:
-                    inp.write(line + "\n")
-            # unpaired, charge, and coordinates
-            inp.write("*xyz {} {}\n".format(str(self.chrg), str(self.unpaired + 1)))
-            for line in self.coord:
-                inp.write(line + "\n")
-            inp.write("*\n")
-            # shielding
-            inp.write("%eprnmr\n")
-            if self.hactive:
-                inp.write(" Nuclei = all H { shift }\n")
-            if self.cactive:
-                inp.write(" Nuclei = all C { shift }\n")
-            if self.factive:
-                inp.write(" Nuclei = all F { shift }\n")
-            if self.pactive:
-                inp.write(" Nuclei = all P { shift }\n")
-            if self.siactive:
-                inp.write(" Nuclei = all Si { shift }\n")
-            inp.write(" origin giao\n")
-            inp.write(" giao_2el giao_2el_same_as_scf\n")
-            inp.write(" giao_1el giao_1el_analytic\n")
-            inp.write("end\n")
+        try:
+            self._write_input("inpS", "nmrS")
+        except KeyError:
+            print("Error: Functional was not found!")
+            self.success = False
+            return
         # Done input!
         # shielding calculation
         print(
@@ -6334,25 +7329,13 @@ class orca_job(qm_job):
             os.path.join(self.workdir, "orcaS.out"), "w", newline=None
         ) as outputfile:
             call = [os.path.join(self.progsettings["tempprogpath"], "orca"), "inpS"]
-            subprocess.call(
+            self._call(
                 call,
-                shell=False,
-                stdin=None,
-                stderr=subprocess.STDOUT,
-                universal_newlines=False,
-                cwd=self.workdir,
-                stdout=outputfile,
-            )
-        time.sleep(0.1)
+                outputfile,
+            )
         # check if calculation was successfull:
-        with open(
-            os.path.join(self.workdir, "orcaS.out"), "r", encoding=coding, newline=None
-        ) as inp:
-            store = inp.readlines()
-            self.success = False
-            for line in store:
-                if "ORCA TERMINATED NORMALLY" in line:
-                    self.success = True
+        out = self._read_output("orcaS.out", "orca_nmr")
+        self.success = out.terminated
         if not self.success:
             print(
                 "ERROR: shielding calculation in {:18} failed!".format(
@@ -6442,7 +7425,6 @@ class orca_job(qm_job):
                         atom1[i], atom2[i], jab[i], digits=4
                     )
                 )
-        time.sleep(0.02)
         return
 
     def execute(self):
@@ -6473,22 +7455,724 @@ class orca_job(qm_job):
         return
 
 
-def execute_data(q, resultq):
+class core_allocator():
+    """Hand out the cores of the total budget (maxthreads * omp) to the jobs.
+    As long as enough jobs are waiting, each job gets omp cores. When the
+    queue drains, the idle cores are given to the remaining jobs. The budget
+    is never exceeded, a job waits until at least one core is free."""
+
+    def __init__(self, maxthreads, omp):
+        self.maxthreads = max(int(maxthreads), 1)
+        self.omp = max(int(omp), 1)
+        self.free = self.maxthreads * self.omp
+        self.running = 0
+        self.chains = 0  # started chains of run_chain_in_parallel
+        self.lock = Lock()
+        self.released = Condition(self.lock)
+
+    def start_chain(self):
+        """a worker starts the chain of jobs of a conformer"""
+        with self.lock:
+            self.chains += 1
+
+    def end_chain(self):
+        """the chain of jobs of a conformer is finished"""
+        with self.lock:
+            self.chains -= 1
+
+    def acquire(self, waiting, maxcores=None):
+        """get cores for a job, waiting = number of jobs which still have to
+        be started (including this one), chains which are between two of
+        their jobs are added. maxcores = limit for jobs which can not use
+        more cores (e.g. prep)"""
+        with self.released:
+            while self.free < 1:
+                self.released.wait()
+            # chains of other workers which will start their next job soon
+            waiting += max(self.chains - self.running - 1, 0)
+            # number of jobs which can start now and share the free cores
+            concurrent = max(min(waiting, self.maxthreads - self.running), 1)
+            ncores = max(self.free // concurrent, 1)
+            if maxcores is not None:
+                ncores = min(ncores, max(int(maxcores), 1))
+            self.free -= ncores
+            self.running += 1
+        return ncores
+
+    def release(self, ncores):
+        """give the cores of a finished job back"""
+        with self.released:
+            self.free += ncores
+            self.running -= 1
+            self.released.notify_all()
+
+
+def format_duration(seconds):
+    """h:mm:ss"""
+    seconds = int(round(seconds))
+    return "{:d}:{:02d}:{:02d}".format(
+        seconds // 3600, (seconds % 3600) // 60, seconds % 60
+    )
+
+
+class progress_monitor():
+    """watches the workdirs of the running jobs of run_in_parallel or
+    run_chain_in_parallel in a separate thread. Every interval seconds the
+    number of finished, running and queued jobs, the ETA from the observed
+    throughput and the optimization cycles and energy changes of the
+    running jobs (read from the growing energy/trajectory files) are
+    printed and written to progressfile (json) for external tools."""
+
+    interval = 0.0  # in seconds, 0 switches the monitor off (--progress)
+    progressfile = "enso_progress.json"
+    # energy of each optimization cycle: TM jobex, xtb ANCOPT, ORCA
+    logfiles = ("energy", "xtbopt.log", "inp_trj.xyz")
+
+    def __init__(self, njobs, label, cwd=None):
+        self.njobs = njobs
+        self.label = label
+        if cwd is None:
+            cwd = os.getcwd()
+        self.filename = os.path.join(cwd, self.progressfile)
+        self.lock = Lock()
+        self.running = {}  # name: [task, start time]
+        self.done = 0
+        self.failed = 0
+        self.start = time.time()
+        self.tails = {}  # path: [offset, energies]
+        self.stopped = Event()
+        self.thread = None
+
+    def begin(self, task):
+        """task (or the next job of a chain) is started"""
+        with self.lock:
+            self.running[task.name] = [task, time.time()]
+
+    def end(self, task):
+        """task (or the whole chain) is finished"""
+        with self.lock:
+            self.running.pop(task.name, None)
+            self.done += 1
+            if not task.success:
+                self.failed += 1
+
+    def run(self):
+        if self.interval > 0:
+            self.thread = Thread(target=self._loop)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self._write(self.state())
+
+    def _loop(self):
+        while not self.stopped.wait(self.interval):
+            state = self.state()
+            self._print(state)
+            self._write(state)
+
+    def _tail(self, path):
+        """energies of all optimization cycles in path, only the part of
+        the file appended since the last call is read"""
+        offset, energies = self.tails.get(path, [0, []])
+        try:
+            if os.path.getsize(path) < offset:
+                # the file was written anew
+                offset, energies = 0, []
+            with open(path, "rb") as inp:
+                inp.seek(offset)
+                data = inp.read()
+        except OSError:
+            return energies
+        # incomplete last lines are read again next time
+        data = data[: data.rfind(b"\n") + 1]
+        offset += len(data)
+        tm = os.path.basename(path) == "energy"
+        for line in data.decode(coding).splitlines():
+            try:
+                if tm:
+                    items = line.split()
+                    if items and items[0].isdigit():
+                        energies.append(float(items[1]))
+                elif "energy:" in line:
+                    energies.append(float(line.split("energy:")[1].split()[0]))
+                elif "Coordinates from ORCA-job" in line:
+                    energies.append(float(line.split()[-1]))
+            except (ValueError, IndexError):
+                continue
+        self.tails[path] = [offset, energies]
+        return energies
+
+    def state(self):
+        """progress as dictionary"""
+        now = time.time()
+        with self.lock:
+            running = list(self.running.values())
+            done, failed = self.done, self.failed
+        eta = None
+        if done > 0:
+            eta = (self.njobs - done) * (now - self.start) / done
+        conformers = {}
+        for task, start in running:
+            info = {"jobtype": task.jobtype, "elapsed": round(now - start, 1)}
+            for name in self.logfiles:
+                path = os.path.join(task.workdir, name)
+                if os.path.isfile(path) and os.path.getmtime(path) >= start - 1.0:
+                    energies = self._tail(path)
+                    if energies:
+                        info["cycle"] = len(energies)
+                        info["energy"] = energies[-1]
+                        if len(energies) > 1:
+                            info["dE"] = energies[-1] - energies[-2]
+                    break
+            conformers[task.name] = info
+        return {
+            "time": now,
+            "label": self.label,
+            "jobs": self.njobs,
+            "done": done,
+            "failed": failed,
+            "running": len(running),
+            "queued": self.njobs - done - len(running),
+            "elapsed": round(now - self.start, 1),
+            "eta": None if eta is None else round(eta, 1),
+            "conformers": conformers,
+        }
+
+    def _print(self, state):
+        if state["eta"] is None:
+            eta = "unknown"
+        else:
+            eta = format_duration(state["eta"])
+        print(
+            "PROGRESS {}: {}/{} done ({} failed), {} running, {} queued, "
+            "ETA {}".format(
+                state["label"], state["done"], state["jobs"], state["failed"],
+                state["running"], state["queued"], eta,
+            )
+        )
+        for name in sorted(state["conformers"], key=lambda x: int(x[4:])):
+            info = state["conformers"][name]
+            line = "    {:10} {:10} {:>8}".format(
+                name, info["jobtype"], format_duration(info["elapsed"])
+            )
+            if "cycle" in info:
+                line += "   cycle {:4d}   E = {:.7f}".format(info["cycle"], info["energy"])
+            if "dE" in info:
+                line += "   dE = {: .2e}".format(info["dE"])
+            print(line)
+        sys.stdout.flush()
+
+    def _write(self, state):
+        tmp = self.filename + ".tmp"
+        try:
+            with open(tmp, "w", newline=None) as out:
+                json.dump(state, out, indent=4)
+            os.replace(tmp, self.filename)
+        except OSError as error:
+            print("WARNING: could not write {}: {}".format(self.filename, error))
+
+
+def get_omp(instructdict):
+    """number of cores per job from the instructions"""
+    try:
+        return int(instructdict.get("progsettings", {}).get("omp", 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def walltime_key(jobtype, workdir, full=True):
+    """key under which the wall time of a job is stored, e.g. opt_pbeh-3c"""
+    key = "{}_{}".format(jobtype, os.path.basename(workdir))
+    if jobtype in ("opt", "xtbopt") and not full:
+        key = "crude_" + key
+    return key
+
+
+def record_walltime(task, walltime):
+    """store the wall time of the job which was just executed"""
+    if task.onlyread:
+        return
+    if task.timings is None:
+        task.timings = OrderedDict()
+    task.timings[walltime_key(task.jobtype, task.workdir, task.full)] = round(
+        walltime, 2
+    )
+
+
+def record_resources(task, walltime):
+    """store wall time, cores, CPU time and peak memory of the external
+    programs, returncode and cycles of the job which was just executed"""
+    usage = task.usage or {}
+    task.usage = None
+    if task.onlyread:
+        return
+    if task.resources is None:
+        task.resources = OrderedDict()
+    info = OrderedDict()
+    info["wall"] = round(walltime, 2)
+    info["cores"] = int(task.progsettings.get("omp", 1))
+    info["cpu"] = round(usage.get("cpu", 0.0), 2)
+    info["maxrss_mb"] = round(usage.get("maxrss", 0) / 1024.0, 1)
+    info["returncode"] = usage.get("returncode", None)
+    info["scf_cycles"] = usage.get("scf_cycles", 0)
+    if task.jobtype in ("opt", "xtbopt"):
+        info["opt_cycles"] = task.cycles
+    task.resources[walltime_key(task.jobtype, task.workdir, task.full)] = info
+
+
+# resources of the stages (run_in_parallel, run_chain_in_parallel) of the
+# current part, printed and cleared by print_resources
+stage_resources = []
+
+
+def record_stage(label, tasks, keys, walltime, cores):
+    """sum up the resources of the jobs (keys) of tasks of a stage which took
+    walltime seconds with a budget of cores"""
+    jobs = []
+    for task in tasks:
+        for key in keys(task):
+            if task.resources and key in task.resources:
+                jobs.append((task.name, task.resources[key]))
+    if not jobs:
+        return
+    conformers = {}
+    for name, info in jobs:
+        conformers[name] = conformers.get(name, 0.0) + info["wall"]
+    stage_resources.append(
+        {
+            "label": label,
+            "jobs": len(jobs),
+            "wall": walltime,
+            "cores": cores,
+            "coreseconds": math.fsum(i["wall"] * i["cores"] for _, i in jobs),
+            "cpu": math.fsum(i["cpu"] for _, i in jobs),
+            "conformers": conformers,
+        }
+    )
+
+
+def print_resources(part):
+    """table of core-hours, CPU-hours and parallel efficiency (core-hours
+    of the jobs / (wall time * cores)) of the stages of part and the
+    slowest conformers"""
+    if not stage_resources:
+        return
+    print("\n*********************************")
+    print("* {:^29} *".format("resources of {}".format(part)))
+    print("*********************************")
+    length = max([len(i["label"]) for i in stage_resources] + [5])
+    print(
+        "{:{digits}}  {:>6}  {:>10}  {:>10}  {:>10}  {:>10}  {}".format(
+            "stage", "jobs", "wall [h]", "core-h", "CPU-h", "eff. [%]",
+            "slowest", digits=length,
+        )
+    )
+    total = {"jobs": 0, "wall": 0.0, "budget": 0.0, "coreseconds": 0.0, "cpu": 0.0}
+    conformers = {}
+    for stage in stage_resources:
+        slowest = max(stage["conformers"], key=lambda x: stage["conformers"][x])
+        print(
+            "{:{digits}}  {:>6}  {:>10.3f}  {:>10.3f}  {:>10.3f}  {:>10.1f}  "
+            "{} ({:.3f} h)".format(
+                stage["label"],
+                stage["jobs"],
+                stage["wall"] / 3600.0,
+                stage["coreseconds"] / 3600.0,
+                stage["cpu"] / 3600.0,
+                100.0 * stage["coreseconds"] / max(stage["wall"] * stage["cores"], 1e-9),
+                slowest,
+                stage["conformers"][slowest] / 3600.0,
+                digits=length,
+            )
+        )
+        total["jobs"] += stage["jobs"]
+        total["wall"] += stage["wall"]
+        total["budget"] += stage["wall"] * stage["cores"]
+        total["coreseconds"] += stage["coreseconds"]
+        total["cpu"] += stage["cpu"]
+        for name, walltime in stage["conformers"].items():
+            conformers[name] = conformers.get(name, 0.0) + walltime
+    print(
+        "{:{digits}}  {:>6}  {:>10.3f}  {:>10.3f}  {:>10.3f}  {:>10.1f}".format(
+            "total",
+            total["jobs"],
+            total["wall"] / 3600.0,
+            total["coreseconds"] / 3600.0,
+            total["cpu"] / 3600.0,
+            100.0 * total["coreseconds"] / max(total["budget"], 1e-9),
+            digits=length,
+        )
+    )
+    slowest = sorted(conformers, key=lambda x: conformers[x], reverse=True)[:5]
+    print(
+        "slowest conformers (wall time of all jobs): {}".format(
+            ", ".join(
+                "{} ({:.3f} h)".format(name, conformers[name] / 3600.0)
+                for name in slowest
+            )
+        )
+    )
+    del stage_resources[:]
+
+
+def walltime_jobtype(key):
+    """jobtype of a walltime key (walltime_key), crude and full optimizations
+    have the same jobtype"""
+    if key.startswith("crude_"):
+        key = key[len("crude_"):]
+    for jobtype in sorted(qm_job.jobtypes, key=len, reverse=True):
+        if key.startswith(jobtype + "_"):
+            return jobtype
+    return key.split("_")[0]
+
+
+def estimate_cost(task, keys, resources=None):
+    """Estimate the cost (in seconds) of the jobs (keys) of a conformer from
+    the wall times measured before for this conformer. If a job was not timed
+    before, the wall time of a job of the same jobtype (e.g. another
+    functional) is used, for optimizations the time per cycle times the
+    number of cycles of the last optimization of the conformer.
+    resources = resources of the timed jobs (the cycles of optimizations),
+    default: task.resources
+    Returns None if a jobtype was never timed for the conformer."""
+    if not task.timings:
+        return None
+    if resources is None:
+        resources = task.resources or {}
+    cost = 0.0
+    for key in keys:
+        if key in task.timings:
+            cost += task.timings[key]
+            continue
+        jobtype = walltime_jobtype(key)
+        timed = [i for i in task.timings if walltime_jobtype(i) == jobtype]
+        if not timed:
+            return None
+        if jobtype in ("opt", "xtbopt"):
+            cycles = [
+                resources.get(i, {}).get("opt_cycles", 0) or 0 for i in timed
+            ]
+            if not any(cycles):
+                return None
+            percycle = math.fsum(
+                task.timings[i] / n for i, n in zip(timed, cycles) if n
+            ) / len([n for n in cycles if n])
+            cost += percycle * max(int(task.cycles), 1)
+        else:
+            cost += math.fsum(task.timings[i] for i in timed) / len(timed)
+    return cost
+
+
+def fallback_cost(task, keys):
+    """relative cost of the jobs (keys) of a conformer without wall times:
+    nat**3, for optimizations times the number of cycles of the last
+    optimization of the conformer"""
+    cost = 0.0
+    for key in keys:
+        tmp = float(max(int(task.nat), 1)) ** 3
+        if walltime_jobtype(key) in ("opt", "xtbopt"):
+            tmp *= max(int(task.cycles), 1)
+        cost += tmp
+    return cost
+
+
+def longest_first(tasks, keys, input_object=None):
+    """Sort tasks (longest processing time first) by their estimated cost,
+    wall times from enso.json (previous runs and the journal) are taken into
+    account. If they are not known for all conformers, the cost of all
+    conformers is estimated from nat**3 (fallback_cost), so all costs have
+    the same unit.
+    keys = function returning the walltime keys of the jobs of a task"""
+    costs = {}
+    for task in tasks:
+        resources = dict(task.resources or {})
+        if input_object is not None and task.name in input_object.json_dict:
+            stored = input_object.json_dict[task.name].get("walltime", None)
+            if stored:
+                if task.timings is None:
+                    task.timings = OrderedDict()
+                for key, value in stored.items():
+                    task.timings.setdefault(key, value)
+            stored = input_object.json_dict[task.name].get("resources", None)
+            if isinstance(stored, dict):
+                for key, value in stored.items():
+                    resources.setdefault(key, value)
+        costs[task.name] = estimate_cost(task, keys(task), resources)
+    if any(cost is None for cost in costs.values()):
+        for task in tasks:
+            costs[task.name] = fallback_cost(task, keys(task))
+    return sorted(tasks, key=lambda x: costs[x.name], reverse=True)
+
+
+def store_walltimes(results, input_object=None):
+    """write the measured wall times and resources to enso.json"""
+    if input_object is None:
+        return
+    for task in results:
+        if task.timings and task.name in input_object.json_dict:
+            if not isinstance(
+                input_object.json_dict[task.name].get("walltime", None), dict
+            ):
+                input_object.json_dict[task.name]["walltime"] = OrderedDict()
+            input_object.json_dict[task.name]["walltime"].update(task.timings)
+        if task.resources and task.name in input_object.json_dict:
+            if not isinstance(
+                input_object.json_dict[task.name].get("resources", None), dict
+            ):
+                input_object.json_dict[task.name]["resources"] = OrderedDict()
+            input_object.json_dict[task.name]["resources"].update(task.resources)
+
+
+def execute_data(q, resultq, allocator=None, monitor=None):
     """code that the worker has to execute """
     while True:
-        if q.empty():
-            # print('Queue empty')
+        try:
+            task = q.get_nowait()
+        except Empty:
             break
-        task = q.get()
         # print('Working in dir: {} with {}'.format(task.workdir, task.jobtype))
-        task.execute()
-        resultq.put(task)
-        time.sleep(0.02)
-        q.task_done()
+        ncores = None
+        if monitor is not None:
+            monitor.begin(task)
+        try:
+            if allocator is not None:
+                ncores = allocator.acquire(q.qsize() + 1, task.maxcores())
+                task.set_cores(ncores)
+            start = time.time()
+            task.timedout = False
+            task.usage = {}
+            with trace.span(
+                "{} {}".format(task.jobtype, task.name),
+                "job",
+                stage=walltime_key(task.jobtype, task.workdir, task.full),
+            ) as span:
+                task.execute()
+                span.args["success"] = task.success
+            if task.timedout:
+                # runaway job was killed
+                task.success = False
+            walltime = time.time() - start
+            record_walltime(task, walltime)
+            record_resources(task, walltime)
+        except Exception as error:
+            # the job is failed, the worker goes on with the next one
+            job_crashed(task, error)
+        finally:
+            if ncores is not None:
+                allocator.release(ncores)
+            if monitor is not None:
+                monitor.end(task)
+            resultq.put(task)
+            q.task_done()
     return
 
 
-def run_in_parallel(q, resultq, job, maxthreads, loopover, instructdict, foldername=""):
+def job_crashed(task, error):
+    """mark task as failed after an unexpected exception in its job"""
+    task.success = False
+    print(
+        "ERROR: {} in {} failed unexpectedly: {}: {}".format(
+            task.jobtype,
+            last_folders(task.workdir, 2),
+            type(error).__name__,
+            error,
+        ),
+        file=sys.stderr,
+    )
+
+
+@traced("enso")
+def handle_result(task, instructdict, maxworkdirlen, input_object=None, onresult=None):
+    """everything that is done directly after a job is finished, in the main
+    thread while the other jobs are still running"""
+    print_status(task, instructdict, maxworkdirlen)
+    store_walltimes([task], input_object)
+    if onresult is not None:
+        onresult(task)
+    if input_object is not None:
+        input_object.append_journal(task.name)
+    sys.stdout.flush()
+
+
+def print_status(result, instructdict, maxworkdirlen):
+    """print the outcome of a finished job depending on its jobtype"""
+    if instructdict["jobtype"] == "prep":
+        if result.success:
+            print(
+                "Preparation in {:{digits}} was successful".format(
+                    last_folders(result.workdir, 2), digits=maxworkdirlen
+                )
+            )
+        else:
+            print(
+                "Preparation in {:{digits}} FAILED".format(
+                    last_folders(result.workdir, 2), digits=maxworkdirlen
+                )
+            )
+    elif instructdict["jobtype"] in ("xtbopt", "opt"):
+        if instructdict["full"]:
+            if result.energy is not None and result.success:
+                print(
+                    "Finished optimization for {:{digits}} after {:>3} cycles: {:.6f} ".format(
+                        last_folders(result.workdir, 2),
+                        str(result.cycles),
+                        result.energy,
+                        digits=maxworkdirlen,
+                    )
+                )
+            else:
+                print(
+                    "Optimization FAILED for {:{digits}} after {:>3} cycles: {} ".format(
+                        last_folders(result.workdir, 2),
+                        str(result.cycles),
+                        str(result.energy),
+                        digits=maxworkdirlen,
+                    )
+                )
+        else:  # crude optimization
+            if result.energy is not None and result.success:
+                print(
+                    "Finished crude optimization for {:{digits}} after {:>3} cycles: {:.6f} ".format(
+                        last_folders(result.workdir, 2),
+                        str(result.cycles),
+                        result.energy,
+                        digits=maxworkdirlen,
+                    )
+                )
+            else:
+                print(
+                    "Crude optimization FAILED for {:{digits}} after {:>3} cycles: {} ".format(
+                        last_folders(result.workdir, 2),
+                        str(result.cycles),
+                        str(result.energy),
+                        digits=maxworkdirlen,
+                    )
+                )
+    elif instructdict["jobtype"] == "sp":
+        if result.energy is not None:
+            print(
+                "Finished single-point calculation for {:{digits}}: {:.6f} ".format(
+                    last_folders(result.workdir, 2),
+                    result.energy,
+                    digits=maxworkdirlen,
+                )
+            )
+        else:
+            print(
+                "Single-point calculation FAILED for {:{digits}}: {} ".format(
+                    last_folders(result.workdir, 2),
+                    str(result.energy),
+                    digits=maxworkdirlen,
+                )
+            )
+    elif instructdict["jobtype"] in ("solv", "cosmotherm"):
+        if result.success and instructdict.get("conductoronly", False):
+            print(
+                "Finished conductor single-points for {:{digits}}".format(
+                    last_folders(result.workdir, 2), digits=maxworkdirlen
+                )
+            )
+        elif result.gsolv is not None:
+            print(
+                "Finished Gsolv for {:{digits}}: {:.6f}".format(
+                    last_folders(result.workdir, 2),
+                    result.gsolv,
+                    digits=maxworkdirlen,
+                )
+            )
+        else:
+            print(
+                "Gsolv FAILED for {:{digits}}: {}".format(
+                    last_folders(result.workdir, 2),
+                    str(result.gsolv),
+                    digits=maxworkdirlen,
+                )
+            )
+    elif instructdict["jobtype"] in ("rrhoxtb", "rrhoorca", "rrhotm"):
+        if result.rrho is not None:
+            print(
+                "Finished RRHO for {:{digits}}:  {:.6f} in sym: {}".format(
+                    last_folders(result.workdir, 2),
+                    result.rrho,
+                    result.symmetry,
+                    digits=maxworkdirlen,
+                )
+            )
+        else:
+            print(
+                "FAILED RRHO for {:{digits}}:  {}".format(
+                    last_folders(result.workdir, 2),
+                    str(result.rrho),
+                    digits=maxworkdirlen,
+                )
+            )
+    elif instructdict["jobtype"] == "nmrJ":
+        if result.success:
+            print(
+                "NMR-J calculation in {:{digits}} was successful.".format(
+                    last_folders(result.workdir, 2), digits=maxworkdirlen
+                )
+            )
+        else:
+            print(
+                " NMR-J calculation FAILED for {:{digits}}!".format(
+                    last_folders(result.workdir, 2), digits=maxworkdirlen
+                )
+            )
+    elif instructdict["jobtype"] == "nmrS":
+        if result.success:
+            print(
+                "NMR-S calculation in {:{digits}} was successful.".format(
+                    last_folders(result.workdir, 2), digits=maxworkdirlen
+                )
+            )
+        else:
+            print(
+                "NMR-S calculation FAILED for {:{digits}}!".format(
+                    last_folders(result.workdir, 2), digits=maxworkdirlen
+                )
+            )
+    elif instructdict["jobtype"] == "gbsa_gsolv":
+        if result.gsolv is not None:
+            print(
+                "Finished Gsolv-GBSA_Gsolv for {:{digits}}: {:.6f}".format(
+                    last_folders(result.workdir, 2),
+                    result.gsolv,
+                    digits=maxworkdirlen,
+                )
+            )
+        else:
+            print(
+                "Gsolv-GBSA_Gsolv FAILED for {:{digits}}: {}".format(
+                    last_folders(result.workdir, 2),
+                    str(result.gsolv),
+                    digits=maxworkdirlen,
+                )
+            )
+    elif instructdict["jobtype"] == "smd_gsolv":
+        if result.gsolv is not None:
+            print(
+                "Finished Gsolv-SMD_Gsolv for {:{digits}}: {:.6f}".format(
+                    last_folders(result.workdir, 2),
+                    result.gsolv,
+                    digits=maxworkdirlen,
+                )
+            )
+        else:
+            print(
+                "Gsolv-SMD_Gsolv FAILED for {:{digits}}: {}".format(
+                    last_folders(result.workdir, 2),
+                    str(result.gsolv),
+                    digits=maxworkdirlen,
+                )
+            )
+
+
+def run_in_parallel(q, resultq, job, maxthreads, loopover, instructdict, foldername="", input_object=None, onresult=None):
     """Run jobs in parallel
     q = queue to put assemble tasks
     resultq = queue to retrieve results
@@ -6497,7 +8181,11 @@ def run_in_parallel(q, resultq, job, maxthreads, loopover, instructdict, foldern
     loopover is list of qm_class objects
     instrucdict example : {'jobtype': 'prep', 'chrg': args.chrg}
     foldername is for existing objects to change the workdir
+    input_object = if given, wall times are read from and written to enso.json
+    onresult = function called with every finished job as soon as it is
+               finished, e.g. to update json_dict
     results = list of qm_class objects with results from calculations
+    The jobs are started in the order of decreasing estimated cost.
     """
 
     if instructdict.get("jobtype", None) is None:
@@ -6505,6 +8193,7 @@ def run_in_parallel(q, resultq, job, maxthreads, loopover, instructdict, foldern
 
     cwd = os.getcwd()
     tmp_len = []
+    tasks = []
     if all(isinstance(x, qm_job) for x in loopover):
         # for already existing qm_job objects
         for item in loopover:
@@ -6524,7 +8213,7 @@ def run_in_parallel(q, resultq, job, maxthreads, loopover, instructdict, foldern
                 # update instructions
                 setattr(item, instruction, instructdict[instruction])
             tmp_len.append(last_folders(item.workdir, 2))
-            q.put(item)
+            tasks.append(item)
     else:
         # for new creation of qm_job objects
         for item in loopover:
@@ -6536,6 +8225,14 @@ def run_in_parallel(q, resultq, job, maxthreads, loopover, instructdict, foldern
             for instruction in instructdict:
                 setattr(task, instruction, instructdict[instruction])
             tmp_len.append(last_folders(task.workdir, 2))
+            tasks.append(task)
+    # longest processing time first
+    with trace.span("queue fill", "enso"):
+        for task in longest_first(
+            tasks,
+            lambda x: [walltime_key(x.jobtype, x.workdir, x.full)],
+            input_object,
+        ):
             q.put(task)
     njobs = q.qsize()
     if instructdict.get("onlyread", False):
@@ -6568,210 +8265,338 @@ def run_in_parallel(q, resultq, job, maxthreads, loopover, instructdict, foldern
             print("\nStarting {} SMD-Gsolv calculations".format(njobs))
         elif instructdict["jobtype"] == "genericout":
             print("\nWriting generic output!")
-    time.sleep(0.5)
 
-    # start working in parallel
-    for i in range(int(maxthreads)):
-        worker = Thread(target=execute_data, args=(q, resultq))
-        worker.setDaemon(True)
-        worker.start()
-    q.join()
+    ### get formatting information:
+    try:
+        maxworkdirlen = max([len(i) for i in tmp_len])
+    except Exception as e:
+        print(e)
+        maxworkdirlen = 20
+    ### end formatting information
+
+    # start working in parallel
+    allocator = core_allocator(maxthreads, get_omp(instructdict))
+    stagestart = time.perf_counter()
+    monitor = None
+    if not instructdict.get("onlyread", False):
+        monitor = progress_monitor(njobs, instructdict["jobtype"], cwd)
+        monitor.run()
+    for i in range(int(maxthreads)):
+        worker = Thread(
+            target=execute_data,
+            args=(q, resultq, allocator, monitor),
+            name="worker-{}".format(i + 1),
+        )
+        worker.setDaemon(True)
+        worker.start()
+    # get results as soon as they are finished
+    results = []
+    try:
+        for i in range(njobs):
+            results.append(resultq.get())
+            handle_result(
+                results[-1], instructdict, maxworkdirlen, input_object, onresult
+            )
+        q.join()
+    except KeyboardInterrupt:
+        print("\nKilling all running calculations!")
+        kill_running_processes()
+        raise
+    finally:
+        if monitor is not None:
+            monitor.stop()
+    label = walltime_key(
+        instructdict["jobtype"], foldername, instructdict.get("full", True)
+    )
+    stageend = time.perf_counter()
+    trace.add(label, "stage", stagestart, stageend, {"jobs": njobs})
+    record_stage(
+        label,
+        results,
+        lambda x: [walltime_key(x.jobtype, x.workdir, x.full)],
+        stageend - stagestart,
+        allocator.maxthreads * allocator.omp,
+    )
+
+    if not instructdict.get("onlyread", False):
+        print("Tasks completed!\n")
+    else:
+        print("Reading data from in previous run completed!\n")
+
+    # sort results by name
+    results.sort(key=lambda x: int(x.name[4:]))  # (CONFX)
+    return results
+
+
+# keys of the instructdicts of a chain which are not set on the task
+chain_keys = ("step", "conformers", "newfolder", "jobclass", "copyfiles", "onresult")
+
+
+def chain_step(instructdict):
+    """name of a job in a chain, to tell e.g. two preparations apart"""
+    return instructdict.get("step", instructdict["jobtype"])
+
+
+def setup_folder(task, basedir, foldername):
+    """create CONFX/foldername for the next job of a chain and copy the coord
+    file of basedir (e.g. CONFX/func) to it, returns False if IO failed"""
+    tmp_to = os.path.join(os.path.dirname(basedir), foldername)
+    try:
+        mkdir_p(tmp_to)
+        shutil.copy(os.path.join(basedir, "coord"), os.path.join(tmp_to, "coord"))
+    except OSError:
+        if not os.path.isfile(os.path.join(basedir, "coord")):
+            print(
+                "ERROR: while copying the coord file from {}! "
+                "The corresponding file does not exist.".format(basedir)
+            )
+        else:
+            print("ERROR: Could not create folder {}!".format(tmp_to))
+        return False
+    task.workdir = tmp_to
+    return True
+
+
+def execute_chain(q, resultq, job, allocator=None, monitor=None):
+    """code that the worker has to execute for a chain of jobs, the next job
+    of a conformer is started as soon as its own previous job is finished.
+    Each finished job is handed to the main thread (resultq) and the worker
+    waits until it is handled, the end of the chain is marked by None."""
+    while True:
+        try:
+            task, instructlist = q.get_nowait()
+        except Empty:
+            break
+        if allocator is not None:
+            allocator.start_chain()
+        task.failedjob = None
+        basedir = task.workdir
+        try:
+            for instructdict in instructlist:
+                if task.name not in instructdict.get("conformers", (task.name,)):
+                    continue
+                ncores = None
+                if monitor is not None:
+                    monitor.begin(task)
+                try:
+                    task.__class__ = instructdict.get("jobclass", job)
+                    for instruction in instructdict:
+                        if instruction not in chain_keys:
+                            setattr(task, instruction, instructdict[instruction])
+                    start = time.time()
+                    task.timedout = False
+                    task.usage = {}
+                    if "newfolder" in instructdict:
+                        task.success = setup_folder(
+                            task, basedir, instructdict["newfolder"]
+                        )
+                    else:
+                        task.workdir = basedir
+                        task.success = True
+                    if task.success:
+                        if allocator is not None:
+                            ncores = allocator.acquire(q.qsize() + 1, task.maxcores())
+                            task.set_cores(ncores)
+                        with trace.span(
+                            "{} {}".format(task.jobtype, task.name),
+                            "job",
+                            stage=walltime_key(task.jobtype, task.workdir, task.full),
+                        ) as span:
+                            task.execute()
+                            span.args["success"] = task.success
+                    if task.timedout:
+                        # runaway job was killed
+                        task.success = False
+                    walltime = time.time() - start
+                    record_walltime(task, walltime)
+                    record_resources(task, walltime)
+                    if task.success:
+                        # files which are kept after the job, e.g. control_opt
+                        for source, target in instructdict.get("copyfiles", []):
+                            try:
+                                shutil.copy(
+                                    os.path.join(task.workdir, source),
+                                    os.path.join(task.workdir, target),
+                                )
+                            except FileNotFoundError:
+                                pass
+                except Exception as error:
+                    # the job is failed, the worker goes on with the next chain
+                    job_crashed(task, error)
+                finally:
+                    if ncores is not None:
+                        allocator.release(ncores)
+                if not task.success:
+                    # dependent jobs of this conformer are not started
+                    task.failedjob = chain_step(instructdict)
+                handled = Event()
+                resultq.put((task, instructdict, handled))
+                handled.wait()
+                if not task.success:
+                    break
+        finally:
+            if allocator is not None:
+                allocator.end_chain()
+            if monitor is not None:
+                monitor.end(task)
+            resultq.put((task, None, None))
+            q.task_done()
+    return
+
+
+def run_chain_in_parallel(q, resultq, job, maxthreads, loopover, instructlist, foldername="", input_object=None, onresult=None):
+    """Run a chain of dependent jobs for each conformer in parallel, there is
+    no barrier between the jobs of the chain, e.g. the optimization of a
+    conformer starts directly after its own preparation and its RRHO
+    calculation directly after the optimization.
+    q = queue to put assemble tasks
+    resultq = queue to retrieve results
+    job = information which kind of job is to be performed tm_job , orca_job
+    loopover is list of qm_class objects
+    instructlist = list of instrucdicts, executed one after another. Besides
+                   the instructions an instructdict can contain
+                   'step': name of the job in the chain (default jobtype),
+                   'conformers': names of the conformers which run the job,
+                   'newfolder': the job runs in CONFX/newfolder, coord is
+                                copied from CONFX/foldername,
+                   'jobclass': tm_job or orca_job if it differs from job,
+                   'copyfiles': [(from, to), ...] copied within the workdir
+                                after the job finished successfully,
+                   'onresult': function called with the task as soon as
+                               the job is finished (e.g. to update json_dict)
+    foldername is for existing objects to change the workdir
+    input_object = if given, wall times are read from and written to enso.json
+    onresult = function called with every finished chain
+    results = list of qm_class objects with results from calculations,
+              item.failedjob is the step at which the chain stopped
+    The chains are started in the order of decreasing estimated cost.
+    """
+    for instructdict in instructlist:
+        if instructdict.get("jobtype", None) is None:
+            raise KeyError("jobtype is missing in instructdict!")
+
+    # conformers which run none of the jobs are returned unchanged
+    idle = [
+        x for x in loopover
+        if not any([x.name in i.get("conformers", (x.name,)) for i in instructlist])
+    ]
+    loopover = [x for x in loopover if x not in idle]
+    if not loopover:
+        return sorted(idle, key=lambda x: int(x.name[4:]))
+
+    cwd = os.getcwd()
+    tmp_len = []
+    for item in loopover:
+        item.workdir = os.path.normpath(
+            os.path.join(cwd, os.path.join(item.name, foldername))
+        )
+        tmp_len.append(last_folders(item.workdir, 2))
+        for instructdict in instructlist:
+            if "newfolder" in instructdict:
+                tmp_len.append(
+                    last_folders(os.path.join(item.name, instructdict["newfolder"]), 2)
+                )
 
-    if not instructdict.get("onlyread", False):
-        print("Tasks completed!\n")
-    else:
-        print("Reading data from in previous run completed!\n")
+    def keys(x):
+        return [
+            walltime_key(
+                i["jobtype"], i.get("newfolder", foldername), i.get("full", True)
+            )
+            for i in instructlist
+            if x.name in i.get("conformers", (x.name,))
+        ]
+
+    # longest processing time first
+    with trace.span("queue fill", "enso"):
+        for item in longest_first(loopover, keys, input_object):
+            q.put((item, instructlist))
+    njobs = q.qsize()
+    print(
+        "\nStarting {} calculations ({}), each conformer proceeds as soon "
+        "as its previous step is finished.".format(
+            njobs, " -> ".join([chain_step(i) for i in instructlist])
+        )
+    )
 
-    # Get results
-    results = []
-    ### get formatting information:
     try:
         maxworkdirlen = max([len(i) for i in tmp_len])
     except Exception as e:
         print(e)
         maxworkdirlen = 20
-    ### end formatting information
-    while not resultq.empty():
-        results.append(resultq.get())
-        if instructdict["jobtype"] == "prep":
-            if results[-1].success:
-                print(
-                    "Preparation in {:{digits}} was successful".format(
-                        last_folders(results[-1].workdir, 2), digits=maxworkdirlen
-                    )
-                )
-            else:
-                print(
-                    "Preparation in {:{digits}} FAILED".format(
-                        last_folders(results[-1].workdir, 2), digits=maxworkdirlen
-                    )
-                )
-        elif instructdict["jobtype"] in ("xtbopt", "opt"):
-            if instructdict["full"]:
-                if results[-1].energy is not None and results[-1].success:
-                    print(
-                        "Finished optimization for {:{digits}} after {:>3} cycles: {:.6f} ".format(
-                            last_folders(results[-1].workdir, 2),
-                            str(results[-1].cycles),
-                            results[-1].energy,
-                            digits=maxworkdirlen,
-                        )
-                    )
-                else:
-                    print(
-                        "Optimization FAILED for {:{digits}} after {:>3} cycles: {} ".format(
-                            last_folders(results[-1].workdir, 2),
-                            str(results[-1].cycles),
-                            str(results[-1].energy),
-                            digits=maxworkdirlen,
-                        )
-                    )
-            else:  # crude optimization
-                if results[-1].energy is not None and results[-1].success:
-                    print(
-                        "Finished crude optimization for {:{digits}} after {:>3} cycles: {:.6f} ".format(
-                            last_folders(results[-1].workdir, 2),
-                            str(results[-1].cycles),
-                            results[-1].energy,
-                            digits=maxworkdirlen,
-                        )
-                    )
-                else:
-                    print(
-                        "Crude optimization FAILED for {:{digits}} after {:>3} cycles: {} ".format(
-                            last_folders(results[-1].workdir, 2),
-                            str(results[-1].cycles),
-                            str(results[-1].energy),
-                            digits=maxworkdirlen,
-                        )
-                    )
-        elif instructdict["jobtype"] == "sp":
-            if results[-1].energy is not None:
-                print(
-                    "Finished single-point calculation for {:{digits}}: {:.6f} ".format(
-                        last_folders(results[-1].workdir, 2),
-                        results[-1].energy,
-                        digits=maxworkdirlen,
-                    )
-                )
-            else:
-                print(
-                    "Single-point calculation FAILED for {:{digits}}: {} ".format(
-                        last_folders(results[-1].workdir, 2),
-                        str(results[-1].energy),
-                        digits=maxworkdirlen,
-                    )
-                )
-        elif instructdict["jobtype"] == "solv":
-            if results[-1].gsolv is not None:
-                print(
-                    "Finished Gsolv for {:{digits}}: {:.6f}".format(
-                        last_folders(results[-1].workdir, 2),
-                        results[-1].gsolv,
-                        digits=maxworkdirlen,
-                    )
-                )
-            else:
-                print(
-                    "Gsolv FAILED for {:{digits}}: {}".format(
-                        last_folders(results[-1].workdir, 2),
-                        str(results[-1].gsolv),
-                        digits=maxworkdirlen,
-                    )
-                )
-        elif instructdict["jobtype"] in ("rrhoxtb", "rrhoorca", "rrhotm"):
-            if results[-1].rrho is not None:
-                print(
-                    "Finished RRHO for {:{digits}}:  {:.6f} in sym: {}".format(
-                        last_folders(results[-1].workdir, 2),
-                        results[-1].rrho,
-                        results[-1].symmetry,
-                        digits=maxworkdirlen,
-                    )
-                )
-            else:
-                print(
-                    "FAILED RRHO for {:{digits}}:  {}".format(
-                        last_folders(results[-1].workdir, 2),
-                        str(results[-1].rrho),
-                        digits=maxworkdirlen,
-                    )
-                )
-        elif instructdict["jobtype"] == "nmrJ":
-            if results[-1].success:
-                print(
-                    "NMR-J calculation in {:{digits}} was successful.".format(
-                        last_folders(results[-1].workdir, 2), digits=maxworkdirlen
-                    )
-                )
-            else:
-                print(
-                    " NMR-J calculation FAILED for {:{digits}}!".format(
-                        last_folders(results[-1].workdir, 2), digits=maxworkdirlen
-                    )
-                )
-        elif instructdict["jobtype"] == "nmrS":
-            if results[-1].success:
-                print(
-                    "NMR-S calculation in {:{digits}} was successful.".format(
-                        last_folders(results[-1].workdir, 2), digits=maxworkdirlen
-                    )
-                )
-            else:
-                print(
-                    "NMR-S calculation FAILED for {:{digits}}!".format(
-                        last_folders(results[-1].workdir, 2), digits=maxworkdirlen
-                    )
-                )
-        elif instructdict["jobtype"] == "gbsa_gsolv":
-            if results[-1].gsolv is not None:
-                print(
-                    "Finished Gsolv-GBSA_Gsolv for {:{digits}}: {:.6f}".format(
-                        last_folders(results[-1].workdir, 2),
-                        results[-1].gsolv,
-                        digits=maxworkdirlen,
-                    )
-                )
-            else:
-                print(
-                    "Gsolv-GBSA_Gsolv FAILED for {:{digits}}: {}".format(
-                        last_folders(results[-1].workdir, 2),
-                        str(results[-1].gsolv),
-                        digits=maxworkdirlen,
-                    )
-                )
-        elif instructdict["jobtype"] == "smd_gsolv":
-            if results[-1].gsolv is not None:
-                print(
-                    "Finished Gsolv-SMD_Gsolv for {:{digits}}: {:.6f}".format(
-                        last_folders(results[-1].workdir, 2),
-                        results[-1].gsolv,
-                        digits=maxworkdirlen,
-                    )
-                )
-            else:
-                print(
-                    "Gsolv-SMD_Gsolv FAILED for {:{digits}}: {}".format(
-                        last_folders(results[-1].workdir, 2),
-                        str(results[-1].gsolv),
-                        digits=maxworkdirlen,
-                    )
-                )
-        time.sleep(0.01)  # sleep is important don't remove it!!!
 
+    # start working in parallel
+    allocator = core_allocator(
+        maxthreads, max([get_omp(i) for i in instructlist])
+    )
+    monitor = progress_monitor(
+        njobs, " -> ".join([chain_step(i) for i in instructlist]), cwd
+    )
+    monitor.run()
+    stagestart = time.perf_counter()
+    for i in range(int(maxthreads)):
+        worker = Thread(
+            target=execute_chain,
+            args=(q, resultq, job, allocator, monitor),
+            name="worker-{}".format(i + 1),
+        )
+        worker.setDaemon(True)
+        worker.start()
+    # get the result of every job as soon as it is finished
+    results = []
+    try:
+        while len(results) < njobs:
+            task, instructdict, handled = resultq.get()
+            if instructdict is None:
+                # end of the chain of this conformer
+                results.append(task)
+                if onresult is not None:
+                    onresult(task)
+                continue
+            try:
+                handle_result(
+                    task, instructdict, maxworkdirlen, input_object,
+                    instructdict.get("onresult", None),
+                )
+            finally:
+                handled.set()
+        q.join()
+    except KeyboardInterrupt:
+        print("\nKilling all running calculations!")
+        kill_running_processes()
+        raise
+    finally:
+        monitor.stop()
+    label = " -> ".join(
+        walltime_key(
+            i["jobtype"], i.get("newfolder", foldername), i.get("full", True)
+        )
+        for i in instructlist
+    )
+    stageend = time.perf_counter()
+    trace.add(label, "stage", stagestart, stageend, {"jobs": njobs})
+    record_stage(
+        label, results, keys, stageend - stagestart, allocator.maxthreads * allocator.omp
+    )
+    print("Tasks completed!\n")
+
+    results.extend(idle)
     # sort results by name
     results.sort(key=lambda x: int(x.name[4:]))  # (CONFX)
     return results
 
 
-def check_tasks(results, args, thresh=0.25):
-    """ Check if too many tasks failed and exit if so!"""
+def check_tasks(results, args, thresh=0.25, failedjob=None):
+    """ Check if too many tasks failed and exit if so!
+    failedjob = only count the tasks of a chain which failed in this jobtype"""
     # Check if preparation failed too often:
     counter = 0
     exit_log = False
     fail_rate = None
     for item in results:
-        if not item.success:
+        if failedjob is not None:
+            if not item.success and item.failedjob == failedjob:
+                counter += 1
+        elif not item.success:
             counter += 1
     fail_rate = float(counter) / float(len(results)) * 100
     if float(counter) / float(len(results)) >= thresh and args.check:
@@ -6789,6 +8614,8 @@ class handle_input:
     # end updated in init
     conformersxyz = "crest_conformers.xyz"
     jsonfile = ""
+    journalfile = ""
+    journal_records = 0
     firstrun = False
     digilen = 60
     namelength = 7
@@ -6850,6 +8677,8 @@ class handle_input:
         "prog_rrho",
         "gfn_version",
         "temperature",
+        "imagthr",
+        "sthr",
         "prog3",
         "prog4",
         "part1",
@@ -6899,6 +8728,8 @@ class handle_input:
         "prog_rrho": "rrhoprog",
         "gfn_version": "gfnv",
         "temperature": "temperature",
+        "imagthr": "imagthr",
+        "sthr": "sthr",
         "prog3": "prog3",
         "prog4": "prog4",
         "part1": "part1",
@@ -6949,6 +8780,8 @@ class handle_input:
         ("prog_rrho", "xtb"),
         ("gfn_version", "gfn2"),
         ("temperature", "298.15"),
+        ("imagthr", "-50.0"),
+        ("sthr", "50.0"),
         ("prog3", "prog"),
         ("prog4", "prog"),
         ("part1", "on"),
@@ -7078,6 +8911,8 @@ class handle_input:
             "prog_rrho": ["xtb", "prog", "off"],
             "gfn_version": self.impgfnv,
             "temperature": ["temperature in K e.g. 298.15",],
+            "imagthr": ["threshold for imaginary modes in cm-1 e.g. -50.0",],
+            "sthr": ["rotor cutoff in cm-1 e.g. 50.0",],
             "boltzmann": ["on", "off"],
             "backup": ["on", "off"],
             "func": self.impfunc,
@@ -7113,8 +8948,10 @@ class handle_input:
         }
 
     def read_json(self, jsonfile, args):
-        """Reading from jsonfile"""
+        """Reading from jsonfile, results from the journal of a previous run
+        which ended before they were written to jsonfile are applied"""
         self.jsonfile = jsonfile
+        self.journalfile = os.path.basename(jsonfile) + ".journal"
 
         json_defaults = OrderedDict([
             ("crude_opt", "not_calculated"),
@@ -7227,7 +9064,6 @@ class handle_input:
         flags_unchangable = [
             "unpaired",
             "chrg",
-            "solv",
             "prog",
             "ancopt",
             "func",
@@ -7248,20 +9084,39 @@ class handle_input:
             "gsolv2",
             "sm3",
             "sm4",
+            "solv",
         ]
 
         # all other flags of previous run are not affecting restart (e.g. OMP)
-        if os.path.isfile(os.path.join(self.cwd, jsonfile)):
-            print("Reading file: {}\n".format(os.path.basename(jsonfile)))
+        source = os.path.join(self.cwd, jsonfile)
+        if (
+            not os.path.isfile(source)
+            and os.path.isfile(self.journalfile)
+            and os.path.isfile(source + ".1")
+        ):
+            # crash after jsonfile was backed up and before it was written
+            # again, the journal belongs to the backup
+            print(
+                "WARNING: {} is missing, the results of the previous run are "
+                "recovered from {} and {}.".format(
+                    os.path.basename(jsonfile),
+                    os.path.basename(source + ".1"),
+                    self.journalfile,
+                )
+            )
+            source = source + ".1"
+        if os.path.isfile(source):
+            print("Reading file: {}\n".format(os.path.basename(source)))
             self.firstrun = False
             try:
                 with open(
-                    os.path.join(self.cwd, jsonfile), "r", encoding=coding, newline=None
+                    source, "r", encoding=coding, newline=None
                 ) as inp:
                     json_dict = json.load(inp, object_pairs_hook=OrderedDict)
             except Exception as error:
                 print("Your Jsonfile (enso.json) is corrupted!\n{}".format(error))
                 sys.exit(1)
+            self._replay_journal(json_dict)
 
             # if do printout only read with exactly the same flags
             if args.doprintout:
@@ -7290,11 +9145,38 @@ class handle_input:
                           "ERROR: flag {} was changed from {} to {}!".format(
                             i, json_dict["flags"][i], flags_dict[i]))
                     print("       All flags which are concerned with geometry "
-                          "optimization (func, prog, ancopt, sm, solv, chrg, "
+                          "optimization (func, prog, ancopt, sm, chrg, "
                           "unpaired) are not allowed to be changed!")
                     print("If you want to change these settings, "
                           "start from scratch in a new folder!")
                     error_logical = True
+            # solv may only be changed if the optimized geometries stay
+            # consistent: all optimizations are done in the same solvent and
+            # none of them are needed in the gas phase or in solution instead
+            if "solv" in json_dict["flags"] and json_dict["flags"]["solv"] != flags_dict["solv"]:
+                optimized = False
+                pending = False
+                for item in json_dict.keys():
+                    if "CONF" not in item or not isinstance(json_dict[item], dict):
+                        continue
+                    if "calculated" in (json_dict[item].get("crude_opt"), json_dict[item].get("opt")):
+                        optimized = True
+                    if (json_dict[item].get("consider_for_part2", True)
+                            and not json_dict[item].get("removed_by_user", False)
+                            and json_dict[item].get("opt", "not_calculated") == "not_calculated"):
+                        pending = True
+                if optimized and (pending
+                        or json_dict["flags"]["solv"] in ('gas', None)
+                        or flags_dict["solv"] in ('gas', None)):
+                    print(
+                          "ERROR: flag {} was changed from {} to {}!".format(
+                            "solv", json_dict["flags"]["solv"], flags_dict["solv"]))
+                    print("       The solvent can only be changed after all "
+                          "geometry optimizations are finished and only from "
+                          "one solvent to another!")
+                    print("If you want to change these settings, "
+                          "start from scratch in a new folder!")
+                    error_logical = True
             if error_logical:
                 print(
                     "One or multiple flags from the previous run were changed "
@@ -7372,6 +9254,13 @@ class handle_input:
                                 "{} is not recognized!".format('symmetry', item, os.path.basename(jsonfile))
                             )
                         error_logical = True
+                    if "walltime" in json_dict[item] and not isinstance(json_dict[item]["walltime"], dict):
+                        # only used to order the jobs, not necessary for restart
+                        print(
+                            "WARNING: Information about {} for {} in the file "
+                            "{} is not recognized and is reset!".format('walltime', item, os.path.basename(jsonfile))
+                        )
+                        json_dict[item]["walltime"] = OrderedDict()
             if error_logical:
                 print(
                     "One or multiple errors were found in the file {}.\nGoing to "
@@ -7434,6 +9323,62 @@ class handle_input:
                         json_dict[i]["energy_rrho_orca"] = json_defaults["energy_rrho_orca"]
                         json_dict[i]["energy_rrho_tm"] = json_defaults["energy_rrho_tm"]
             #-------------------------------------------------------------------
+            # change of solv --> everything except the optimized geometries and
+            # the gas phase single-points, the COSMO-RS conductor calculations
+            # are reused (COSMO/conductor.json)
+            if json_dict["flags"]["solv"] != flags_dict["solv"]:
+                print(
+                    "WARNING: The solvent has been changed with respect to the "
+                    "previous run. (solv {} --> {})\n         The optimized "
+                    "geometries are kept, all solvation contributions, GRRHO and "
+                    "the property calculations are reset for all "
+                    "conformers!".format(json_dict["flags"]["solv"], flags_dict["solv"])
+                )
+                solvkeys = [
+                    "sp_part2_solv",
+                    "sp_part3_solv",
+                    "cosmo-rs",
+                    "gbsa_gsolv",
+                    "smd_gsolv",
+                    "rrho",
+                    "rrho_xtb",
+                    "rrho_tm",
+                    "rrho_orca",
+                ]
+                for i in json_dict.keys():
+                    if "CONF" in i:
+                        for key in solvkeys:
+                            json_dict[i][key] = json_defaults[key]
+                            json_dict[i]["energy_" + key] = json_defaults["energy_" + key]
+                        if flags_dict["sm3"] in self.smgsolv2:
+                            json_dict[i]["energy_sp_part3"] = json_dict[i]["energy_sp_part3_gas"]
+                            json_dict[i]["sp_part3"] = json_dict[i]["sp_part3_gas"]
+                        else:
+                            json_dict[i]["energy_sp_part3"] = json_defaults["energy_sp_part3"]
+                            json_dict[i]["sp_part3"] = json_defaults["sp_part3"]
+                        for j in j_list + s_list:
+                            json_dict[i][j] = json_defaults[j] # not_calculated
+            #-------------------------------------------------------------------
+            # change of imagthr or sthr --> GRRHO with xTB is evaluated again
+            # from the cached hessians (rrho_cache.json)
+            if (json_dict["flags"].get("imagthr", -50.0) != flags_dict["imagthr"]
+                    or json_dict["flags"].get("sthr", 50.0) != flags_dict["sthr"]):
+                print(
+                    "WARNING: The thresholds for GRRHO have been changed with respect "
+                    "to the previous run. (imagthr {} --> {}, sthr {} --> {})\n"
+                    "         GRRHO with xTB is reset to not calculated for all "
+                    "conformers.".format(
+                        json_dict["flags"].get("imagthr", -50.0), flags_dict["imagthr"],
+                        json_dict["flags"].get("sthr", 50.0), flags_dict["sthr"])
+                )
+                for i in json_dict.keys():
+                    if "CONF" in i:
+                        json_dict[i]["rrho_xtb"] = json_defaults["rrho_xtb"]
+                        json_dict[i]["energy_rrho_xtb"] = json_defaults["energy_rrho_xtb"]
+                        if flags_dict["rrhoprog"] == "xtb":
+                            json_dict[i]["rrho"] = json_defaults["rrho"]
+                            json_dict[i]["energy_rrho"] = json_defaults["energy_rrho"]
+            #-------------------------------------------------------------------
             # smgsolv2 
             if json_dict["flags"]["solv"] in ('gas', None):
                 pass 
@@ -7625,10 +9570,79 @@ class handle_input:
                 conf = "".join("CONF" + str(i))
                 tmp.append((conf, OrderedDict(conf_data.copy())))
             json_dict = OrderedDict(tmp)
+            self._replay_journal(json_dict)
         json_dict["flags"] = OrderedDict(vars(args))
         self.json_dict = json_dict
+        if not args.doprintout:
+            # jsonfile is written at once (it was just backed up), so it
+            # exists whenever the journal does. The journal is not needed
+            # any more, an incomplete last record is removed with it.
+            self.compact_journal()
         return
 
+    def _replay_journal(self, json_dict):
+        """apply the records of the journal to json_dict and return the
+        number of applied records"""
+        if not os.path.isfile(self.journalfile):
+            return 0
+        replayed = 0
+        with open(self.journalfile, "r", encoding=coding, newline=None) as inp:
+            for line in inp:
+                try:
+                    record = json.loads(line, object_pairs_hook=OrderedDict)
+                    conf = record["conf"]
+                    data = record["data"]
+                except (ValueError, KeyError, TypeError):
+                    # incomplete record from a crash while it was written
+                    continue
+                if conf in json_dict and isinstance(data, dict):
+                    json_dict[conf].update(data)
+                    replayed += 1
+        if replayed:
+            print(
+                "Applied {} results from {} which were not yet written to "
+                "{}.\n".format(
+                    replayed, self.journalfile, os.path.basename(self.jsonfile)
+                )
+            )
+        return replayed
+
+    @traced("json")
+    def append_journal(self, conf):
+        """append the current data of conformer conf to the journal, the
+        record is on disk when this function returns"""
+        if not self.journalfile or conf not in self.json_dict:
+            return
+        with open(self.journalfile, "a", encoding=coding, newline=None) as out:
+            out.write(json.dumps({"conf": conf, "data": self.json_dict[conf]}) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+        self.journal_records += 1
+        # the journal is not allowed to grow larger than jsonfile, this
+        # keeps the cost of compaction constant per record
+        if self.journal_records >= len(self.json_dict):
+            self.compact_journal()
+
+    @traced("json")
+    def _dump_json(self, outfile):
+        """write json_dict to outfile, outfile is replaced atomically"""
+        tmpfile = outfile + ".tmp"
+        with open(tmpfile, "w", encoding=coding, newline=None) as out:
+            json.dump(self.json_dict, out, indent=4, sort_keys=False)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmpfile, outfile)
+        fsync_dir(os.path.dirname(os.path.abspath(outfile)))
+
+    def compact_journal(self):
+        """write json_dict to jsonfile and start a new journal"""
+        self._dump_json(os.path.basename(self.jsonfile))
+        if os.path.isfile(self.journalfile):
+            os.remove(self.journalfile)
+            # an old journal must not be replayed onto the new jsonfile
+            fsync_dir(os.path.dirname(os.path.abspath(self.journalfile)))
+        self.journal_records = 0
+
 
     def write_json(self, instruction):
         """Writing jsonfile"""
@@ -7637,11 +9651,12 @@ class handle_input:
         else:
             outfile = os.path.basename(self.jsonfile)
         print("Results are written to {}.".format(os.path.basename(outfile)))
-        with open(outfile, "w") as out:
-            json.dump(self.json_dict, out, indent=4, sort_keys=False)
         if instruction == "save_and_exit":
+            # the journal is kept, it is applied to jsonfile on restart
+            self._dump_json(outfile)
             print("\nGoing to exit.")
             sys.exit(1)
+        self.compact_journal()
 
     def _decomment(self, csvfile):
         """ remove any comments from file before parsing with csv.DictReader"""
@@ -7838,7 +9853,6 @@ class handle_input:
                     )
         except:
             pass
-        time.sleep(0.1)
         return
 
     def check_logic(self, args, error_logical, silent):
@@ -8227,6 +10241,8 @@ class handle_input:
                     "charge",
                     "unpaired",
                     "temperature",
+                    "imagthr",
+                    "sthr",
                     "resonance frequency",
                     "maxthreads",
                     "omp",
@@ -8237,6 +10253,8 @@ class handle_input:
                             "charge": 'int',
                             "unpaired": 'int',
                             "temperature": 'float',
+                            "imagthr": 'float',
+                            "sthr": 'float',
                             "resonance frequency": 'float',
                             "maxthreads": "int",
                             "omp": "int",
@@ -8347,10 +10365,6 @@ class handle_input:
             print("    Using {}\n    as path to the COSMO-RS DATABASE.".format(self.dbpath))
 
         # Check if paths of needed programs exist:
-        # always need CREST:
-        if self.crestpath is None or shutil.which(self.crestpath) is None:
-            print("\nERROR: path for CREST is not correct!")
-            error_logical = True
         # xTB
         if needxtb:
             if self.xtbpath is None or shutil.which(self.xtbpath) is None:
@@ -8474,7 +10488,14 @@ class handle_input:
         parameterlist.append(['prog_rrho', "program for RRHO in part2 and part3", args.rrhoprog])
         if args.rrhoprog == 'xtb' or args.gsolv2 == 'gbsa_gsolv':
             parameterlist.append(["gfn_version", "GFN version for RRHO and/or GBSA_Gsolv in part2 and 3",args.gfnv])
+        if args.rrhoprog == 'xtb':
+            parameterlist.append(["imagthr", "threshold for imaginary modes in RRHO", args.imagthr])
+            parameterlist.append(["sthr", "rotor cutoff in RRHO", args.sthr])
         parameterlist.append(["temperature", "temperature", args.temperature])
+        if args.temperaturescan:
+            parameterlist.append(["justprint", "temperature scan: {:{digits}} {} - {} K ({} temperatures)".format(
+                "", args.temperaturescan[0], args.temperaturescan[-1], len(args.temperaturescan),
+                digits=self.digilen-len("temperature scan"))])
         parameterlist.append(["part1", "part1", args.part1])
         parameterlist.append(["part2", "part2", args.part2])
         parameterlist.append(["part3", "part3", args.part3])
@@ -8579,20 +10600,37 @@ def new_folders(conflist, functional, save_errors):
     return directories
 
 
-def rrho_part23(
-    args,
-    q,
-    resultq,
-    job,
-    in_part2,
-    in_part3,
-    results,
-    input_object,
-    save_errors,
-    cwd,
-    environsettings
-):
-    """calculate RRHO for part2 or part3"""
+def remove_failed(args, results, failedjob, names, what, input_object, save_errors, removelist=None):
+    """remove the conformers whose chain of jobs stopped at failedjob from
+    results and exit if too many of the conformers names failed in it"""
+    tasks = [i for i in results if i.name in names]
+    if not tasks:
+        return results
+    exit_log, fail_rate = check_tasks(tasks, args, failedjob=failedjob)
+    for i in list(results):
+        if not i.success and i.failedjob == failedjob:
+            print(
+                "\nERROR: A problem has occurred in the {} of {}! The conformer "
+                "is removed.\n".format(what, i.name)
+            )
+            save_errors.append(
+                "Conformer {} was removed, because the {} failed!".format(i.name, what)
+            )
+            results.remove(i)
+            geometries.discard(i.name)
+            if removelist is not None:
+                removelist.append(i.name)
+    if exit_log:
+        print("\nERROR: too many {}s failed ({:.2f} %)!".format(what, fail_rate))
+        input_object.write_json("save_and_exit")
+    return results
+
+
+def rrho_step(args, job, in_part2, in_part3, results, input_object, environsettings):
+    """RRHO for part2 or part3 as job of the chain of each conformer, the
+    conformers calculated before get their RRHO contribution from enso.json.
+    Returns results without the conformers which failed in the previous run
+    and the instructdict (None if all conformers were calculated before)."""
     print("\nRRHO calculation:")
     if args.solv not in (None, 'gas') and args.rrhoprog in ("orca", "tm"):
         print(
@@ -8601,13 +10639,14 @@ def rrho_part23(
         "\nRRHO is calculated in the gas phase.\n".format(str(args.rrhoprog).upper())
     )
     tmp_results = []
+    calculate = []
     for conf in list(results):
         if input_object.json_dict[conf.name]["rrho"] == "calculated":
             # this conformer was already calculated successfully,
-            # append rrho energy and move it to tmp_results
+            # append rrho energy
             conf.rrho = input_object.json_dict[conf.name]["energy_rrho"]
             conf.symmetry = input_object.json_dict[conf.name]["symmetry"]
-            tmp_results.append(results.pop(results.index(conf)))
+            tmp_results.append(conf)
         elif input_object.json_dict[conf.name]["rrho"] == "failed":
             # this conformer was already calculated,
             # but the calculation failed, remove it
@@ -8618,16 +10657,16 @@ def rrho_part23(
             results.remove(conf)
         elif input_object.json_dict[conf.name]["rrho"] == "not_calculated":
             # this conformer has to be calculated now
-            pass
+            calculate.append(conf)
     # check if there is at least one conformer
-    if not tmp_results and not results:
+    if not results:
         print("ERROR: There are no conformers left!")
         input_object.write_json("save_and_exit")
 
     print(
         "number of further considered conformers: {:{digits}} {}".format(
             "",
-            str(len(results) + len(tmp_results)),
+            str(len(results)),
             digits=input_object.digilen - len("number of further considered conformers"),
         )
     )
@@ -8638,256 +10677,500 @@ def rrho_part23(
             )
         )
         print_block([i.name for i in tmp_results])
-        if len(results) > 0:
+        if len(calculate) > 0:
             print(
                 "The RRHO calculation is carried out now for {} conformers:".format(
-                    str(len(results))
+                    str(len(calculate))
                 )
             )
-            print_block([i.name for i in results])
+            print_block([i.name for i in calculate])
         else:
             print("No conformers are considered additionally.")
     else:
         print("Considered conformers:")
-        print_block([i.name for i in results])
-
-    # calculate RRHO for all conformers that remain in list results
-    if results:
-        if args.rrhoprog == "xtb":
-            # set omp num threads for GFN-xTB calculation
-            # os.environ["OMP_NUM_THREADS"] = "{:d}".format(args.omp)
-            environsettings["OMP_NUM_THREADS"] = "{:d}".format(args.omp)
-        # create new folder and copy optimized coord file in CONFx/rrho
-        print("Setting up new directories.")
-        for conf in list(results):
-            tmp_from = os.path.join(cwd, conf.name, args.func)
-            tmp_to = os.path.join(cwd, conf.name, "rrho")
-            if not os.path.isdir(tmp_to):
-                mkdir_p(tmp_to)
-            try:
-                shutil.copy(
-                    os.path.join(tmp_from, "coord"), os.path.join(tmp_to, "coord")
-                )
-            except FileNotFoundError:
-                if not os.path.isfile(os.path.join(tmp_from, "coord")):
-                    print(
-                        "ERROR: while copying the coord file from {}! "
-                        "The corresponding file does not exist.".format(tmp_from)
+        print_block([i.name for i in calculate])
+    for item in tmp_results:
+        print(
+            "RRHO of {:{digits}}: {:.7f} in sym: {}".format(
+                item.name, float(item.rrho), item.symmetry,
+                digits=int(input_object.namelength)
+            )
+        )
+    if not calculate:
+        return results, None
+
+    if args.rrhoprog == "xtb":
+        # set omp num threads for GFN-xTB calculation
+        environsettings["OMP_NUM_THREADS"] = "{:d}".format(args.omp)
+
+    instructrrho = {
+        "jobtype": "rrhoxtb",
+        "chrg": args.chrg,
+        "unpaired": args.unpaired,
+        "func": args.func,
+        "solv": args.solv,
+        "temperature": args.temperature,
+        "environ": environsettings,
+        "progsettings": {"omp": args.omp, "tempprogpath": ""},
+    }
+    if args.rrhoprog == "xtb":
+        instructrrho["jobtype"] = "rrhoxtb"
+        instructrrho["func"] = "GFN-xTB"
+        instructrrho["gfnv"] = args.gfnv
+        instructrrho["progsettings"]["tempprogpath"] = ""
+        instructrrho["progsettings"]["xtbpath"] = input_object.xtbpath
+    elif args.rrhoprog == "orca":
+        instructrrho["jobtype"] = "rrhoorca"
+        instructrrho["func"] = args.func
+        instructrrho["progsettings"]["tempprogpath"] = input_object.orcapath
+        instructrrho["guess"] = [args.func]
+    elif args.rrhoprog == "tm":
+        instructrrho["jobtype"] = "rrhotm"
+        instructrrho["func"] = args.func
+        instructrrho["progsettings"]["tempprogpath"] = ""
+        instructrrho["guess"] = [args.func]
+
+    def rrhodone(conf):
+        """write the RRHO contribution to json_dict as soon as it is done"""
+        if conf.success:
+            status, energy = "calculated", conf.rrho
+        else:
+            status, energy = "failed", None
+        input_object.json_dict[conf.name]["rrho"] = status
+        input_object.json_dict[conf.name]["energy_rrho"] = energy
+        if args.rrhoprog == 'xtb':
+            input_object.json_dict[conf.name]["rrho_xtb"] = status
+            input_object.json_dict[conf.name]["energy_rrho_xtb"] = energy
+        elif args.rrhoprog == 'tm':
+            input_object.json_dict[conf.name]["rrho_tm"] = status
+            input_object.json_dict[conf.name]["energy_rrho_tm"] = energy
+        elif args.rrhoprog == 'orca':
+            input_object.json_dict[conf.name]["rrho_orca"] = status
+            input_object.json_dict[conf.name]["energy_rrho_orca"] = energy
+        if conf.success:
+            input_object.json_dict[conf.name]["symmetry"] = conf.symmetry
+        elif in_part2:
+            input_object.json_dict[conf.name]["consider_for_part3"] = False
+            input_object.json_dict[conf.name]["backup_part3"] = False
+        elif in_part3:
+            input_object.json_dict[conf.name]["consider_for_part4"] = False
+
+    instructrrho["step"] = "rrho"
+    instructrrho["conformers"] = set([i.name for i in calculate])
+    instructrrho["newfolder"] = "rrho"
+    instructrrho["jobclass"] = job
+    instructrrho["onresult"] = rrhodone
+    return results, instructrrho
+
+
+def rrho_check(args, results, instructrrho, input_object, save_errors, cwd):
+    """sort out the conformers with failed RRHO calculations of the chain and
+    compare the GFNn-xTB and DFT structures"""
+    if instructrrho is None:
+        return results
+    names = instructrrho["conformers"]
+    results = remove_failed(
+        args, results, "rrho", names, "RRHO calculation", input_object, save_errors
+    )
+    calculated = [i for i in results if i.name in names]
+    if calculated and args.rrhoprog == "xtb":
+        # check rmsd between GFNn-xTB optimized geometry and DFT structure
+        rmsd = []
+        dft = []
+        xtb = []
+        for item in calculated:
+            if item.rrho is not None:
+                workdir = str(os.path.join(cwd, os.path.join(item.name, "rrho")))
+                try:
+                    dft.append(geometries.coordinates(
+                        geometries.read_coord(os.path.join(workdir, "coord"))
+                    ))
+                    xtb.append(geometries.coordinates(
+                        geometries.read_coord(os.path.join(workdir, "xtbopt.coord"))
+                    ))
+                    rmsd.append([item.name, None])
+                except (OSError, ValueError, IndexError):
+                    del dft[len(xtb):]
+                    rmsd.append([item.name, "failed"])
+        # all conformers at once
+        values = iter(rmsd_batch(dft, xtb))
+        for item in rmsd:
+            if item[1] is None:
+                item[1] = next(values)
+        for item in list(rmsd):
+            if not isinstance(item[1], float):
+                rmsd.remove(item)
+                print("ERROR: could not calculate RMSD in {}".format(item[0]))
+            elif item[1] < 0.4:
+                rmsd.remove(item)
+        if len(rmsd) >= 1:
+            print(
+                "\nWARNING: The RMSD between the DFT and the {}-xTB structure "
+                "used for the RRHO\n contribution is larger than 0.4 Angstrom for "
+                "the following conformers:".format(str(args.gfnv).upper())
+            )
+            print("#CONF    RMSD\n")
+            for line in rmsd:
+                if line[1] > 0.4:
+                    print("{:8} {:.3f}\n".format(line[0], line[1]))
+                    save_errors.append(
+                        "WARNING: Large RMSD between DFT and "
+                        "GFNn-xTB geometry for {}.".format(line[0])
                     )
-                elif not os.path.isdir(tmp_to):
-                    print("ERROR: Could not create folder {}!".format(tmp_to))
-                print("ERROR: Removing conformer {}!".format(conf.name))
-                input_object.json_dict[conf.name]["rrho"] = "failed"
-                input_object.json_dict[conf.name]["energy_rrho"] = None
-                if args.rrhoprog == 'xtb':
-                    input_object.json_dict[conf.name]["rrho_xtb"] = "failed"
-                    input_object.json_dict[conf.name]["energy_rrho_xtb"] = None
-                elif args.rrhoprog == 'tm':
-                    input_object.json_dict[conf.name]["rrho_tm"] = "failed"
-                    input_object.json_dict[conf.name]["energy_rrho_tm"] = None
-                elif args.rrhoprog == 'orca':
-                    input_object.json_dict[conf.name]["rrho_orca"] = "failed"
-                    input_object.json_dict[conf.name]["energy_rrho_orca"] = None
-                if in_part2:
-                    input_object.json_dict[conf.name]["consider_for_part3"] = False
-                    input_object.json_dict[conf.name]["backup_part3"] = False
-                elif in_part3:
-                    input_object.json_dict[conf.name]["consider_for_part4"] = False
-                save_errors.append(
-                    "Conformer {} was removed, because IO failed!".format(conf.name)
-                )
-                results.remove(conf)
-        print("Constructed all new folders.")
+    # check if at least one conformer is left
+    if not results:
+        print("ERROR: No conformers left!")
+        input_object.write_json("save_and_exit")
+    return results
 
-        # check if at least one conformer is left
-        if not results:
-            print("ERROR: No conformers left!")
-            input_object.write_json("save_and_exit")
 
-        instructrrho = {
-            "jobtype": "rrhoxtb",
-            "chrg": args.chrg,
-            "unpaired": args.unpaired,
-            "func": args.func,
-            "solv": args.solv,
-            "temperature": args.temperature,
-            "environ": environsettings,
-            "progsettings": {"omp": args.omp, "tempprogpath": ""},
-        }
-        if args.rrhoprog == "xtb":
-            instructrrho["jobtype"] = "rrhoxtb"
-            instructrrho["func"] = "GFN-xTB"
-            instructrrho["gfnv"] = args.gfnv
-            instructrrho["progsettings"]["tempprogpath"] = ""
-            instructrrho["progsettings"]["xtbpath"] = input_object.xtbpath
-        elif args.rrhoprog == "orca":
-            instructrrho["jobtype"] = "rrhoorca"
-            instructrrho["func"] = args.func
-            instructrrho["progsettings"]["tempprogpath"] = input_object.orcapath
-        elif args.rrhoprog == "tm":
-            instructrrho["jobtype"] = "rrhotm"
-            instructrrho["func"] = args.func
-            instructrrho["progsettings"]["tempprogpath"] = ""
+class solvation_fit():
+    """Least-squares polynomials of Gsolv(T) and Gsolv(T)/T (python version
+    of the fit in cosmothermrd) for any number of conformers at once, all
+    curves share the temperatures. The fit is done by QR decomposition of
+    the Vandermonde matrix in the scaled temperature (T - t0) / ts, which
+    is well conditioned in contrast to the normal equations in powers of T.
+    T in K, Gsolv in kcal/mol; the methods return one value per conformer
+    (numpy arrays if numpy is available)."""
+
+    R = 1.987203585e-03  # kcal/(mol*K)
+    videal = 24.789561955 / 298.15  # molar volume for ideal gas at 298.15 K 100.0 kPa
+
+    def __init__(self, T, gsolv, degree=4):
+        self.T = [float(t) for t in T]
+        self.nconf = len(gsolv)
+        if len(set(self.T)) <= degree:
+            raise ValueError(
+                "{} temperatures are not enough for a polynomial of degree "
+                "{}!".format(len(set(self.T)), degree)
+            )
+        self.t0 = math.fsum(self.T) / len(self.T)
+        self.ts = max(abs(t - self.t0) for t in self.T)
+        x = [(t - self.t0) / self.ts for t in self.T]
+        V = [[xi ** k for k in range(degree + 1)] for xi in x]
+        G = [[float(g[i]) for g in gsolv] for i in range(len(self.T))]
+        self.G = G  # the fitted values, one row per temperature
+        Z = [[G[i][j] / self.T[i] for j in range(self.nconf)] for i in range(len(self.T))]
+        # coefficients of Gsolv and Gsolv/T, shape (degree + 1, nconf)
+        self.cg, self.cz = self._lstsq(V, [g + z for g, z in zip(G, Z)], self.nconf)
+
+    def _lstsq(self, V, Y, nconf):
+        """solve V c = Y in the least-squares sense for all columns of Y,
+        returns the coefficients for the first nconf and the other columns"""
+        if np is not None:
+            Q, Rm = np.linalg.qr(np.array(V))
+            if np.min(np.abs(np.diag(Rm))) < 1.0e-12 * np.max(np.abs(np.diag(Rm))):
+                raise ValueError("The Vandermonde matrix is singular!")
+            C = np.linalg.solve(Rm, Q.T.dot(np.array(Y)))
+            return C[:, :nconf], C[:, nconf:]
+        # Householder QR, applied to the right hand sides on the fly
+        A = [list(row) for row in V]
+        B = [list(row) for row in Y]
+        m, n = len(A), len(A[0])
+        for k in range(n):
+            norm = math.sqrt(math.fsum(A[i][k] ** 2 for i in range(k, m)))
+            if norm == 0.0:
+                raise ValueError("The Vandermonde matrix is singular!")
+            alpha = -norm if A[k][k] >= 0.0 else norm
+            v = [0.0] * k + [A[k][k] - alpha] + [A[i][k] for i in range(k + 1, m)]
+            vv = math.fsum(vi * vi for vi in v[k:])
+            for M in (A, B):
+                for j in range(len(M[0])):
+                    s = 2.0 * math.fsum(v[i] * M[i][j] for i in range(k, m)) / vv
+                    for i in range(k, m):
+                        M[i][j] -= s * v[i]
+        if min(abs(A[k][k]) for k in range(n)) < 1.0e-12 * max(abs(A[k][k]) for k in range(n)):
+            raise ValueError("The Vandermonde matrix is singular!")
+        C = [[0.0] * len(B[0]) for _ in range(n)]
+        for j in range(len(B[0])):
+            for k in range(n - 1, -1, -1):
+                s = math.fsum(A[k][i] * C[i][j] for i in range(k + 1, n))
+                C[k][j] = (B[k][j] - s) / A[k][k]
+        return [row[:nconf] for row in C], [row[nconf:] for row in C]
+
+    def _evaluate(self, c, temp, derivative=False):
+        """polynomial with coefficients c (or its derivative d/dT) at temp"""
+        x = (float(temp) - self.t0) / self.ts
+        if derivative:
+            powers = [k * x ** (k - 1) / self.ts if k else 0.0 for k in range(len(c))]
+        else:
+            powers = [x ** k for k in range(len(c))]
+        if np is not None:
+            return np.array(powers).dot(c)
+        return [
+            math.fsum(powers[k] * c[k][j] for k in range(len(c)))
+            for j in range(self.nconf)
+        ]
 
-        results = run_in_parallel(
-            q, resultq, job, int(args.maxthreads), results, instructrrho, "rrho"
+    def _combine(self, func, *values):
+        if np is not None:
+            return func(*values)
+        return [func(*items) for items in zip(*values)]
+
+    def gsolv(self, temp):
+        """Gsolv(temp)"""
+        return self._evaluate(self.cg, temp)
+
+    def ssolv(self, temp):
+        """Ssolv(temp) = -dGsolv/dT"""
+        return self._combine(lambda d: -d, self._evaluate(self.cg, temp, True))
+
+    def hsolv(self, temp):
+        """Hsolv(temp) = Gsolv + T Ssolv"""
+        return self._combine(
+            lambda g, s: g + float(temp) * s, self.gsolv(temp), self.ssolv(temp)
         )
-        exit_log, fail_rate = check_tasks(results, args)
 
-        # sort out conformers with crashed optimizations
-        for conf in list(results):
-            if not conf.success:
-                print(
-                    "\nERROR: A problem has occurred in the RRHO calculation of {}!"
-                    " The conformer is removed.\n".format(conf.name)
-                )
-                input_object.json_dict[conf.name]["rrho"] = "failed"
-                input_object.json_dict[conf.name]["energy_rrho"] = None
-                if args.rrhoprog == 'xtb':
-                    input_object.json_dict[conf.name]["rrho_xtb"] = "failed"
-                    input_object.json_dict[conf.name]["energy_rrho_xtb"] = None
-                elif args.rrhoprog == 'tm':
-                    input_object.json_dict[conf.name]["rrho_tm"] = "failed"
-                    input_object.json_dict[conf.name]["energy_rrho_tm"] = None
-                elif args.rrhoprog == 'orca':
-                    input_object.json_dict[conf.name]["rrho_orca"] = "failed"
-                    input_object.json_dict[conf.name]["energy_rrho_orca"] = None
-                if in_part2:
-                    input_object.json_dict[conf.name]["consider_for_part3"] = False
-                    input_object.json_dict[conf.name]["backup_part3"] = False
-                elif in_part3:
-                    input_object.json_dict[conf.name]["consider_for_part4"] = False
-                save_errors.append(
-                    "Conformer {} was removed, because the RRHO calculation "
-                    "failed!".format(conf.name)
-                )
-                results.remove(conf)
-
-        for conf in results:
-            input_object.json_dict[conf.name]["rrho"] = "calculated"
-            input_object.json_dict[conf.name]["energy_rrho"] = conf.rrho
-            if args.rrhoprog == 'xtb':
-                input_object.json_dict[conf.name]["rrho_xtb"] = "calculated"
-                input_object.json_dict[conf.name]["energy_rrho_xtb"] = conf.rrho
-            elif args.rrhoprog == 'tm':
-                input_object.json_dict[conf.name]["rrho_tm"] = "calculated"
-                input_object.json_dict[conf.name]["energy_rrho_tm"] = conf.rrho
-            elif args.rrhoprog == 'orca':
-                input_object.json_dict[conf.name]["rrho_orca"] = "calculated"
-                input_object.json_dict[conf.name]["energy_rrho_orca"] = conf.rrho
-            input_object.json_dict[conf.name]["symmetry"] = conf.symmetry
+    def hsolv2(self, temp):
+        """Hsolv(temp) = -T^2 d(Gsolv/T)/dT (Gibbs-Helmholtz)"""
+        t2 = float(temp) ** 2
+        return self._combine(lambda d: -t2 * d, self._evaluate(self.cz, temp, True))
+
+    def ssolv2(self, temp):
+        """Ssolv(temp) = (Hsolv - Gsolv) / T from the Gibbs-Helmholtz Hsolv"""
+        return self._combine(
+            lambda h, g: (h - g) / float(temp), self.hsolv2(temp), self.gsolv(temp)
+        )
+
+    def volwork(self, temp):
+        """volume work R T ln(videal T) in kcal/mol, the same for all conformers"""
+        return self.R * float(temp) * math.log(self.videal * float(temp))
+
+
+def read_cosmotherm_tab(filename, compounds):
+    """read Gsolv(T) of compounds (names in lower case) from cosmotherm.tab
+    of henry jobs, returns {compound: (T in K, Gsolv in kcal/mol)} for the
+    compounds with a value for every temperature"""
+    T = []
+    values = {compound: [] for compound in compounds}
+    try:
+        with open(filename, "r", encoding=coding, newline=None) as inp:
+            for line in inp:
+                if "T=" in line:
+                    T.append(float(line.split()[5]))
+                    continue
+                items = line.split()
+                if len(items) > 5 and items[1] in values:
+                    values[items[1]].append(float(items[5]))
+    except (OSError, ValueError, IndexError):
+        return {}
+    return {
+        compound: (T, gsolv)
+        for compound, gsolv in values.items()
+        if T and len(gsolv) == len(T)
+    }
+
+
+def cosmotherm_shard(workdir, group):
+    """COSMOtherm for the conformers of group in one process in workdir,
+    conformers without result in the batch are calculated on their own"""
+    if os.path.isdir(workdir):
+        shutil.rmtree(workdir)
+    mkdir_p(workdir)
+    names = []
+    for task in group:
+        try:
+            shutil.copy(
+                os.path.join(task.workdir, "COSMO", "out.cosmo"),
+                os.path.join(workdir, task.name.lower() + ".cosmo"),
+            )
+            names.append(task.name.lower())
+        except OSError:
+            pass
+    values = {}
+    if names:
+        group[0]._cosmotherm_input(workdir, [name + ".cosmo" for name in names])
+        group[0]._cosmotherm(workdir)
+        values = read_cosmotherm_tab(os.path.join(workdir, "cosmotherm.tab"), names)
+    found = [name for name in names if name in values]
+    fit = None
+    if found:
+        # one fit for all conformers of the batch, they share T
+        try:
+            fit = solvation_fit(values[found[0]][0], [values[name][1] for name in found])
+        except ValueError as error:
+            print("Error in Gsolv! {}".format(error))
+    for task in group:
+        if fit is not None and task.name.lower() in found:
+            task._cosmothermrd(fit, found.index(task.name.lower()))
+        else:
+            task._solv_complete()
+
+
+def execute_batch(q, resultq, allocator=None, monitor=None):
+    """code that the worker of cosmotherm_batch has to execute, the items of
+    q are shards (workdir, tasks). The wall time of a shard is shared by its
+    conformers, which are put in resultq as soon as the shard is finished."""
+    while True:
+        try:
+            workdir, group = q.get_nowait()
+        except Empty:
+            break
+        ncores = None
+        for task in group:
+            task.conductoronly = False
+            task.success = False
+            task.gsolv = None
+            task.timedout = False
+            task.usage = {}
+            if monitor is not None:
+                monitor.begin(task)
+        try:
+            if allocator is not None:
+                ncores = allocator.acquire(q.qsize() + 1)
+                for task in group:
+                    task.set_cores(ncores)
+            start = time.time()
+            with trace.span(
+                "cosmotherm {}".format(last_folders(workdir, 2)),
+                "job",
+                stage=walltime_key("cosmotherm", group[0].workdir),
+                conformers=len(group),
+            ) as span:
+                try:
+                    cosmotherm_shard(workdir, group)
+                except Exception as error:
+                    # the conformers which are not done yet have failed
+                    print(
+                        "ERROR: COSMOtherm in {} failed: {}".format(
+                            last_folders(workdir, 2), error
+                        ),
+                        file=sys.stderr,
+                    )
+                span.args["success"] = all(task.success for task in group)
+            walltime = (time.time() - start) / len(group)
+            for task in group:
+                if task.timedout:
+                    task.success = False
+                record_walltime(task, walltime)
+                record_resources(task, walltime)
+        except Exception as error:
+            for task in group:
+                job_crashed(task, error)
+        finally:
+            if ncores is not None:
+                allocator.release(ncores)
+            for task in group:
+                if monitor is not None:
+                    monitor.end(task)
+                resultq.put(task)
+            q.task_done()
+    return
 
-        if exit_log:
-            print(
-                "\nERROR: too many RRHO calculations failed ({:.2f} %)!".format(
-                    fail_rate
-                )
-            )
-            input_object.write_json("save_and_exit")
 
-        if results and args.rrhoprog == "xtb":
-            # check rmsd between GFNn-xTB optimized geometry and DFT structure
-            rmsd = []
-            for item in results:
-                if item.rrho is not None:
-                    workdir = str(os.path.join(cwd, os.path.join(item.name, "rrho")))
-                    rmsd.append([item.name, RMSD_routine(workdir, int(args.nat))])
-            for item in list(rmsd):
-                if not isinstance(item[1], float):
-                    rmsd.remove(item)
-                    print("ERROR: could not calculate RMSD in {}".format(item[0]))
-                elif item[1] < 0.4:
-                    rmsd.remove(item)
-            if len(rmsd) >= 1:
-                print(
-                    "\nWARNING: The RMSD between the DFT and the {}-xTB structure "
-                    "used for the RRHO\n contribution is larger than 0.4 Angstrom for "
-                    "the following conformers:".format(str(args.gfnv).upper())
-                )
-                print("#CONF    RMSD\n")
-                for line in rmsd:
-                    if line[1] > 0.4:
-                        print("{:8} {:.3f}\n".format(line[0], line[1]))
-                        save_errors.append(
-                            "WARNING: Large RMSD between DFT and "
-                            "GFNn-xTB geometry for {}.".format(line[0])
-                        )
-    # adding conformers calculated before to results
-    for item in tmp_results:
+def cosmotherm_batch(tasks, shards, maxthreads, omp, cwd, input_object=None, onresult=None):
+    """COSMOtherm for all tasks after their conductor single-points (jobtype
+    solv with conductoronly) in shards processes instead of one process per
+    conformer, each process loads the database and checks the licence only
+    once. The shards are run by maxthreads workers with the cores of
+    maxthreads * omp, each conformer is handled (handle_result, onresult)
+    as soon as its shard is finished."""
+    if not tasks:
+        return []
+    batchdir = os.path.join(cwd, "cosmotherm_batch")
+    groups = [tasks[i::shards] for i in range(min(shards, len(tasks)))]
+    instructdict = {"jobtype": "cosmotherm"}
+    q = Queue()
+    resultq = Queue()
+    for i, group in enumerate(groups):
+        for task in group:
+            task.jobtype = "cosmotherm"
+        workdir = os.path.join(batchdir, str(i + 1))
         print(
-            "RRHO of {:{digits}}: {:.7f} in sym: {}".format(
-                item.name, float(item.rrho), item.symmetry, 
-                digits=int(input_object.namelength)
+            "Running COSMOtherm for {} conformers in {}".format(
+                len(group), last_folders(workdir, 2)
             )
         )
-        results.append(item)
-    results.sort(key=lambda x: int(x.name[4:]))
+        q.put((workdir, group))
+    maxworkdirlen = max([len(last_folders(i.workdir, 2)) for i in tasks] + [0])
+    allocator = core_allocator(maxthreads, omp)
+    stagestart = time.perf_counter()
+    monitor = progress_monitor(len(tasks), instructdict["jobtype"], cwd)
+    monitor.run()
+    for i in range(min(int(maxthreads), len(groups))):
+        worker = Thread(
+            target=execute_batch,
+            args=(q, resultq, allocator, monitor),
+            name="cosmotherm-{}".format(i + 1),
+        )
+        worker.setDaemon(True)
+        worker.start()
+    results = []
+    try:
+        for i in range(len(tasks)):
+            results.append(resultq.get())
+            handle_result(
+                results[-1], instructdict, maxworkdirlen, input_object, onresult
+            )
+        q.join()
+    except KeyboardInterrupt:
+        print("\nKilling all running calculations!")
+        kill_running_processes()
+        raise
+    finally:
+        monitor.stop()
+    label = walltime_key("cosmotherm", tasks[0].workdir)
+    stageend = time.perf_counter()
+    trace.add(label, "stage", stagestart, stageend, {"jobs": len(tasks)})
+    record_stage(
+        label,
+        results,
+        lambda x: [walltime_key(x.jobtype, x.workdir, x.full)],
+        stageend - stagestart,
+        allocator.maxthreads * allocator.omp,
+    )
+    return results
 
-    # check if at least one conformer is left
-    if not results:
-        print("ERROR: No conformers left!")
-        input_object.write_json("save_and_exit")
 
-    return results, input_object, save_errors
-
-
-def additive_gsolv(
-    args,
-    q,
-    resultq,
-    job,
-    in_part2,
-    in_part3,
-    results,
-    input_object,
-    save_errors,
-    cwd,
-    environsettings
-):
-    """calculate additive solvation contributions: e.g.
-       GBSA_gsolv , SMD_gsolv or COSMO-RS for part2 or part3"""
+def gsolv_models(args, in_part2, in_part3):
+    """keys in enso.json, folder and name of the additive solvation model"""
+    if in_part2:
+        sm = args.gsolv2
+    elif in_part3:
+        sm = args.sm3
+    if sm == "cosmors":
+        return "cosmo-rs", "energy_cosmo-rs", "gsolv", "COSMO-RS"
+    elif sm == "gbsa_gsolv":
+        return "gbsa_gsolv", "energy_gbsa_gsolv", "gbsa_gsolv", "GBSA-Gsolv"
+    elif sm == 'smd_gsolv':
+        return "smd_gsolv", "energy_smd_gsolv", "smd_gsolv", "SMD-Gsolv"
+
+
+def gsolv_done(args, in_part2, in_part3, conf, input_object):
+    """write Gsolv of conf to json_dict"""
+    js_smodel, js_sm_energy, folder, sm_capital = gsolv_models(args, in_part2, in_part3)
+    if conf.success:
+        input_object.json_dict[conf.name][js_smodel] = "calculated"
+        input_object.json_dict[conf.name][js_sm_energy] = conf.gsolv
+        return
+    input_object.json_dict[conf.name][js_smodel] = "failed"
+    input_object.json_dict[conf.name][js_sm_energy] = None
+    if in_part2:
+        input_object.json_dict[conf.name]["consider_for_part3"] = False
+        input_object.json_dict[conf.name]["backup_part3"] = False
+    if in_part3:
+        input_object.json_dict[conf.name]["consider_for_part4"] = False
+
+
+def gsolv_step(args, in_part2, in_part3, results, input_object, environsettings):
+    """additive solvation contributions: e.g. GBSA_gsolv , SMD_gsolv or
+    COSMO-RS for part2 or part3 as job of the chain of each conformer, the
+    conformers calculated before get Gsolv from enso.json.
+    Returns results without the conformers which failed in the previous run
+    and the instructdict (None if all conformers were calculated before)."""
     if in_part2:
         part = "part2"
-        if args.gsolv2 == "cosmors":
-            js_smodel = "cosmo-rs"
-            js_sm_energy = "energy_cosmo-rs"
-            folder = "gsolv"
-            sm_capital = "COSMO-RS"
-        elif args.gsolv2 == "gbsa_gsolv":
-            js_smodel = "gbsa_gsolv"
-            js_sm_energy = "energy_gbsa_gsolv"
-            folder = "gbsa_gsolv"
-            sm_capital = "GBSA-Gsolv"
-        elif args.gsolv2 == 'smd_gsolv':
-            js_smodel = "smd_gsolv"
-            js_sm_energy = "energy_smd_gsolv"
-            folder = "smd_gsolv"
-            sm_capital = "SMD-Gsolv"
     elif in_part3:
         part = "part3"
-        if args.sm3 == "cosmors":
-            js_smodel = "cosmo-rs"
-            js_sm_energy = "energy_cosmo-rs"
-            folder = "gsolv"
-            sm_capital = "COSMO-RS"
-        elif args.sm3 == "gbsa_gsolv":
-            js_smodel = "gbsa_gsolv"
-            js_sm_energy = "energy_gbsa_gsolv"
-            folder = "gbsa_gsolv"
-            sm_capital = "GBSA-Gsolv"
-        elif args.sm3 == 'smd_gsolv':
-            js_smodel = "smd_gsolv"
-            js_sm_energy = "energy_smd_gsolv"
-            folder = "smd_gsolv"
-            sm_capital = "SMD-Gsolv"
+    js_smodel, js_sm_energy, folder, sm_capital = gsolv_models(args, in_part2, in_part3)
     print("\nCalculating {} contribution to free energy.".format(sm_capital))
     tmp_results = []
+    calculate = []
     for conf in list(results):
         if input_object.json_dict[conf.name][js_smodel] == "calculated":
-            # this conformer was already calculated successfully, 
-            #it is moved to tmp_results
+            # this conformer was already calculated successfully
             conf.gsolv = input_object.json_dict[conf.name][js_sm_energy]
-            tmp_results.append(results.pop(results.index(conf)))
+            tmp_results.append(conf)
         elif input_object.json_dict[conf.name][js_smodel] == "failed":
             # this conformer was already calculated but the calculation 
             # failed, it is removed
@@ -8898,11 +11181,11 @@ def additive_gsolv(
             results.remove(conf)
         elif input_object.json_dict[conf.name][js_smodel] == "not_calculated":
             # this conformer has to be calculated now
-            pass
+            calculate.append(conf)
     print(
         "number of further considered conformers: {:{digits}} {}".format(
             "",
-            str(len(results) + len(tmp_results)),
+            str(len(results)),
             digits=input_object.digilen - len("number of further considered conformers"),
         )
     )
@@ -8913,175 +11196,203 @@ def additive_gsolv(
             )
         )
         print_block([i.name for i in tmp_results])
-        if len(results) > 0:
+        if len(calculate) > 0:
             print(
                 "The {} calculation is carried out now for {} "
-                "conformers:".format(sm_capital, str(len(results))
+                "conformers:".format(sm_capital, str(len(calculate))
                 )
             )
-            print_block([i.name for i in results])
+            print_block([i.name for i in calculate])
         else:
             print("No conformers are considered additionally.")
     else:
         print("Considered conformers:")
-        print_block([i.name for i in results])
-
-    if results:
-        # calculate solvation contribution for all conformers that remain 
-        # in list results
-        print("Setting up new directories.")
-        for conf in list(results):
-            tmp_from = os.path.join(cwd, conf.name, args.func)
-            tmp_to = os.path.join(cwd, conf.name, folder)
-            if not os.path.isdir(tmp_to):
-                mkdir_p(tmp_to)
-            try:
-                shutil.copy(
-                    os.path.join(tmp_from, "coord"), os.path.join(tmp_to, "coord")
-                )
-            except FileNotFoundError:
-                if not os.path.isfile(os.path.join(tmp_from, "coord")):
-                    print(
-                        "ERROR: while copying the coord file from {}! "
-                        "The corresponding file does not exist.".format(tmp_from)
-                    )
-                elif not os.path.isdir(tmp_to):
-                    print("ERROR: Could not create folder {}!".format(tmp_to))
-                print("ERROR: Removing conformer {}!".format(conf.name))
-                input_object.json_dict[conf.name][js_smodel] = "failed"
-                input_object.json_dict[conf.name][js_sm_energy] = None
-                if in_part2:
-                    input_object.json_dict[conf.name]["consider_for_part3"] = False
-                    input_object.json_dict[conf.name]["backup_part3"] = False
-                if in_part3:
-                    input_object.json_dict[conf.name]["consider_for_part4"] = False
-                save_errors.append(
-                    "Conformer {} was removed, because IO failed!".format(conf.name)
-                )
-                results.remove(conf)
-        print("Constructed all new folders.")
-        if not results:
-            print("ERROR: No conformers left!")
-            input_object.write_json("save_and_exit")
-        previous_job = job
-        if js_smodel == "cosmo-rs":
-            job = tm_job
-            instructsolv = {
-                "jobtype": "solv",
-                "chrg": args.chrg,
-                "unpaired": args.unpaired,
-                "solv": args.solv,
-                "temperature": args.temperature,
-                "environ": environsettings,
-                "progsettings": {
-                    "omp": args.omp,
-                    "tempprogpath": "",
-                    "cosmorssetup": input_object.cosmorssetup,
-                    "cosmothermversion": input_object.cosmothermversion,
-                },
-            }
-        elif js_smodel == "gbsa_gsolv":
-            instructsolv = {
-                "jobtype": "gbsa_gsolv",
-                "chrg": args.chrg,
-                "unpaired": args.unpaired,
-                "solv": args.solv,
-                "gfnv": args.gfnv,
-                "temperature": args.temperature,
-                "environ": environsettings,
-                "progsettings": {
-                    "omp": args.omp,
-                    "tempprogpath": input_object.xtbpath,
-                    "xtbpath": input_object.xtbpath,
-                },
-            }
-        elif js_smodel == "smd_gsolv":
-            job = orca_job
-            instructsolv = {
-                "jobtype": "smd_gsolv",
-                "chrg": args.chrg,
-                "func": args.func,
-                "unpaired": args.unpaired,
-                "solv": args.solv,
-                "sm": "smd",
-                "temperature": args.temperature, # only valid at 298.15
-                "environ": environsettings,
-                "progsettings": {
-                    "omp": args.omp,
-                    "tempprogpath": input_object.orcapath,
-                    "orca_old": input_object.orca_old,
-                },
-            }
-
-        results = run_in_parallel(
-            q, resultq, job, int(args.maxthreads), results, instructsolv, folder
-        )
-        job = previous_job
-        exit_log, fail_rate = check_tasks(results, args)
-
-        for i in list(results):
-            if not i.success:
-                print(
-                    "\nERROR: A problem has occurred in the {} calculation "
-                    "of {}! The conformer is removed.\n".format(sm_capital, i.name)
-                )
-                input_object.json_dict[i.name][js_smodel] = "failed"
-                input_object.json_dict[i.name][js_sm_energy] = None
-                if in_part2:
-                    input_object.json_dict[i.name]["consider_for_part3"] = False
-                    input_object.json_dict[i.name]["backup_part3"] = False
-                if in_part3:
-                    input_object.json_dict[i.name]["consider_for_part4"] = False
-                save_errors.append(
-                    "Error in {} calculation for conformer {}".format(
-                        sm_capital, i.name
-                    )
-                )
-                results.remove(i)
-        # write energies to json_dict
-        for i in results:
-            input_object.json_dict[i.name][js_smodel] = "calculated"
-            input_object.json_dict[i.name][js_sm_energy] = i.gsolv
-        if exit_log:
-            print(
-                "\nERROR: too many {} calculations failed ({:.2f} %)!".format(
-                    sm_capital, fail_rate
-                )
-            )
-            input_object.write_json("save_and_exit")
-    # adding conformers calculated before to results
+        print_block([i.name for i in calculate])
     for item in tmp_results:
         print(
             "Gsolv of {:>{digits}}: {:.7f}".format(item.name, item.gsolv, digits=input_object.namelength)
         )
-        results.append(item)
-    results.sort(key=lambda x: int(x.name[4:]))
     # check if at least one conformer is left:
     if not results:
         print("ERROR: No conformers left!")
         input_object.write_json("save_and_exit")
-    return results, input_object
+    if not calculate:
+        return results, None
+
+    jobclass = None
+    if js_smodel == "cosmo-rs":
+        jobclass = tm_job
+        instructsolv = {
+            "jobtype": "solv",
+            "chrg": args.chrg,
+            "unpaired": args.unpaired,
+            "solv": args.solv,
+            "temperature": args.temperature,
+            "guess": [args.func],
+            "environ": environsettings,
+            "progsettings": {
+                "omp": args.omp,
+                "tempprogpath": "",
+                "cosmorssetup": input_object.cosmorssetup,
+                "cosmothermversion": input_object.cosmothermversion,
+            },
+        }
+    elif js_smodel == "gbsa_gsolv":
+        instructsolv = {
+            "jobtype": "gbsa_gsolv",
+            "chrg": args.chrg,
+            "unpaired": args.unpaired,
+            "solv": args.solv,
+            "gfnv": args.gfnv,
+            "temperature": args.temperature,
+            "environ": environsettings,
+            "progsettings": {
+                "omp": args.omp,
+                "tempprogpath": input_object.xtbpath,
+                "xtbpath": input_object.xtbpath,
+            },
+        }
+    elif js_smodel == "smd_gsolv":
+        jobclass = orca_job
+        instructsolv = {
+            "jobtype": "smd_gsolv",
+            "chrg": args.chrg,
+            "func": args.func,
+            "unpaired": args.unpaired,
+            "solv": args.solv,
+            "sm": "smd",
+            "temperature": args.temperature, # only valid at 298.15
+            "guess": [args.func],
+            "environ": environsettings,
+            "progsettings": {
+                "omp": args.omp,
+                "tempprogpath": input_object.orcapath,
+                "orca_old": input_object.orca_old,
+            },
+        }
 
-def prepforQM(args, q, resultq, job, save_errors, results, input_object, prepfor, folder, instructprep, ifcrashed, removelist=None):
-    """ Run essentially cefine """
-    results = run_in_parallel(
-        q, resultq, job, int(args.maxthreads), results, instructprep, folder
+    def solvdone(i):
+        """write Gsolv to json_dict as soon as it is done"""
+        gsolv_done(args, in_part2, in_part3, i, input_object)
+
+    instructsolv["onresult"] = solvdone
+    if args.cosmothermbatch is None:
+        shards = int(args.maxthreads)
+    else:
+        shards = args.cosmothermbatch
+    if js_smodel == "cosmo-rs" and shards > 0:
+        # the conductor single-points run in the chains, COSMOtherm
+        # afterwards for the whole ensemble in a few processes (gsolv_check)
+        instructsolv["conductoronly"] = True
+
+        def conductordone(i):
+            """conformers with failed single-points are done"""
+            if not i.success:
+                gsolv_done(args, in_part2, in_part3, i, input_object)
+
+        instructsolv["onresult"] = conductordone
+    instructsolv["step"] = "gsolv"
+    instructsolv["conformers"] = set([i.name for i in calculate])
+    instructsolv["newfolder"] = folder
+    if jobclass is not None:
+        instructsolv["jobclass"] = jobclass
+    return results, instructsolv
+
+
+@traced("enso")
+def gsolv_check(args, in_part2, in_part3, results, instructsolv, input_object, save_errors, cwd):
+    """sort out the conformers with failed Gsolv calculations of the chain,
+    COSMOtherm of the conductor single-points for the whole ensemble"""
+    if instructsolv is None:
+        return results
+    js_smodel, js_sm_energy, folder, sm_capital = gsolv_models(args, in_part2, in_part3)
+    names = instructsolv["conformers"]
+    results = remove_failed(
+        args, results, "gsolv", names, "{} calculation".format(sm_capital),
+        input_object, save_errors
     )
-    exit_log, fail_rate = check_tasks(results, args)
+    if instructsolv.get("conductoronly", False):
+        tasks = [i for i in results if i.name in names]
+        for i in tasks:
+            # later jobs of the chain (RRHO) changed the settings
+            i.__class__ = tm_job
+            i.workdir = os.path.join(cwd, i.name, folder)
+            for instruction in instructsolv:
+                if instruction not in chain_keys:
+                    setattr(i, instruction, instructsolv[instruction])
+        if args.cosmothermbatch is None:
+            shards = int(args.maxthreads)
+        else:
+            shards = args.cosmothermbatch
+
+        def solvdone(i):
+            """write Gsolv to json_dict as soon as the shard is done"""
+            gsolv_done(args, in_part2, in_part3, i, input_object)
+            if not i.success:
+                i.failedjob = "gsolv"
+
+        cosmotherm_batch(
+            tasks, shards, args.maxthreads, args.omp, cwd, input_object, solvdone
+        )
+        results = remove_failed(
+            args, results, "gsolv", names, "{} calculation".format(sm_capital),
+            input_object, save_errors
+        )
+    # check if at least one conformer is left:
+    if not results:
+        print("ERROR: No conformers left!")
+        input_object.write_json("save_and_exit")
+    return results
+
+
+def prepforQM(args, q, resultq, job, save_errors, results, input_object, prepfor, folder, instructprep, ifcrashed, removelist=None, chain=None, onresult=None):
+    """ Run essentially cefine, the jobs in chain (list of instructdicts, see
+    run_chain_in_parallel) are started for each conformer directly after its
+    own preparation. Conformers which fail after the preparation are
+    returned with success = False and failedjob set to the failed step.
+    onresult is called for every conformer as soon as the last job of the
+    chain is finished (if the last instructdict has no onresult)."""
+
+    def prepdone(task):
+        """update json_dict as soon as the preparation is finished"""
+        if not task.success:
+            for key, value in ifcrashed.items():
+                input_object.json_dict[task.name][key] = value
+        elif not chain and onresult is not None:
+            onresult(task)
+
+    if chain:
+        chain = list(chain)
+        if onresult is not None and "onresult" not in chain[-1]:
+            chain[-1] = dict(chain[-1], onresult=onresult)
+        instructprep = dict(instructprep, step="prep", onresult=prepdone)
+        results = run_chain_in_parallel(
+            q, resultq, job, int(args.maxthreads), results, [instructprep] + chain, folder,
+            input_object=input_object
+        )
+        names = instructprep.get("conformers", [i.name for i in results])
+        exit_log, fail_rate = check_tasks(
+            [i for i in results if i.name in names], args, failedjob="prep"
+        )
+    else:
+        results = run_in_parallel(
+            q, resultq, job, int(args.maxthreads), results, instructprep, folder,
+            input_object=input_object, onresult=prepdone
+        )
+        exit_log, fail_rate = check_tasks(results, args)
     for i in list(results):
-        if not i.success:
+        if not i.success and (not chain or i.failedjob == "prep"):
             print(
                 "\nERROR: A problem has occurred in the {} "
                 "preparation for {}! The conformer "
                 "is removed.\n".format(prepfor, i.name)
             )
-            for key, value in ifcrashed.items():
-                input_object.json_dict[i.name][key] = value
             save_errors.append(
                 "Conformer {} was removed, because preparation "
                 "failed!".format(i.name)
             )
             results.remove(i)
+            geometries.discard(i.name)
             if removelist is not None:
                 removelist.append(i.name)
     if exit_log:
@@ -9201,6 +11512,15 @@ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
         # if restart is 'on', flags are read from file flags.dat
         error_logical = input_object.process_flags(args, os.path.join(cwd, "flags.dat"),"FLAGS",silent=False)
 
+    # wall-clock limits for the external programs
+    set_timeouts(args.timeout)
+    # thresholds of mRRHO (xTB and the cached hessians)
+    qm_job.imagthr = float(args.imagthr)
+    qm_job.sthr = float(args.sthr)
+    progress_monitor.interval = args.progress
+    if args.trace:
+        trace.enable(args.trace)
+
     # check whether crest_conformers.xyz file is available
     if os.path.isfile(os.path.join(cwd, "crest_conformers.xyz")):
         conformersxyz = os.path.join(cwd, "crest_conformers.xyz")
@@ -9212,24 +11532,18 @@ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
 
     # get nconf and nat from conformersxyz
     try:
-        with open(conformersxyz, "r", encoding=coding, newline=None) as xyzfile:
-            stringfile_lines = xyzfile.readlines()
-    except:
-        print("\nERROR: Can not read file {}!" "\nGoing to exit.".format(conformersxyz))
-        sys.exit(1)
-    try:
-        args.nat = int(stringfile_lines[0])
+        ensemble = xyz_ensemble(conformersxyz)
     except ValueError:
         print(
             "Could not get the number of atoms from file {}, something "
             "is wrong!".format(conformersxyz)
         )
         sys.exit(1)
-    try:
-        nelements = int(int(len(stringfile_lines)) / (int(stringfile_lines[0]) + 2))
-    except ValueError:
-        print("Could not determine the number of conformers from the crest ensemble!")
+    except:
+        print("\nERROR: Can not read file {}!" "\nGoing to exit.".format(conformersxyz))
         sys.exit(1)
+    args.nat = ensemble.nat
+    nelements = len(ensemble)
 
     # check if nconf has been set otherwise read from conformersxyz
     if not args.nconf: # None if all confs
@@ -9290,6 +11604,7 @@ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
         input_object,
     )
 
+@traced("enso")
 def sorting_part1(args, results, input_object, save_errors):
     ''' sorting only based on energy'''
     au2kcal = 627.50947428
@@ -9422,9 +11737,7 @@ def printout_part1(args, input_object):
             counter+=1
     if counter/len(results) >0.75 :
         try:
-            with open(input_object.conformersxyz, "r", encoding=coding, newline=None) as xyzfile:
-                stringfile_lines = xyzfile.readlines()
-            args.nat = int(stringfile_lines[0])
+            args.nat = xyz_ensemble(input_object.conformersxyz).nat
             results = conformersxyz2coord(input_object.conformersxyz, 
             args.nat, 
             args.func, 
@@ -9442,6 +11755,7 @@ def printout_part1(args, input_object):
         print('Error: No conformers found or file enso.json is missing!')
     return
 
+@traced("part")
 def part1(args, environsettings, input_object):
     """ Run crude optimization"""
     # list to store all relevant errors and print them bundled for user convenience
@@ -9576,8 +11890,6 @@ def part1(args, environsettings, input_object):
                          "consider_for_part2": False,
                          "backup_for_part2": False}
 
-            results, input_object, save_errors = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'optimization', args.func,  instructprep, ifcrashed)
-
             # Crude optimization of part1:
             instructopt = {
                 "jobtype": "opt",
@@ -9601,9 +11913,21 @@ def part1(args, environsettings, input_object):
                 instructopt["progsettings"]["tempprogpath"] = input_object.orcapath
                 instructopt["progsettings"]["orca_old"] = input_object.orca_old
 
-            results = run_in_parallel(
-                q, resultq, job, int(args.maxthreads), results, instructopt, args.func
-            )
+            def optdone(conf):
+                """write the optimization to json_dict as soon as it is done"""
+                if not conf.success:
+                    input_object.json_dict[conf.name]["crude_opt"] = "failed"
+                    input_object.json_dict[conf.name]["consider_for_part2"] = False
+                    input_object.json_dict[conf.name]["backup_for_part2"] = False
+                    return
+                conf.energy_opt = conf.energy
+                conf.energy = None
+                input_object.json_dict[conf.name]["crude_opt"] = "calculated"
+                input_object.json_dict[conf.name]["energy_crude_opt"] = conf.energy_opt
+
+            # the optimization of each conformer starts directly after its
+            # own preparation
+            results, input_object, save_errors = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'optimization', args.func,  instructprep, ifcrashed, chain=[instructopt], onresult=optdone)
             exit_log, fail_rate = check_tasks(results, args)
             # sort out conformers with failed optimizations
             for conf in list(results):
@@ -9612,20 +11936,11 @@ def part1(args, environsettings, input_object):
                         "\nERROR: A problem has occurred in the optimization "
                         "of {}! The conformer is removed.\n".format(conf.name)
                     )
-                    input_object.json_dict[conf.name]["crude_opt"] = "failed"
-                    input_object.json_dict[conf.name]["consider_for_part2"] = False
-                    input_object.json_dict[conf.name]["backup_for_part2"] = False
                     save_errors.append(
                         "Conformer {} was removed, because the optimization "
                         "failed!".format(conf.name)
                     )
                     results.remove(conf)
-            # update json_dict
-            for conf in results:
-                conf.energy_opt = conf.energy
-                conf.energy = None
-                input_object.json_dict[conf.name]["crude_opt"] = "calculated"
-                input_object.json_dict[conf.name]["energy_crude_opt"] = conf.energy_opt
             if exit_log:
                 print(
                     "\nERROR: too many optimizations failed ({:.2f} %)!".format(
@@ -9660,6 +11975,12 @@ def part1(args, environsettings, input_object):
         ### perform evaluation and sorting in part1 xtbenergy and crude dft optimization energy
         results, maxreldft, save_errors, input_object = sorting_part1(args, results, input_object, save_errors)
 
+        ### check if conformers are rotamers or identical, possibly sort them out
+        crest_routine(
+            args, results, args.func, args.crestcheck, input_object.json_dict, "part1"
+        )
+        results.sort(key=lambda x: int(x.name[4:]))
+
         backuplist = []
         if maxreldft > args.thr1:
             print("\n*********************************")
@@ -9723,6 +12044,8 @@ def part1(args, environsettings, input_object):
             for error in list(save_errors):
                 print(save_errors.pop())
             print("***---------------------------------------------------------***")
+        print_resources("part1")
+        geometries.discard()
         print("\nEND of part1.\n")
     else:  # if part1 is switched off
         print("PART1 has been skipped by user.")
@@ -9734,6 +12057,7 @@ def part1(args, environsettings, input_object):
     return results, input_object
 
 
+@traced("enso")
 def sorting_part23(args, results, inpart, input_object, save_errors):
     ''' sorting only based on free energy'''
     au2kcal = 627.50947428
@@ -9883,6 +12207,133 @@ def sorting_part23(args, results, inpart, input_object, save_errors):
     return results, save_errors, minfree, input_object
 
 
+@traced("enso")
+def temperature_scan(args, results, inpart, cwd):
+    """free energies and Boltzmann populations of part2 or part3 for all
+    temperatures of --temperature-scan from the existing calculations,
+    written to <inpart>_temperature_scan.dat. COSMO-RS Gsolv and GFNn-xTB
+    RRHO are evaluated at every temperature, the other contributions do not
+    depend on the temperature."""
+    au2kcal = 627.50947428
+    au2j = 4.3597482e-18  # a.u.(hartree/mol) to J
+    kb = 1.3806485279e-23  # J/K
+    temperatures = args.temperaturescan
+    if inpart == 'part2':
+        energy = 'energy_opt'
+        gsolvmodel = args.gsolv2
+    else:
+        energy = 'sp3_energy'
+        gsolvmodel = args.sm3
+    cosmors = args.solv not in (None, 'gas') and gsolvmodel == 'cosmors'
+    warnings = []
+    gtot = {}
+    for conf in results:
+        if conf.free_energy is None:
+            continue
+        gsolv = [conf.gsolv] * len(temperatures)
+        if cosmors:
+            try:
+                with open(
+                    os.path.join(cwd, conf.name, "gsolv", "cosmors.json"),
+                    "r",
+                    encoding=coding,
+                    newline=None,
+                ) as inp:
+                    curve = json.load(inp)
+                fit = solvation_fit(curve["T"], [curve["gsolv"]])
+                gsolv = [float(fit.gsolv(t)[0]) / au2kcal for t in temperatures]
+                if temperatures[0] < min(fit.T) or temperatures[-1] > max(fit.T):
+                    warnings.append(
+                        "Gsolv is extrapolated outside of the COSMOtherm "
+                        "temperatures {} - {} K.".format(min(fit.T), max(fit.T))
+                    )
+            except (OSError, ValueError, KeyError, TypeError):
+                warnings.append(
+                    "Gsolv(T) of {} is not available, Gsolv at {} K is used "
+                    "instead.".format(conf.name, args.temperature)
+                )
+        rrho = [conf.rrho] * len(temperatures)
+        if args.rrhoprog == 'xtb':
+            job = qm_job()
+            job.workdir = os.path.join(cwd, conf.name, "rrho")
+            job.gfnv = args.gfnv
+            job.solv = args.solv
+            job.chrg = args.chrg
+            try:
+                data = job._cached_rrho(job._rrho_key())
+            except OSError:
+                data = None
+            if data is not None:
+                rrho = []
+                for t in temperatures:
+                    job.temperature = t
+                    rrho.append(job._eval_rrho(data))
+            else:
+                warnings.append(
+                    "The xTB hessian of {} is not available, RRHO at {} K is "
+                    "used instead.".format(conf.name, args.temperature)
+                )
+        elif args.rrhoprog in ('tm', 'orca'):
+            warnings.append(
+                "RRHO with {} is only available at {} K and used for all "
+                "temperatures.".format(str(args.rrhoprog).upper(), args.temperature)
+            )
+        gtot[conf.name] = [
+            getattr(conf, energy) + (g or 0.0) + (r or 0.0)
+            for g, r in zip(gsolv, rrho)
+        ]
+    if not gtot:
+        return
+    names = [conf.name for conf in results if conf.name in gtot]
+    degeneracy = {conf.name: conf.degeneracy for conf in results}
+    minfree = []
+    relative = {name: [] for name in names}
+    population = {name: [] for name in names}
+    for k, t in enumerate(temperatures):
+        lowest = min(gtot[name][k] for name in names)
+        minfree.append(lowest)
+        weights = [
+            degeneracy[name] * math.exp(-((gtot[name][k] - lowest) * au2j) / (kb * t))
+            for name in names
+        ]
+        total = math.fsum(weights)
+        for name, weight in zip(names, weights):
+            relative[name].append((gtot[name][k] - lowest) * au2kcal)
+            population[name].append(100.0 * weight / total)
+    length = max([len(name) for name in names] + [len("lowest Gtot [Eh]")])
+    lines = [
+        "{:{digits}}".format("T [K]", digits=length)
+        + "".join("{:>12.2f}".format(t) for t in temperatures),
+        "rel. Gtot [kcal/mol]",
+    ]
+    for name in names:
+        lines.append(
+            "{:{digits}}".format(name, digits=length)
+            + "".join("{:>12.2f}".format(x) for x in relative[name])
+        )
+    lines.append(
+        "{:{digits}}".format("lowest Gtot [Eh]", digits=length)
+        + "".join("{:>12.6f}".format(x) for x in minfree)
+    )
+    lines.append("Boltzmann population [%]")
+    for name in names:
+        lines.append(
+            "{:{digits}}".format(name, digits=length)
+            + "".join("{:>12.2f}".format(x) for x in population[name])
+        )
+    print("\n*********************************")
+    print("* {:^29} *".format("temperature scan of {}".format(inpart)))
+    print("*********************************")
+    for warning in sorted(set(warnings)):
+        print("WARNING: {}".format(warning))
+    with open(
+        "{}_temperature_scan.dat".format(inpart), "w", encoding=coding, newline=None
+    ) as out:
+        for line in lines:
+            print(line)
+            out.write(line + "\n")
+
+
 def printout_part2(args, input_object):
     """ printout of part1 only based on enso.json, no calculation!"""
     print("\n-----------------------------------------------------------")
@@ -9928,6 +12379,7 @@ def printout_part2(args, input_object):
         print('Error: No conformers found or file enso.json is missing!')
     return
 
+@traced("part")
 def part2(args, results, cwd, environsettings, input_object):
     """ """
     print("-----------------------------------------------------------")
@@ -10143,6 +12595,11 @@ def part2(args, results, cwd, environsettings, input_object):
         q = Queue()
         resultq = Queue()
 
+        # the jobs of each conformer (optimization, gas phase single-point,
+        # Gsolv and RRHO) are chained, the conformers are synchronised only
+        # for the sorting with the threshold of part2
+        chain = []
+        optimize = set()
         if results:
             # create new folders
             print("Setting up new directories.")
@@ -10171,24 +12628,6 @@ def part2(args, results, cwd, environsettings, input_object):
                 print("ERROR: No conformers left!")
                 input_object.write_json("save_and_exit")
 
-            if not args.part1:
-                instructprep = {
-                    "jobtype": "prep",
-                    "chrg": args.chrg,
-                    "unpaired": args.unpaired,
-                    "func": args.func,
-                    "solv": args.solv,
-                    "sm": args.sm,
-                    "environ": environsettings,
-                    "progsettings": {"omp": args.omp, "tempprogpath": ""},
-                }
-                ifcrashed = {"opt": "failed",
-                             "consider_for_part3": False,
-                             "backup_for_part3": False,
-                             "energy_opt": None,
-                }
-                results, input_object, save_errors = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'optimization', args.func, instructprep, ifcrashed)
-
             instructopt = {
                 "jobtype": "opt",
                 "chrg": args.chrg,
@@ -10207,63 +12646,60 @@ def part2(args, results, cwd, environsettings, input_object):
                 instructopt["jobtype"] = "opt"
             if job == tm_job:
                 instructopt["progsettings"]["tempprogpath"] = ""
+                # copy control --> control_opt
+                instructopt["copyfiles"] = [("control", "control_opt")]
             elif job == orca_job:
                 instructopt["progsettings"]["tempprogpath"] = input_object.orcapath
                 instructopt["progsettings"]["orca_old"] = input_object.orca_old
 
-            results = run_in_parallel(
-                q, resultq, job, int(args.maxthreads), results, instructopt, args.func
-            )
-            exit_log, fail_rate = check_tasks(results, args)
-            if args.prog == "tm":  # copy control --> control_opt
-                for item in results:
-                    try:
-                        shutil.copy(
-                            os.path.join(item.workdir, "control"),
-                            os.path.join(item.workdir, "control_opt"),
-                        )
-                    except:
-                        pass
-
-            # sort out conformers with crashed optimizations
-            for i in list(results):
+            def optdone(i):
+                """write the optimization to json_dict as soon as it is done"""
                 if not i.success:
-                    print(
-                        "\nERROR: A problem has occurred in the optimization of "
-                        "{}! The conformer is removed.\n".format(i.name)
-                    )
                     input_object.json_dict[i.name]["opt"] = "failed"
                     input_object.json_dict[i.name]["consider_for_part3"] = False
                     input_object.json_dict[i.name]["backup_for_part3"] = False
                     input_object.json_dict[i.name]["energy_opt"] = None
-                    save_errors.append(
-                        "Conformer {} was removed, because optimization "
-                        "failed!".format(i.name)
-                    )
-                    results.remove(i)
-
-            # write energies to json_dict
-            for i in results:
+                    return
                 i.energy_opt = i.energy
                 i.energy = None
                 input_object.json_dict[i.name]["opt"] = "calculated"
                 input_object.json_dict[i.name]["energy_opt"] = i.energy_opt
-                if args.solv in ('gas', None): 
+                if args.solv in ('gas', None):
                     input_object.json_dict[i.name]["sp_part2_gas"] = "calculated"
                     input_object.json_dict[i.name]["energy_sp_part2_gas"] = i.energy_opt
                 else:
                     input_object.json_dict[i.name]["sp_part2_solv"] = "calculated"
                     input_object.json_dict[i.name]["energy_sp_part2_solv"] = i.energy_opt
 
-            if exit_log:
-                print(
-                    "\nERROR: too many optimizations failed ({:.2f} %)!".format(
-                        fail_rate
-                    )
-                )
-                input_object.write_json("save_and_exit")
-            # always save json after optimization!
-            input_object.write_json("save")
+            optimize = set([i.name for i in results])
+            if not args.part1:
+                def prepdone(i):
+                    """write the failed preparation to json_dict"""
+                    if not i.success:
+                        input_object.json_dict[i.name]["opt"] = "failed"
+                        input_object.json_dict[i.name]["consider_for_part3"] = False
+                        input_object.json_dict[i.name]["backup_for_part3"] = False
+                        input_object.json_dict[i.name]["energy_opt"] = None
+
+                # the optimization of each conformer starts directly after
+                # its own preparation
+                chain.append({
+                    "jobtype": "prep",
+                    "chrg": args.chrg,
+                    "unpaired": args.unpaired,
+                    "func": args.func,
+                    "solv": args.solv,
+                    "sm": args.sm,
+                    "environ": environsettings,
+                    "progsettings": {"omp": args.omp, "tempprogpath": ""},
+                    "step": "prep",
+                    "conformers": optimize,
+                    "onresult": prepdone,
+                })
+            instructopt["step"] = "opt"
+            instructopt["conformers"] = optimize
+            instructopt["onresult"] = optdone
+            chain.append(instructopt)
             # end of optimization for new conformers
 
         # adding conformers calculated before to results
@@ -10284,6 +12720,8 @@ def part2(args, results, cwd, environsettings, input_object):
             print("ERROR: No conformers left!")
             input_object.write_json("save_and_exit")
 
+        singlepoint = set()
+        instructsolv = None
         if args.gsolv2 in input_object.smgsolv2 and args.solv not in ('gas', None):
         #if args.gsolv2 in ("cosmors", "gbsa_gsolv") and args.solv not in ('gas', None):
             # optimized in implicit solvent therefore gas phase single-point 
@@ -10292,10 +12730,9 @@ def part2(args, results, cwd, environsettings, input_object):
             tmp_results = []
             for i in list(results):
                 if input_object.json_dict[i.name]["sp_part2_gas"] == "calculated":
-                    # this conformer was already calculated successfully, 
-                    # move it tmp_results
+                    # this conformer was already calculated successfully
                     i.energy_opt = input_object.json_dict[i.name]["energy_sp_part2_gas"]
-                    tmp_results.append(results.pop(results.index(i)))
+                    tmp_results.append(i)
                 elif input_object.json_dict[i.name]["sp_part2_gas"] == "failed":
                     # this conformer was already calculated but the calculation 
                     # failed, remove this conformer
@@ -10306,11 +12743,11 @@ def part2(args, results, cwd, environsettings, input_object):
                     results.remove(i)
                 elif input_object.json_dict[i.name]["sp_part2_gas"] == "not_calculated":
                     # this conformer has to be calculated now
-                    pass
+                    singlepoint.add(i.name)
             print(
                 "number of further considered conformers: {:{digits}} {}".format(
                     "",
-                    str(len(results) + len(tmp_results)),
+                    str(len(results)),
                     digits=input_object.digilen - len("number of further considered conformers"),
                 )
             )
@@ -10320,61 +12757,50 @@ def part2(args, results, cwd, environsettings, input_object):
                     "conformers:".format(str(len(tmp_results)))
                 )
                 print_block([i.name for i in tmp_results])
-                if results:
+                if singlepoint:
                     print(
                         "The gas phase single-point is calculated now for {} "
-                        "conformers:".format(str(len(results))
+                        "conformers:".format(str(len(singlepoint))
                         )
                     )
-                    print_block([i.name for i in results])
+                    print_block([i.name for i in results if i.name in singlepoint])
                 else:
                     print("No conformers are considered additionally.")
             else:
                 print("Considered conformers:")
-                print_block([i.name for i in results])
+                print_block([i.name for i in results if i.name in singlepoint])
             print(
                 "Gas Phase Single-point at {} level,\n(to be used in combination"
                 " with the solvation correction).".format(args.func)
             )
-            # calculate SP in gas phase for all conformers that remain in results
-            if results:
-                if args.prog == "tm":
-                    for item in results:
-                        try:
-                            shutil.copy(
-                                os.path.join(item.workdir, "mos"),
-                                os.path.join(item.workdir, "mos-keep"),
-                            )
-                        except FileNotFoundError:
-                            pass
+            # calculate SP in gas phase for all conformers that were not
+            # calculated before
+            if singlepoint:
+                def prepgasdone(i):
+                    """write the failed preparation to json_dict"""
+                    if not i.success:
+                        input_object.json_dict[i.name]["sp_part2_gas"] = "failed"
+                        input_object.json_dict[i.name]["energy_sp_part2_gas"] = None
+                        input_object.json_dict[i.name]["consider_for_part3"] = False
+                        input_object.json_dict[i.name]["backup_for_part3"] = False
 
-                instructprep = {
+                chain.append({
                     "jobtype": "prep",
                     "chrg": args.chrg,
                     "unpaired": args.unpaired,
                     "func": args.func,
                     "solv": args.solv,
                     "sm": "gas",
+                    "guess": [args.func],  # orbitals of the optimization
                     "environ": environsettings,
                     "progsettings": {"omp": args.omp, "tempprogpath": ""},
-                }
-                ifcrashed = {"sp_part2_gas": "failed", 
-                            "energy_sp_part2_gas": None,
-                            "consider_for_part3": False,
-                            "backup_for_part3": False,
-                            }
-                results, input_object, save_errors = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'gas phase single-point', args.func, instructprep, ifcrashed)
-                if args.prog == "tm":
-                    for item in results:
-                        try:
-                            shutil.copy(
-                                os.path.join(item.workdir, "mos-keep"),
-                                os.path.join(item.workdir, "mos"),
-                            )
-                        except FileNotFoundError:
-                            pass
+                    "step": "prep_gas",
+                    "conformers": singlepoint,
+                    "onresult": prepgasdone,
+                })
 
-                # place single-points in queue:
+                # the single-point of each conformer starts directly after
+                # its own preparation
                 instructsp = {
                     "jobtype": "sp",
                     "chrg": args.chrg,
@@ -10387,57 +12813,29 @@ def part2(args, results, cwd, environsettings, input_object):
                 }
                 if job == tm_job:
                     instructsp["progsettings"]["tempprogpath"] = ""
+                    instructsp["copyfiles"] = [("control", "control_sp_gas")]
                 elif job == orca_job:
                     instructsp["progsettings"]["tempprogpath"] = input_object.orcapath
                     instructsp["progsettings"]["orca_old"] = input_object.orca_old
 
-                results = run_in_parallel(
-                    q, resultq, job, int(args.maxthreads), results, instructsp, args.func
-                )
-                exit_log, fail_rate = check_tasks(results, args)
-
-                if args.prog == "tm":
-                    for item in results:
-                        try:
-                            shutil.copy(
-                                os.path.join(item.workdir, "control"),
-                                os.path.join(item.workdir, "control_sp_gas"),
-                            )
-                        except:
-                            pass
-
-                # sort out conformers with crashed single-points
-                for i in list(results):
+                def spdone(i):
+                    """write the single-point to json_dict as soon as it is done"""
                     if not i.success:
-                        print(
-                            "\nERROR: A problem has occurred in the single-point "
-                            "calculation of {}! The conformer is "
-                            "removed.\n".format(i.name)
-                        )
                         input_object.json_dict[i.name]["sp_part2_gas"] = "failed"
                         input_object.json_dict[i.name]["energy_sp_part2_gas"] = None
                         input_object.json_dict[i.name]["consider_for_part3"] = False
                         input_object.json_dict[i.name]["backup_for_part3"] = False
-                        save_errors.append(
-                            "Error in single-point calculation for "
-                            "conformer {}".format(i.name)
-                        )
-                        results.remove(i)
-                for i in results:
+                        return
                     i.energy_opt = i.energy
                     i.energy = None
                     input_object.json_dict[i.name]["sp_part2_gas"] = "calculated"
                     input_object.json_dict[i.name]["energy_sp_part2_gas"] = i.energy_opt
 
-                if exit_log:
-                    print(
-                        "\nERROR: too many single-point calculations "
-                        "failed ({:.2f} %)!".format(fail_rate)
-                    )
-                    input_object.write_json("save_and_exit")
+                instructsp["step"] = "sp_gas"
+                instructsp["conformers"] = singlepoint
+                instructsp["onresult"] = spdone
+                chain.append(instructsp)
 
-            else:  # all conformers were calculated before
-                results = []
             # adding conformers calculated before to results
             try:
                 length = max([len(str(i.name)) for i in tmp_results])
@@ -10449,8 +12847,6 @@ def part2(args, results, cwd, environsettings, input_object):
                         item.name, item.energy_opt, digits=length
                     )
                 )
-                results.append(item)
-            results.sort(key=lambda x: int(x.name[4:]))
 
             # check if at least one conformer is left:
             if not results:
@@ -10458,20 +12854,11 @@ def part2(args, results, cwd, environsettings, input_object):
                 input_object.write_json("save_and_exit")
 
             # calculate only additive solvation: GBSA-Gsolv or COSMO-RS smd_gsolv
-            results, input_object = additive_gsolv(
-                args,
-                q,
-                resultq,
-                job,
-                True,
-                False,
-                results,
-                input_object,
-                save_errors,
-                cwd,
-                environsettings
+            results, instructsolv = gsolv_step(
+                args, True, False, results, input_object, environsettings
             )
-            #
+            if instructsolv is not None:
+                chain.append(instructsolv)
         elif args.gsolv2 not in input_object.smgsolv2 and args.solv not in ('gas', None):
             print("Gsolv values are included in the optimizations.")
             for conf in results:
@@ -10480,6 +12867,7 @@ def part2(args, results, cwd, environsettings, input_object):
             print("Since calculation is in the gas phase, Gsolv is not required.")
             for conf in results:
                 conf.gsolv = 0.0
+        instructrrho = None
         if not args.rrhoprog:
             # skipp RRHO calculation:
             for conf in results:
@@ -10487,24 +12875,49 @@ def part2(args, results, cwd, environsettings, input_object):
             # enso.json will not be updated with rrho information!
         else:
             # run RRHO
-            results, input_object, save_errors = rrho_part23(
-                args,
-                q,
-                resultq,
-                job,
-                True,
-                False,
-                results,
-                input_object,
-                save_errors,
-                cwd,
-                environsettings
+            results, instructrrho = rrho_step(
+                args, job, True, False, results, input_object, environsettings
+            )
+            if instructrrho is not None:
+                chain.append(instructrrho)
+
+        if chain:
+            results = run_chain_in_parallel(
+                q, resultq, job, int(args.maxthreads), results, chain, args.func,
+                input_object=input_object
             )
+            # sort out conformers with crashed jobs
+            results = remove_failed(
+                args, results, "prep", optimize, "optimization preparation",
+                input_object, save_errors
+            )
+            results = remove_failed(
+                args, results, "opt", optimize, "optimization", input_object, save_errors
+            )
+            results = remove_failed(
+                args, results, "prep_gas", singlepoint,
+                "gas phase single-point preparation", input_object, save_errors
+            )
+            results = remove_failed(
+                args, results, "sp_gas", singlepoint,
+                "gas phase single-point calculation", input_object, save_errors
+            )
+            results = gsolv_check(
+                args, True, False, results, instructsolv, input_object, save_errors, cwd
+            )
+            results = rrho_check(args, results, instructrrho, input_object, save_errors, cwd)
+            # always save json after optimization!
+            input_object.write_json("save")
+        if not results:
+            print("ERROR: No conformers left!")
+            input_object.write_json("save_and_exit")
         #sorting for part2 on low level free energy basis:
         results, save_errors, minfree, input_object = sorting_part23(args, results, 'part2', input_object, save_errors)
+        if args.temperaturescan:
+            temperature_scan(args, results, 'part2', cwd)
 
         ### check if conformers are rotamers or identical, possibly sort them out
-        rotdict = crest_routine(args, results, args.func, args.crestcheck, input_object.json_dict, input_object.crestpath, environsettings)
+        rotdict = crest_routine(args, results, args.func, args.crestcheck, input_object.json_dict)
         results.sort(key=lambda x: int(x.name[4:]))
         # evaluate which conformers to consider further
         # energy from part2 should be smaller than threshold
@@ -10561,6 +12974,8 @@ def part2(args, results, cwd, environsettings, input_object):
                 print(save_errors.pop())
             print("***---------------------------------------------------------***")
 
+        print_resources("part2")
+        geometries.discard()
         print("\nEND of part2.\n")
     else:  # if part2 is switched off
         print("PART2 has been skipped by user!")
@@ -10621,6 +13036,7 @@ def printout_part3(args, input_object):
         print('Error: No conformers found or file enso.json is missing!')
     return
 
+@traced("part")
 def part3(args, results, cwd, environsettings, input_object):
     """Calculation of Boltzmann weights through high level free energy calculation """
     save_errors = []
@@ -11005,6 +13421,7 @@ def part3(args, results, cwd, environsettings, input_object):
                         "basis": args.basis3,
                         "solv": args.solv,
                         "sm": "gas",
+                        "guess": [args.func],  # orbitals of part2
                         "environ": environsettings,
                         "progsettings": {"omp": args.omp, "tempprogpath": ""},
                     }
@@ -11030,8 +13447,6 @@ def part3(args, results, cwd, environsettings, input_object):
                     else:
                         ifcrashed["sp_part3_solv"] = "failed"
 
-                    results, input_object, save_errors = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'single-point', args.func3, instructprep, ifcrashed)
-
                     # place single-point work in queue:
                     instructsp = {
                         "jobtype": "sp",
@@ -11049,54 +13464,46 @@ def part3(args, results, cwd, environsettings, input_object):
                         instructsp["progsettings"]["tempprogpath"] = input_object.orcapath
                         instructsp["progsettings"]["orca_old"] = input_object.orca_old
 
-                    results = run_in_parallel(
-                        q, resultq, job, int(args.maxthreads), results, instructsp, args.func3
-                    )
-                    exit_log, fail_rate = check_tasks(results, args)
-
-                    # sort out conformers with crashed single-points
-                    for i in list(results):
-                        if not i.success:
-                            print(
-                                "\nERROR: A problem has occurred in the "
-                                "single-point calculation of {}! The conformer"
-                                " is removed.\n".format(i.name)
-                            )
-                            input_object.json_dict[i.name]["sp_part3"] = "failed"
-                            ###CHECK
-                            if args.solv in ("gas", None) or args.sm3 in input_object.smgsolv2:
-                                input_object.json_dict[conf.name]["sp_part3_gas"] = "failed"
-                            else:
-                                input_object.json_dict[conf.name]["sp_part3_solv"] = "failed"
-                            input_object.json_dict[i.name]["consider_for_part4"] = False
-                            input_object.json_dict[i.name]["energy_sp_part3"] = None
-                            save_errors.append(
-                                "Conformer {} was removed, because the single-point"
-                                " calculation failed!".format(i.name)
-                            )
-                            results.remove(i)
-                    # write energies to json_dict
-                    for conf in results:
+                    def spdone(conf):
+                        """write the single-point to json_dict as soon as it is done"""
+                        if args.solv in ("gas", None) or args.sm3 in input_object.smgsolv2:
+                            ext = "gas"
+                        else:
+                            ext = "solv"
+                        if not conf.success:
+                            input_object.json_dict[conf.name]["sp_part3"] = "failed"
+                            input_object.json_dict[conf.name]["sp_part3_" + ext] = "failed"
+                            input_object.json_dict[conf.name]["consider_for_part4"] = False
+                            input_object.json_dict[conf.name]["energy_sp_part3"] = None
+                            return
                         # write energy to sp3_energy
                         conf.sp3_energy = conf.energy
                         conf.energy = None
                         input_object.json_dict[conf.name]["sp_part3"] = "calculated"
                         input_object.json_dict[conf.name]["energy_sp_part3"] = conf.sp3_energy
-                        ###CHECK
-                        if args.solv in ("gas", None) or args.sm3 in input_object.smgsolv2:
-                            input_object.json_dict[conf.name]["sp_part3_gas"] = "calculated"
-                            input_object.json_dict[conf.name]["energy_sp_part3_gas"] = conf.sp3_energy
-                        else:
-                            input_object.json_dict[conf.name]["sp_part3_solv"] = "calculated"
-                            input_object.json_dict[conf.name]["energy_sp_part3_solv"] = conf.sp3_energy
-                    if exit_log:
-                        print(
-                            "\nERROR: too many single-points failed ({:.2f} %)!".format(
-                                fail_rate
-                            )
-                        )
-                        input_object.write_json("save_and_exit")
-                    # end of sp for new conformers
+                        input_object.json_dict[conf.name]["sp_part3_" + ext] = "calculated"
+                        input_object.json_dict[conf.name]["energy_sp_part3_" + ext] = conf.sp3_energy
+
+                    def prepdone(conf):
+                        """write the failed preparation to json_dict"""
+                        if not conf.success:
+                            for key, value in ifcrashed.items():
+                                input_object.json_dict[conf.name][key] = value
+
+                    # the single-point of each conformer starts directly after
+                    # its own preparation, Gsolv and RRHO directly after the
+                    # single-point
+                    singlepoint = set([i.name for i in results])
+                    instructprep["step"] = "prep"
+                    instructprep["conformers"] = singlepoint
+                    instructprep["onresult"] = prepdone
+                    instructsp["step"] = "sp"
+                    instructsp["conformers"] = singlepoint
+                    instructsp["onresult"] = spdone
+                    chain = [instructprep, instructsp]
+                else:
+                    singlepoint = set()
+                    chain = []
 
                 # adding conformers calculated before to results
                 try:
@@ -11117,21 +13524,14 @@ def part3(args, results, cwd, environsettings, input_object):
                     input_object.write_json("save_and_exit")
 
                 print("\nGSOLV")
+                instructsolv = None
                 if args.sm3 in input_object.smgsolv2 and args.solv not in (None, 'gas'):
                     # calculate only additive solvation: GBSA-Gsolv or COSMO-RS smd_gsolv
-                    results, input_object = additive_gsolv(
-                        args,
-                        q,
-                        resultq,
-                        job,
-                        False,
-                        True,
-                        results,
-                        input_object,
-                        save_errors,
-                        cwd,
-                        environsettings
+                    results, instructsolv = gsolv_step(
+                        args, False, True, results, input_object, environsettings
                     )
+                    if instructsolv is not None:
+                        chain.append(instructsolv)
                 else: # not additive solvation!
                     for conf in results:
                         # if additive solvation was used in part2 but not in 
@@ -11147,6 +13547,7 @@ def part3(args, results, cwd, environsettings, input_object):
                             "Since the calculation is performed in gas phase, "
                             "Gsolv is not required.\n"
                         )
+                instructrrho = None
                 if not args.rrhoprog:
                     # skipp RRHO calculation:
                     for conf in results:
@@ -11154,19 +13555,36 @@ def part3(args, results, cwd, environsettings, input_object):
                     # enso.json will not be updated with rrho information!
                 else:
                     # run RRHO
-                    results, input_object, save_errors = rrho_part23(
-                        args,
-                        q,
-                        resultq,
-                        job,
-                        False,
-                        True,
-                        results,
-                        input_object,
-                        save_errors,
-                        cwd,
-                        environsettings
+                    results, instructrrho = rrho_step(
+                        args, job, False, True, results, input_object, environsettings
                     )
+                    if instructrrho is not None:
+                        chain.append(instructrrho)
+
+                if chain:
+                    results = run_chain_in_parallel(
+                        q, resultq, job, int(args.maxthreads), results, chain, args.func3,
+                        input_object=input_object
+                    )
+                    # sort out conformers with crashed jobs
+                    results = remove_failed(
+                        args, results, "prep", singlepoint, "single-point preparation",
+                        input_object, save_errors
+                    )
+                    results = remove_failed(
+                        args, results, "sp", singlepoint, "single-point calculation",
+                        input_object, save_errors
+                    )
+                    results = gsolv_check(
+                        args, False, True, results, instructsolv, input_object,
+                        save_errors, cwd
+                    )
+                    results = rrho_check(
+                        args, results, instructrrho, input_object, save_errors, cwd
+                    )
+                if not results:
+                    print("ERROR: No conformers left!")
+                    input_object.write_json("save_and_exit")
             #END if not args.boltzmann
 
             ######XXX
@@ -11199,6 +13617,8 @@ def part3(args, results, cwd, environsettings, input_object):
             print('')
             # get gi degeneracy for results and tmp_results
             results, tmp_results, input_object = get_degeneracy(cwd, results, tmp_results, input_object)
+            if args.temperaturescan:
+                temperature_scan(args, results, 'part3', cwd)
             print("Calculate Boltzmann populations")
             au2j = 4.3597482e-18  # a.u.(hartree/mol) to J
             # kcalmol2J = 7.993840458653155e-21  # kcal/mol to J  =   *4.184 / N_{A}
@@ -11314,6 +13734,8 @@ def part3(args, results, cwd, environsettings, input_object):
                 print(save_errors.pop())
             print("***---------------------------------------------------------***")
 
+        print_resources("part3")
+        geometries.discard()
         print("\n END of part3.\n")
     else:  # if part3 is switched off
         print("PART3 has been skipped by user.")
@@ -11325,6 +13747,7 @@ def part3(args, results, cwd, environsettings, input_object):
     return results, input_object
 
 
+@traced("part")
 def part4(args, results, cwd, environsettings, rotdict, input_object):
     """Calculation of coupling and shielding constants on populated conformers """
     save_errors = []
@@ -11574,6 +13997,7 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                         "solv": args.solv,
                         "sm": args.sm4,
                         "NMR": True,
+                        "guess": [args.func3, args.func],
                         "environ": environsettings,
                         "progsettings": {"omp": args.omp, "tempprogpath": ""},
                         "hactive": args.hactive,
@@ -11587,8 +14011,6 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                         # update json_dict
                         ifcrashed["".join(nuc + "_J")] = "failed"
                     
-                    results, input_object, save_errors, removelist = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'single-point ', 'NMR', instructprep, ifcrashed, removelist)
-
                     # place SP work in queue:
                     instructsp = {
                         "jobtype": "sp",
@@ -11605,35 +14027,68 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                     elif job == orca_job:
                         instructsp["progsettings"]["tempprogpath"] = input_object.orcapath
                         instructsp["progsettings"]["orca_old"] = input_object.orca_old
+                    # move control to control_J and mos to mos-keep_J
+                    instructsp["copyfiles"] = [
+                        ("control", "control_J"), ("mos", "mos-keep_J")
+                    ]
 
-                    results = run_in_parallel(
-                        q, resultq, job, int(args.maxthreads), results, instructsp, "NMR"
-                    )
-                    exit_log, fail_rate = check_tasks(results, args)
+                # calculate J
+                instruct_j = {
+                    "jobtype": "nmrJ",
+                    "chrg": args.chrg,
+                    "unpaired": args.unpaired,
+                    "func": args.funcJ,
+                    "basis": args.basisJ,
+                    "solv": args.solv,
+                    "sm": args.sm4,
+                    "guess": [args.func3, args.func],
+                    "environ": environsettings,
+                    "progsettings": {"omp": args.omp},
+                    "hactive": args.hactive,
+                    "cactive": args.cactive,
+                    "factive": args.factive,
+                    "pactive": args.pactive,
+                    "siactive": args.siactive,
+                }
+                if job == tm_job:
+                    instruct_j["progsettings"]["tempprogpath"] = input_object.escfpath
+                elif job == orca_job:
+                    instruct_j["progsettings"]["tempprogpath"] = input_object.orcapath
+                    instruct_j["progsettings"]["orca_old"] = input_object.orca_old
 
-                    # move control to control_J
-                    for item in results:
-                        try:
-                            shutil.copy(
-                                os.path.join(item.workdir, "control"),
-                                os.path.join(item.workdir, "control_J"),
-                            )
-                        except FileNotFoundError:
-                            pass
+                def jdone(item):
+                    """write the coupling calculation to json_dict as soon as
+                    it is done"""
+                    for nuc in input_object.spectrumlist:
+                        nuc_string = "".join(nuc + "_J")
+                        if item.success:
+                            input_object.json_dict[item.name][nuc_string] = "calculated"
+                        else:
+                            input_object.json_dict[item.name][nuc_string] = "failed"
+
+                instruct_j["onresult"] = jdone
+                if args.prog4 == 'tm':
+                    # the single-point of each conformer starts directly after
+                    # its own preparation and the couplings directly after
+                    # the single-point
+                    def spdone(item):
+                        """conformers with failed single-points are done"""
+                        if not item.success:
+                            jdone(item)
+
+                    instructsp["onresult"] = spdone
+                    results, input_object, save_errors, removelist = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'single-point ', 'NMR', instructprep, ifcrashed, removelist, chain=[instructsp, instruct_j])
+                    exit_log, fail_rate = check_tasks(results, args, failedjob="sp")
 
                     # sort out conformers for which the single-point calculation failed
                     for item in list(results):
-                        if not item.success:
+                        if not item.success and item.failedjob == "sp":
                             print(
                                 "\nERROR: A problem has occurred in the "
                                 "single-point calculation of {} required for "
                                 "the coupling calculation with TM! The conformer "
                                 "is removed.\n".format(item.name)
                             )
-                            for nuc in input_object.spectrumlist:
-                                # update json_dict
-                                nuc_string = "".join(nuc + "_J")
-                                input_object.json_dict[item.name][nuc_string] = "failed"
                             save_errors.append(
                                 "Conformer {} was removed, because the "
                                 "single-point calculation failed!".format(item.name)
@@ -11647,45 +14102,12 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                             )
                         )
                         input_object.write_json("save_and_exit")
-
-                    # move mos to mos-keep_J
-                    for item in results:
-                        try:
-                            shutil.copy(
-                                os.path.join(item.workdir, "mos"),
-                                os.path.join(item.workdir, "mos-keep_J"),
-                            )
-                        except FileNotFoundError:
-                            pass
                     print("single-points completed.")
-
-                # calculate J
-                # place work in queue
-                instruct_j = {
-                    "jobtype": "nmrJ",
-                    "chrg": args.chrg,
-                    "unpaired": args.unpaired,
-                    "func": args.funcJ,
-                    "basis": args.basisJ,
-                    "solv": args.solv,
-                    "sm": args.sm4,
-                    "environ": environsettings,
-                    "progsettings": {"omp": args.omp},
-                    "hactive": args.hactive,
-                    "cactive": args.cactive,
-                    "factive": args.factive,
-                    "pactive": args.pactive,
-                    "siactive": args.siactive,
-                }
-                if job == tm_job:
-                    instruct_j["progsettings"]["tempprogpath"] = input_object.escfpath
-                elif job == orca_job:
-                    instruct_j["progsettings"]["tempprogpath"] = input_object.orcapath
-                    instruct_j["progsettings"]["orca_old"] = input_object.orca_old
-
-                results = run_in_parallel(
-                    q, resultq, job, int(args.maxthreads), results, instruct_j, "NMR"
-                )
+                else:
+                    results = run_chain_in_parallel(
+                        q, resultq, job, int(args.maxthreads), results, [instruct_j], "NMR",
+                        input_object=input_object
+                    )
                 exit_log, fail_rate = check_tasks(results, args)
 
                 # sort out conformers for which the coupling calculation failed
@@ -11697,19 +14119,12 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                                 item.name
                             )
                         )
-                        for nuc in input_object.spectrumlist:
-                            input_object.json_dict[item.name]["".join(nuc + "_J")] = "failed"
                         save_errors.append(
                             "Conformer {} was removed, because the couplings calculation "
                             "failed!".format(item.name)
                         )
                         results.remove(item)
                         removelist.append(item.name)
-                # update json_dict
-                for item in results:
-                    for nuc in input_object.spectrumlist:
-                        nuc_string = "".join(nuc + "_J")
-                        input_object.json_dict[item.name][nuc_string] = "calculated"
 
                 if exit_log:
                     print(
@@ -11880,106 +14295,6 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                     print("ERROR: No conformers left!")
                     input_object.write_json("save_and_exit")
 
-                if args.prog4 == 'tm':
-                    if not args.calcJ or (args.funcJ != args.funcS) or (args.basisS != args.basisJ):
-                        # need converged mos, therefore,
-                        # cefine and single-point have to be performed before NMR calculations
-                        # place work in queue:
-                        instructprep = {
-                            "jobtype": "prep",
-                            "chrg": args.chrg,
-                            "unpaired": args.unpaired,
-                            "func": args.funcS,
-                            "basis": args.basisS,
-                            "solv": args.solv,
-                            "sm": args.sm4,
-                            "NMR": True,
-                            "environ": environsettings,
-                            "progsettings": {"omp": args.omp, "tempprogpath": ""},
-                            "hactive": args.hactive,
-                            "cactive": args.cactive,
-                            "factive": args.factive,
-                            "pactive": args.pactive,
-                            "siactive": args.siactive,
-                        }
-                        ifcrashed = {}
-                        for nuc in input_object.spectrumlist:
-                            # update json_dict
-                            ifcrashed["".join(nuc + "_S")] = "failed"
-                        
-                        results, input_object, save_errors, removelist = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'single-point', 'NMR', instructprep, ifcrashed, removelist)
-
-                        # place SP work in queue:
-                        instructsp = {
-                            "jobtype": "sp",
-                            "chrg": args.chrg,
-                            "unpaired": args.unpaired,
-                            "func": args.funcS,
-                            "solv": args.solv,
-                            "basis": args.basisS,
-                            "environ": environsettings,
-                            "progsettings": {"omp": args.omp, "tempprogpath": ""},
-                        }
-                        if job == tm_job:
-                            instructsp["progsettings"]["tempprogpath"] = ""
-                        elif job == orca_job:
-                            instructsp["progsettings"]["tempprogpath"] = input_object.orcapath
-                            instructsp["progsettings"]["orca_old"] = input_object.orca_old
-                        results = run_in_parallel(
-                            q, resultq, job, int(args.maxthreads), results, instructsp, "NMR"
-                        )
-                        exit_log, fail_rate = check_tasks(results, args)
-
-                        # move control to control_S
-                        for item in results:
-                            try:
-                                shutil.copy(
-                                    os.path.join(item.workdir, "control"),
-                                    os.path.join(item.workdir, "control_S"),
-                                )
-                            except FileNotFoundError:
-                                pass
-
-                        # sort out conformers for which the single-point calculation failed
-                        for item in list(results):
-                            if not item.success:
-                                print(
-                                    "\nERROR: A problem has occurred in the single-point preparation of {} required "
-                                    "for the shielding calculation with TM! The conformer is removed.\n".format(
-                                        item.name
-                                    )
-                                )
-                                for nuc in input_object.spectrumlist:
-                                    # update json_dict
-                                    nuc_string = "".join(nuc + "_S")
-                                    input_object.json_dict[item.name][nuc_string] = "failed"
-                                save_errors.append(
-                                    "Conformer {} was removed, because single-point calculation "
-                                    "failed!".format(item.name)
-                                )
-                                results.remove(item)
-                                removelist.append(item.name)
-
-                        # move mos to mos-keep_S
-                        for item in results:
-                            try:
-                                shutil.copy(
-                                    os.path.join(item.workdir, "mos"),
-                                    os.path.join(item.workdir, "mos-keep_S"),
-                                )
-                            except FileNotFoundError:
-                                pass
-
-                        if exit_log:
-                            print(
-                                "\nERROR: too many single-points failed ({:.2f} %)!".format(
-                                    fail_rate
-                                )
-                            )
-                            input_object.write_json("save_and_exit")
-
-                        print("single-points completed.")
-
                 instruct_s = {
                     "jobtype": "nmrS",
                     "chrg": args.chrg,
@@ -11988,6 +14303,7 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                     "basis": args.basisS,
                     "solv": args.solv,
                     "sm": args.sm4,
+                    "guess": ["NMR", args.func3, args.func],
                     "environ": environsettings,
                     "progsettings": {"omp": args.omp, "tempprogpath": ""},
                     "hactive": args.hactive,
@@ -12002,9 +14318,105 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                     instruct_s["progsettings"]["tempprogpath"] = input_object.orcapath
                     instruct_s["progsettings"]["orca_old"] = input_object.orca_old
 
-                results = run_in_parallel(
-                    q, resultq, job, int(args.maxthreads), results, instruct_s, "NMR"
-                )
+                def sdone(conf):
+                    """write the shielding calculation to json_dict as soon as
+                    it is done"""
+                    for nuc in input_object.spectrumlist:
+                        if conf.success:
+                            input_object.json_dict[conf.name]["".join(nuc + "_S")] = "calculated"
+                        else:
+                            input_object.json_dict[conf.name]["".join(nuc + "_S")] = "failed"
+
+                instruct_s["onresult"] = sdone
+                if args.prog4 == 'tm' and (
+                    not args.calcJ or (args.funcJ != args.funcS) or (args.basisS != args.basisJ)
+                ):
+                    # need converged mos, therefore,
+                    # cefine and single-point have to be performed before NMR calculations
+                    # place work in queue:
+                    instructprep = {
+                        "jobtype": "prep",
+                        "chrg": args.chrg,
+                        "unpaired": args.unpaired,
+                        "func": args.funcS,
+                        "basis": args.basisS,
+                        "solv": args.solv,
+                        "sm": args.sm4,
+                        "NMR": True,
+                        "guess": ["NMR", args.func3, args.func],
+                        "environ": environsettings,
+                        "progsettings": {"omp": args.omp, "tempprogpath": ""},
+                        "hactive": args.hactive,
+                        "cactive": args.cactive,
+                        "factive": args.factive,
+                        "pactive": args.pactive,
+                        "siactive": args.siactive,
+                    }
+                    ifcrashed = {}
+                    for nuc in input_object.spectrumlist:
+                        # update json_dict
+                        ifcrashed["".join(nuc + "_S")] = "failed"
+
+                    # place SP work in queue:
+                    instructsp = {
+                        "jobtype": "sp",
+                        "chrg": args.chrg,
+                        "unpaired": args.unpaired,
+                        "func": args.funcS,
+                        "solv": args.solv,
+                        "basis": args.basisS,
+                        "environ": environsettings,
+                        "progsettings": {"omp": args.omp, "tempprogpath": ""},
+                        # move control to control_S and mos to mos-keep_S
+                        "copyfiles": [("control", "control_S"), ("mos", "mos-keep_S")],
+                    }
+                    if job == tm_job:
+                        instructsp["progsettings"]["tempprogpath"] = ""
+                    elif job == orca_job:
+                        instructsp["progsettings"]["tempprogpath"] = input_object.orcapath
+                        instructsp["progsettings"]["orca_old"] = input_object.orca_old
+
+                    def spdone(conf):
+                        """conformers with failed single-points are done"""
+                        if not conf.success:
+                            sdone(conf)
+
+                    instructsp["onresult"] = spdone
+                    # the single-point of each conformer starts directly after
+                    # its own preparation and the shieldings directly after
+                    # the single-point
+                    results, input_object, save_errors, removelist = prepforQM(args, q, resultq, job, save_errors, results, input_object, 'single-point', 'NMR', instructprep, ifcrashed, removelist, chain=[instructsp, instruct_s])
+                    exit_log, fail_rate = check_tasks(results, args, failedjob="sp")
+
+                    # sort out conformers for which the single-point calculation failed
+                    for item in list(results):
+                        if not item.success and item.failedjob == "sp":
+                            print(
+                                "\nERROR: A problem has occurred in the single-point preparation of {} required "
+                                "for the shielding calculation with TM! The conformer is removed.\n".format(
+                                    item.name
+                                )
+                            )
+                            save_errors.append(
+                                "Conformer {} was removed, because single-point calculation "
+                                "failed!".format(item.name)
+                            )
+                            results.remove(item)
+                            removelist.append(item.name)
+                    if exit_log:
+                        print(
+                            "\nERROR: too many single-points failed ({:.2f} %)!".format(
+                                fail_rate
+                            )
+                        )
+                        input_object.write_json("save_and_exit")
+
+                    print("single-points completed.")
+                else:
+                    results = run_chain_in_parallel(
+                        q, resultq, job, int(args.maxthreads), results, [instruct_s], "NMR",
+                        input_object=input_object
+                    )
                 exit_log, fail_rate = check_tasks(results, args)
 
                 # sort out conformers for which the coupling calculation failed
@@ -12015,17 +14427,12 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
                                 conf.name
                             )
                         )
-                        for nuc in input_object.spectrumlist:
-                            input_object.json_dict[conf.name]["".join(nuc + "_S")] = "failed"
                         save_errors.append(
                             "Conformer {} was removed, because the shielding calculation "
                             "failed!".format(conf.name)
                         )
                         results.remove(conf)
                         removelist.append(conf.name)
-                    else:
-                        for nuc in input_object.spectrumlist:
-                            input_object.json_dict[conf.name]["".join(nuc + "_S")] = "calculated"
 
                 if exit_log:
                     print(
@@ -12079,6 +14486,8 @@ def part4(args, results, cwd, environsettings, rotdict, input_object):
         if removelist:
             correct_anmr_enso(cwd, removelist)
 
+        print_resources("part4")
+        geometries.discard()
         print("\n END of part4.\n")
     else:  # if part4 is switched off
         print("PART4 has been skipped by user\n")
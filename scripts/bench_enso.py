@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+# This file is part of ENSO.
+# Copyright (C) 2020 Fabian Bohle
+#
+# ENSO is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ENSO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ENSO. If not, see <https://www.gnu.org/licenses/>.
+
+
+""" run main() of enso.py end to end (part1 to part4) on synthetic ensembles
+with the stand-in QM programs of fakeqm.py and report the time ENSO spends
+per job and per stage besides the programs (from the trace of the run).
+The overhead of a stage is the time of all worker slots minus the time the
+programs ran, divided by the number of jobs; the serial part is the time
+outside of the stages. cefine is not run through the job runner of ENSO,
+so its calls count as ENSO time. With --baseline the run fails (exit code
+1) if the overhead per job increased by more than --max-regression.
+Usage: ./bench_enso.py [-n 10 1000] [-P 4] [-prog orca|tm] [--sleep 0.0]
+                       [--save bench.json] [--baseline bench.json]"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+programs = (
+    "xtb", "cefine", "ridft", "jobex", "orca", "cosmotherm", "escf", "mpshift",
+    "crest",
+)
+
+# ethanol in Angstrom, the conformers are random displacements of it
+molecule = (
+    ("C", -0.0015, 1.3860, 0.0000),
+    ("C", 0.0021, -0.1324, 0.0000),
+    ("O", -1.3506, -0.5653, 0.0000),
+    ("H", 1.0252, 1.7723, 0.0000),
+    ("H", -0.5147, 1.7607, 0.8876),
+    ("H", -0.5147, 1.7607, -0.8876),
+    ("H", 0.5148, -0.5122, 0.8886),
+    ("H", 0.5148, -0.5122, -0.8886),
+    ("H", -1.3710, -1.5256, 0.0000),
+)
+
+
+def load_enso(path):
+    """import enso.py from path, a fresh module for every run"""
+    spec = importlib.util.spec_from_file_location("enso", path)
+    enso = importlib.util.module_from_spec(spec)
+    sys.modules["enso"] = enso
+    spec.loader.exec_module(enso)
+    return enso
+
+
+def write_ensemble(filename, nconf, seed=1):
+    """crest_conformers.xyz with nconf distinct conformers"""
+    rng = random.Random(seed)
+    with open(filename, "w", newline=None) as out:
+        for i in range(nconf):
+            out.write("{}\n".format(len(molecule)))
+            out.write("  {:.8f}\n".format(-11.39 - 1.0e-5 * rng.random()))
+            for atom, x, y, z in molecule:
+                out.write(
+                    "{:2} {:12.6f} {:12.6f} {:12.6f}\n".format(
+                        atom,
+                        x + rng.uniform(-0.15, 0.15),
+                        y + rng.uniform(-0.15, 0.15),
+                        z + rng.uniform(-0.15, 0.15),
+                    )
+                )
+
+
+def setup(enso, workdir, fakeqm):
+    """bin folder with the stand-in programs and .ensorc in workdir"""
+    bindir = os.path.join(workdir, "bin")
+    os.makedirs(bindir)
+    for program in programs:
+        os.symlink(fakeqm, os.path.join(bindir, program))
+    ensorc = os.path.join(workdir, ".ensorc")
+    enso.handle_input().write_ensorc(ensorc)
+    paths = {
+        "ORCA:": bindir,
+        "GFN-xTB:": os.path.join(bindir, "xtb"),
+        "CREST:": os.path.join(bindir, "crest"),
+        "mpshift:": os.path.join(bindir, "mpshift"),
+        "escf:": os.path.join(bindir, "escf"),
+    }
+    with open(ensorc, "r", newline=None) as inp:
+        lines = inp.readlines()
+    with open(ensorc, "w", newline=None) as out:
+        for line in lines:
+            key = line.split(" /")[0]
+            if key in paths:
+                line = "{} {}\n".format(key, paths[key])
+            out.write(line)
+    return bindir
+
+
+def overhead(events, maxthreads):
+    """overhead per stage from the trace events of one run"""
+    stages = [e for e in events if e.get("cat") == "stage"]
+    calls = [e for e in events if e.get("cat") == "program"]
+    table = []
+    for stage in stages:
+        start, end = stage["ts"], stage["ts"] + stage["dur"]
+        njobs = stage["args"].get("jobs", 0)
+        busy = math.fsum(
+            e["dur"] for e in calls if start <= e["ts"] and e["ts"] + e["dur"] <= end
+        )
+        slots = max(1, min(maxthreads, njobs))
+        table.append(
+            {
+                "stage": stage["name"],
+                "jobs": njobs,
+                "wall": stage["dur"] / 1.0e6,
+                "programs": busy / 1.0e6,
+                "overhead": (stage["dur"] * slots - busy) / 1.0e6,
+            }
+        )
+    return table
+
+
+def run(enso, nconf, args, fakeqm):
+    """complete ENSO run on nconf conformers, returns the report"""
+    cwd = os.getcwd()
+    environ = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        bindir = setup(enso, tmp, fakeqm)
+        write_ensemble(os.path.join(tmp, "crest_conformers.xyz"), nconf)
+        os.environ["PATH"] = bindir + os.pathsep + os.environ.get("PATH", "")
+        os.environ["PARA_ARCH"] = "SMP"
+        os.environ["ENSO_BENCH_SLEEP"] = str(args.sleep)
+        argv = ["-prog", args.prog, "-prog4", args.prog, "-P", str(args.maxthreads),
+                "-O", "1", "-mf", "400",
+                # every conformer is calculated up to part3
+                "-thrpart1", "99", "-thrpart2", "99", "--trace", os.path.join(tmp, "trace.json")]
+        os.chdir(tmp)
+        try:
+            with open("enso.out", "w", newline=None) as out:
+                with contextlib.redirect_stdout(out):
+                    try:
+                        enso.main(argv)  # writes flags.dat
+                    except SystemExit as error:
+                        if error.code not in (0, None):
+                            raise
+                    start = time.perf_counter()
+                    enso.main(argv + ["-run"])
+                    walltime = time.perf_counter() - start
+        except SystemExit:
+            with open(os.path.join(tmp, "enso.out"), "r") as inp:
+                sys.stdout.write(inp.read()[-3000:])
+            print("ERROR: ENSO run with {} conformers failed!".format(nconf))
+            sys.exit(1)
+        finally:
+            enso.trace.filename = None  # nothing to write at exit
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(environ)
+    events = list(enso.trace.events)
+    stages = overhead(events, args.maxthreads)
+    njobs = sum(stage["jobs"] for stage in stages)
+    instage = math.fsum(stage["wall"] for stage in stages)
+    programs = math.fsum(e["dur"] for e in events if e.get("cat") == "program")
+    return {
+        "nconf": nconf,
+        "jobs": njobs,
+        "calls": len([e for e in events if e.get("cat") == "program"]),
+        "wall": walltime,
+        "programs": programs / 1.0e6,
+        "serial": walltime - instage,
+        "overhead": math.fsum(stage["overhead"] for stage in stages),
+        "per job": (
+            math.fsum(stage["overhead"] for stage in stages) + walltime - instage
+        ) / max(1, njobs),
+        "stages": stages,
+    }
+
+
+def print_report(report):
+    print("\n{} conformers: {} jobs, {} program calls, {:.2f} s wall time".format(
+        report["nconf"], report["jobs"], report["calls"], report["wall"]))
+    print("{:32} {:>6} {:>10} {:>12} {:>14}".format(
+        "stage", "jobs", "wall [s]", "programs [s]", "per job [ms]"))
+    for stage in report["stages"]:
+        print("{:32} {:>6} {:>10.3f} {:>12.3f} {:>14.2f}".format(
+            stage["stage"][-32:], stage["jobs"], stage["wall"], stage["programs"],
+            1000.0 * stage["overhead"] / max(1, stage["jobs"])))
+    print("{:32} {:>6} {:>10.3f}".format("serial (outside of stages)", "",
+        report["serial"]))
+    print("{:32} {:>6} {:>10.3f} {:>12.3f} {:>14.2f}".format(
+        "total", report["jobs"], report["wall"], report["programs"],
+        1000.0 * report["per job"]))
+
+
+def check_regression(reports, baseline, maxregression, floor=1.0e-3):
+    """compare the overhead per job with baseline, returns True if ok"""
+    ok = True
+    old = {str(r["nconf"]): r for r in baseline.get("runs", [])}
+    print("\n{:>8} {:>16} {:>16} {:>10}".format(
+        "nconf", "baseline [ms]", "now [ms]", "change"))
+    for report in reports:
+        ref = old.get(str(report["nconf"]), None)
+        if ref is None:
+            print("{:>8} {:>16} {:>16.2f}".format(
+                report["nconf"], "-", 1000.0 * report["per job"]))
+            continue
+        change = report["per job"] / max(ref["per job"], 1.0e-9) - 1.0
+        status = ""
+        if (report["per job"] - ref["per job"] > floor
+                and change > maxregression):
+            status = "REGRESSION"
+            ok = False
+        print("{:>8} {:>16.2f} {:>16.2f} {:>9.1f}% {}".format(
+            report["nconf"], 1000.0 * ref["per job"], 1000.0 * report["per job"],
+            100.0 * change, status))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-n", dest="nconf", type=int, nargs="+", default=[10, 1000],
+        help="sizes of the ensembles, e.g. -n 10 1000 20000")
+    parser.add_argument("-P", dest="maxthreads", type=int, default=4)
+    parser.add_argument("-prog", dest="prog", choices=["orca", "tm"], default="orca")
+    parser.add_argument("--sleep", dest="sleep", type=float, default=0.0,
+        help="time in seconds every stand-in program call takes")
+    parser.add_argument("--save", dest="save", default=None,
+        help="write the results to this json file")
+    parser.add_argument("--baseline", dest="baseline", default=None,
+        help="json file of --save to compare with")
+    parser.add_argument("--max-regression", dest="maxregression", type=float,
+        default=0.25, help="allowed relative increase of the overhead per job")
+    parser.add_argument(
+        "--enso",
+        dest="enso",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "enso.py"),
+    )
+    args = parser.parse_args()
+    fakeqm = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakeqm.py")
+    reports = []
+    for nconf in args.nconf:
+        enso = load_enso(os.path.abspath(args.enso))
+        reports.append(run(enso, nconf, args, fakeqm))
+        print_report(reports[-1])
+    if args.save is not None:
+        with open(args.save, "w", newline=None) as out:
+            json.dump(
+                {"prog": args.prog, "maxthreads": args.maxthreads,
+                 "sleep": args.sleep, "runs": reports},
+                out,
+                indent=1,
+            )
+    if args.baseline is not None:
+        with open(args.baseline, "r") as inp:
+            baseline = json.load(inp)
+        if not check_regression(reports, baseline, args.maxregression):
+            print("ERROR: the overhead of ENSO per job increased by more than "
+                  "{:.0f}%!".format(100.0 * args.maxregression))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# This file is part of ENSO.
+# Copyright (C) 2020 Fabian Bohle
+#
+# ENSO is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ENSO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ENSO. If not, see <https://www.gnu.org/licenses/>.
+
+
+""" measure the orchestration overhead of run_in_parallel per job, the jobs
+themselves do nothing, so the measured time is pure ENSO overhead.
+Usage: ./bench_orchestration.py [-n 500] [-P 4] [--enso path/to/enso.py]"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+
+def load_enso(path):
+    """import enso.py from path"""
+    spec = importlib.util.spec_from_file_location("enso", path)
+    enso = importlib.util.module_from_spec(spec)
+    sys.modules["enso"] = enso
+    spec.loader.exec_module(enso)
+    return enso
+
+
+def bench(enso, nconf, maxthreads, jobtype):
+    """run nconf no-op jobs and return the wall time in seconds"""
+
+    class noop_job(enso.tm_job):
+        def execute(self):
+            self.success = True
+            self.energy = -1.0
+            self.gsolv = 0.0
+            self.rrho = 0.0
+
+    # the jobs have to be picklable for older versions of enso.py which
+    # pass them through a multiprocessing queue
+    noop_job.__module__ = "enso"
+    noop_job.__qualname__ = "noop_job"
+    enso.noop_job = noop_job
+    loopover = []
+    for i in range(1, nconf + 1):
+        task = noop_job()
+        task.name = "CONF{}".format(i)
+        loopover.append(task)
+    instruct = {
+        "jobtype": jobtype,
+        "full": True,
+        "environ": dict(os.environ),
+        "progsettings": {"omp": 1, "tempprogpath": ""},
+    }
+    q = enso.Queue()
+    resultq = enso.Queue()
+    # the status lines are not part of the measurement
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        start = time.perf_counter()
+        results = enso.run_in_parallel(
+            q, resultq, noop_job, maxthreads, loopover, instruct, "bench"
+        )
+        walltime = time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    if len(results) != nconf:
+        print("ERROR: {} of {} jobs returned!".format(len(results), nconf))
+    return walltime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", dest="nconf", type=int, default=500)
+    parser.add_argument("-P", dest="maxthreads", type=int, default=4)
+    parser.add_argument(
+        "--enso",
+        dest="enso",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "enso.py"),
+    )
+    args = parser.parse_args()
+    enso = load_enso(os.path.abspath(args.enso))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            print("{:12} {:>8} {:>12} {:>16}".format(
+                "jobtype", "jobs", "total [s]", "per job [ms]"))
+            for jobtype in ("sp", "opt", "rrhoxtb"):
+                walltime = bench(enso, args.nconf, args.maxthreads, jobtype)
+                print("{:12} {:>8} {:>12.3f} {:>16.3f}".format(
+                    jobtype, args.nconf, walltime, 1000 * walltime / args.nconf))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
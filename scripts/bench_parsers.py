@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+
+# This file is part of ENSO.
+# Copyright (C) 2020 Fabian Bohle
+#
+# ENSO is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ENSO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ENSO. If not, see <https://www.gnu.org/licenses/>.
+
+
+""" micro-benchmarks of the file parsers and writers of ENSO on synthetic
+data: a molecule of --nat atoms (one third carbon, the rest hydrogen, with
+the couplings of all pairs of hydrogen atoms) and an ensemble of --nconf
+conformers of it. The output files are written with the stand-in programs
+of fakeqm.py. Every benchmark is run --repeat times, the fastest run is
+reported. With --baseline the run fails (exit code 1) if a benchmark is
+slower than the baseline by more than --max-regression.
+Usage: ./bench_parsers.py [--nat 300] [--nconf 1000] [--repeat 5]
+                          [-b coord2xyz ...] [--save bench.json]
+                          [--baseline bench.json]"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+
+def load_module(name, path):
+    """import the python file path as module name"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class conformer():
+    """the attributes of the ENSO jobs which are read by the benchmarked
+    functions"""
+
+    def __init__(self, number, energy):
+        self.name = "CONF{}".format(number)
+        self.energy_opt = energy
+        self.rel_free_energy = 0.0
+        self.sp3_energy = energy
+        self.gsolv = -0.01
+        self.rrho = 0.2
+        self.new_bm_weight = 0.0
+        self.degeneracy = 1.0
+        self.xtb_energy = None
+
+
+def molecule(nat, rng):
+    """element symbols and coordinates (Angstrom) of a branched hydrocarbon
+    with nat atoms, the carbon atoms are a random walk"""
+    ncarbon = max(1, nat // 3)
+    atoms = ["c"] * ncarbon + ["h"] * (nat - ncarbon)
+    coords = [[0.0, 0.0, 0.0]]
+    for _ in range(ncarbon - 1):
+        coords.append([x + 1.54 * d for x, d in zip(coords[-1], direction(rng))])
+    for i in range(nat - ncarbon):
+        coords.append(
+            [x + 1.09 * d for x, d in zip(coords[i % ncarbon], direction(rng))]
+        )
+    return atoms, coords
+
+
+def direction(rng):
+    """random unit vector"""
+    while True:
+        v = [rng.uniform(-1.0, 1.0) for _ in range(3)]
+        norm = math.sqrt(sum(x * x for x in v))
+        if 0.1 < norm <= 1.0:
+            return [x / norm for x in v]
+
+
+def write_coord(filename, atoms, coords):
+    with open(filename, "w", newline=None) as out:
+        out.write("$coord\n")
+        for atom, (x, y, z) in zip(atoms, coords):
+            out.write("{: 09.7f} {: 09.7f}  {: 09.7f}  {}\n".format(
+                x / 0.52917721067, y / 0.52917721067, z / 0.52917721067, atom))
+        out.write("$end")
+
+
+def write_ensemble(filename, atoms, coords, nconf, rng):
+    """crest_conformers.xyz with nconf displaced structures, returns the
+    energies (Eh) which span 5 kcal/mol"""
+    energies = sorted(-100.0 + rng.uniform(0.0, 0.008) for _ in range(nconf))
+    with open(filename, "w", newline=None) as out:
+        for energy in energies:
+            out.write("  {}\n  {:.8f}\n".format(len(atoms), energy))
+            for atom, xyz in zip(atoms, coords):
+                out.write("{:2} {:12.6f} {:12.6f} {:12.6f}\n".format(
+                    atom, *[x + rng.uniform(-0.3, 0.3) for x in xyz]))
+    return energies
+
+
+def program_output(fakeqm, program, args, workdir, outputfile):
+    """write the output of a stand-in program run in workdir"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with open(outputfile, "w", newline=None) as out:
+            with contextlib.redirect_stdout(out):
+                fakeqm.programs[program](args)
+    finally:
+        os.chdir(cwd)
+
+
+class benchmarks():
+    """the synthetic data in workdir and the benchmarks, every benchmark
+    returns the function to time, the work before it is not timed"""
+
+    def __init__(self, enso, fakeqm, workdir, nat, nconf, seed=1):
+        self.enso = enso
+        self.workdir = workdir
+        self.nat = nat
+        self.nconf = nconf
+        rng = random.Random(seed)
+        self.atoms, self.coords = molecule(nat, rng)
+        # molecule with NMR outputs
+        self.nmrdir = os.path.join(workdir, "NMR")
+        os.makedirs(self.nmrdir)
+        write_coord(os.path.join(self.nmrdir, "coord"), self.atoms, self.coords)
+        for program, args, outputfile in (
+            ("mpshift", [], "mpshift.out"),
+            ("escf", [], "escf.out"),
+        ):
+            program_output(fakeqm, program, args, self.nmrdir, outputfile)
+        with open(os.path.join(self.nmrdir, "inpS"), "w") as out:
+            out.write("! NMR\n")
+        with open(os.path.join(self.nmrdir, "inpJ"), "w") as out:
+            out.write("! SSALL\n")
+        program_output(fakeqm, "orca", ["inpS"], self.nmrdir, "orcaS.out")
+        program_output(fakeqm, "orca", ["inpJ"], self.nmrdir, "orcaJ.out")
+        # ensemble
+        self.ensembledir = os.path.join(workdir, "ensemble")
+        os.makedirs(self.ensembledir)
+        self.xyzfile = os.path.join(self.ensembledir, "crest_conformers.xyz")
+        self.energies = write_ensemble(
+            self.xyzfile, self.atoms, self.coords, nconf, rng
+        )
+        self.input_object = enso.handle_input()
+        self.input_object.cwd = self.ensembledir
+        self.input_object.json_dict = OrderedDict(
+            ("CONF{}".format(i), {"removed_by_user": False}) for i in range(1, nconf + 1)
+        )
+
+    def results(self):
+        return [conformer(i + 1, e) for i, e in enumerate(self.energies)]
+
+    def reset_geometries(self):
+        """structures read before are not cached"""
+        self.enso.geometries = self.enso.geometry_ensemble()
+
+    def _coord_files(self, folder):
+        """empty folder with the directories CONFn/bench"""
+        shutil.rmtree(folder, ignore_errors=True)
+        for i in range(1, self.nconf + 1):
+            os.makedirs(os.path.join(folder, "CONF{}".format(i), "bench"))
+        os.chdir(folder)
+        self.reset_geometries()
+
+    def conformersxyz2coord(self):
+        conflist = self.results()
+        self._coord_files(os.path.join(self.ensembledir, "xyz2coord"))
+        return lambda: self.enso.conformersxyz2coord(
+            self.xyzfile, self.nat, "bench", self.nconf, conflist, self.input_object
+        )
+
+    def coord2xyz(self):
+        self.reset_geometries()
+        return lambda: self.enso.coord2xyz(self.nmrdir)
+
+    def _genericoutput(self, job):
+        task = job()
+        task.workdir = self.nmrdir
+        task.nat = self.nat
+        return task._genericoutput
+
+    def tm_genericoutput(self):
+        return self._genericoutput(self.enso.tm_job)
+
+    def orca_genericoutput(self):
+        return self._genericoutput(self.enso.orca_job)
+
+    def crest_routine(self):
+        results = self.results()
+        folder = os.path.join(self.ensembledir, "crest")
+        if not os.path.isdir(folder):
+            self._coord_files(folder)
+            self.enso.conformersxyz2coord(
+                self.xyzfile, self.nat, "bench", self.nconf, results,
+                self.input_object,
+            )
+        os.chdir(folder)
+        self.reset_geometries()
+        args = argparse.Namespace(crestcheck=False)
+        return lambda: self.enso.crest_routine(
+            args, results, "bench", False, self.input_object.json_dict
+        )
+
+    def write_anmr_enso(self):
+        results = self.results()
+        return lambda: self.enso.write_anmr_enso(self.ensembledir, results)
+
+    def correct_anmr_enso(self):
+        results = self.results()
+        self.enso.write_anmr_enso(self.ensembledir, results)
+        removelist = [conf.name for conf in results[::2]]
+        return lambda: self.enso.correct_anmr_enso(self.ensembledir, removelist)
+
+    def _json_setup(self):
+        """args and enso.json of an ensemble of nconf conformers"""
+        if getattr(self, "jsonargs", None) is None:
+            io = self.enso.handle_input()
+            args = self.enso.cml(
+                "", io.solvents, io.impfunc, io.impfunc3, io.impfuncJ,
+                io.impfuncS, io.impgfnv, io.imphref, io.impcref, io.impfref,
+                io.imppref, io.impsiref, io.smgsolv2, io, ["-run"],
+            )
+            ensorc = os.path.join(self.ensembledir, ".ensorc")
+            io.write_ensorc(ensorc)
+            io.process_flags(args, ensorc, "#NMR data", silent=True)
+            args.nconf = self.nconf
+            self.jsonargs = args
+            self.jsonfile = os.path.join(self.ensembledir, "enso.json")
+            io.cwd = self.ensembledir
+            os.chdir(self.ensembledir)
+            io.read_json(self.jsonfile, args)
+            io.write_json("bench")
+            shutil.copy(self.jsonfile, self.jsonfile + ".bench")
+        os.chdir(self.ensembledir)
+        shutil.copy(self.jsonfile + ".bench", self.jsonfile)
+        io = self.enso.handle_input()
+        io.cwd = self.ensembledir
+        return io
+
+    def read_json(self):
+        io = self._json_setup()
+        return lambda: io.read_json(self.jsonfile, self.jsonargs)
+
+    def write_json(self):
+        io = self._json_setup()
+        io.read_json(self.jsonfile, self.jsonargs)
+        return lambda: io.write_json("bench")
+
+    names = (
+        "conformersxyz2coord",
+        "coord2xyz",
+        "tm_genericoutput",
+        "orca_genericoutput",
+        "crest_routine",
+        "write_anmr_enso",
+        "correct_anmr_enso",
+        "read_json",
+        "write_json",
+    )
+
+
+def run(bench, name, repeat):
+    """fastest time of repeat runs of the benchmark name in seconds"""
+    times = []
+    cwd = os.getcwd()
+    try:
+        for _ in range(repeat):
+            with open(os.devnull, "w") as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    func = getattr(bench, name)()
+                    start = time.perf_counter()
+                    func()
+                    times.append(time.perf_counter() - start)
+    finally:
+        os.chdir(cwd)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--nat", dest="nat", type=int, default=300)
+    parser.add_argument("--nconf", dest="nconf", type=int, default=1000)
+    parser.add_argument("--repeat", dest="repeat", type=int, default=5)
+    parser.add_argument("-b", dest="only", nargs="+", choices=benchmarks.names,
+        default=list(benchmarks.names), help="benchmarks to run")
+    parser.add_argument("--save", dest="save", default=None,
+        help="write the results to this json file")
+    parser.add_argument("--baseline", dest="baseline", default=None,
+        help="json file of --save to compare with")
+    parser.add_argument("--max-regression", dest="maxregression", type=float,
+        default=0.25, help="allowed relative increase of the time")
+    parser.add_argument(
+        "--enso",
+        dest="enso",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "enso.py"),
+    )
+    args = parser.parse_args()
+    enso = load_module("enso", os.path.abspath(args.enso))
+    fakeqm = load_module(
+        "fakeqm", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakeqm.py")
+    )
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline, "r") as inp:
+            baseline = json.load(inp)
+        if (baseline.get("nat"), baseline.get("nconf")) != (args.nat, args.nconf):
+            print("WARNING: the baseline was measured with --nat {} --nconf {}!".format(
+                baseline.get("nat"), baseline.get("nconf")))
+        baseline = baseline.get("results", {})
+    results = OrderedDict()
+    regression = False
+    with tempfile.TemporaryDirectory() as tmp:
+        bench = benchmarks(enso, fakeqm, tmp, args.nat, args.nconf)
+        print("{} atoms, {} conformers, fastest of {} runs".format(
+            args.nat, args.nconf, args.repeat))
+        print("{:24} {:>12} {:>14} {:>10}".format(
+            "benchmark", "time [ms]", "baseline [ms]", "change"))
+        for name in args.only:
+            results[name] = run(bench, name, args.repeat)
+            line = "{:24} {:>12.3f}".format(name, 1000.0 * results[name])
+            if name in baseline:
+                change = results[name] / max(baseline[name], 1.0e-9) - 1.0
+                line += " {:>14.3f} {:>9.1f}%".format(
+                    1000.0 * baseline[name], 100.0 * change)
+                if change > args.maxregression:
+                    line += " REGRESSION"
+                    regression = True
+            print(line)
+    if args.save is not None:
+        with open(args.save, "w", newline=None) as out:
+            json.dump(
+                {"nat": args.nat, "nconf": args.nconf, "repeat": args.repeat,
+                 "results": results},
+                out,
+                indent=1,
+            )
+    if regression:
+        print("ERROR: at least one benchmark is slower by more than {:.0f}%!".format(
+            100.0 * args.maxregression))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+
+# This file is part of ENSO.
+# Copyright (C) 2020 Fabian Bohle
+#
+# ENSO is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ENSO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ENSO. If not, see <https://www.gnu.org/licenses/>.
+
+
+""" stand-in for the QM programs called by ENSO (xtb, cefine, ridft, jobex,
+orca, cosmotherm, escf, mpshift and crest), the program is chosen by the
+name of the link to this script. Every call sleeps ENSO_BENCH_SLEEP seconds
+(default 0) and writes the lines of the real output which ENSO parses.
+The energies only depend on the number of the conformer, so they are
+reproducible.
+Usage: ln -s fakeqm.py xtb; ./xtb coord --ohess --enso"""
+
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import time
+
+def read_coord(filename="coord"):
+    """atoms and coordinates (bohr) of the $coord block of filename"""
+    atoms = []
+    coords = []
+    try:
+        with open(filename, "r") as inp:
+            lines = inp.readlines()
+    except OSError:
+        return atoms, coords
+    read = False
+    for line in lines:
+        if line.startswith("$coord"):
+            read = True
+            continue
+        if line.startswith("$"):
+            read = False
+        if read and line.split():
+            items = line.split()
+            atoms.append(items[3].lower())
+            coords.append([float(x) for x in items[:3]])
+    return atoms, coords
+
+
+def energy(shift=0.0):
+    """deterministic energy in Eh, it increases with the number n of the
+    conformer (folder CONFn) by 1.2 kcal/mol * ln(n), so the Boltzmann
+    populations are the same for any size of the ensemble"""
+    atoms, _ = read_coord()
+    match = re.search(r"CONF(\d+)", os.getcwd())
+    n = int(match.group(1)) if match else 1
+    return -10.0 * len(atoms) + shift + 1.2 / 627.50947428 * math.log(n)
+
+
+def nmr_atoms():
+    """1-based indices and elements of the H and C atoms in coord"""
+    atoms, _ = read_coord()
+    return [(i + 1, atom) for i, atom in enumerate(atoms) if atom in ("h", "c")]
+
+
+def shielding(atom):
+    return {"h": 31.5, "c": 180.0}[atom]
+
+
+def write_energy(value):
+    """TURBOMOLE energy file, the energy is read from the last cycle"""
+    with open("energy", "w") as out:
+        out.write("$energy      SCF               SCFKIN            SCFPOT\n")
+        out.write("     1   {:.10f}   0.0   0.0\n".format(value))
+        out.write("$end\n")
+
+
+def xtb(args):
+    if "--version" in args:
+        print("      * xtb version 6.3.0 (fakeqm) compiled by 'enso'")
+        return 0
+    atoms, _ = read_coord()
+    if "--ohess" in args:
+        nfreq = 3 * len(atoms)
+        with open("vibspectrum", "w") as out:
+            out.write("$vibrational spectrum\n")
+            for i in range(nfreq):
+                if i < 6:
+                    out.write("{:6d}    {:12.2f}   0.0  -\n".format(i + 1, 0.0))
+                else:
+                    out.write(
+                        "{:6d}  a {:12.2f}   1.0  YES\n".format(i + 1, 100.0 + 40.0 * i)
+                    )
+            out.write("$end\n")
+        shutil.copy("coord", "xtbopt.coord")
+        with open("xtb_enso.json", "w") as out:
+            json.dump(
+                {
+                    "number of imags": 0,
+                    "ZPVE": 0.001 * nfreq,
+                    "G(T)": 0.0008 * nfreq,
+                    "point group": "c1",
+                },
+                out,
+            )
+        print("          | TOTAL ENERGY {:20.12f} Eh   |".format(energy()))
+    elif "--sp" in args:
+        shift = -0.005 if "--gbsa" in args else 0.0
+        print("          | TOTAL ENERGY {:20.12f} Eh   |".format(energy(shift)))
+    elif "-opt" in args or "--opt" in args:
+        print("   *** GEOMETRY OPTIMIZATION CONVERGED AFTER 7 ITERATIONS ***")
+        if "--orca" in args:
+            # the geometry stays in inp.xyz
+            print("FINAL SINGLE POINT ENERGY {:20.12f}".format(energy()))
+            print("                             ****ORCA TERMINATED NORMALLY****")
+        else:
+            write_energy(energy())
+    print("   * finished run on fakeqm")
+    return 0
+
+
+def cefine(args):
+    func = args[args.index("-func") + 1] if "-func" in args else "b-p"
+    with open("control", "w") as out:
+        out.write("$title\n$symmetry c1\n$coord file=coord\n")
+        out.write("$dft\n   functional {}\n   gridsize m4\n".format(func))
+        out.write("$scfconv 6\n$end\n")
+    with open("basis", "w") as out:
+        out.write("$basis\n$end\n")
+    print("cefine (fakeqm) done")
+    return 0
+
+
+def ridft(args):
+    with open("control", "r") as inp:
+        control = inp.read()
+    if "$cosmo_out file=out.cosmo" in control:
+        with open("out.cosmo", "w") as out:
+            out.write("$info fakeqm\n$cosmo_energy\n  {:.10f}\n".format(energy(-0.01)))
+    write_energy(energy())
+    print(" ENERGY CONVERGED !")
+    print("    ridft ended normally")
+    return 0
+
+
+def jobex(args):
+    value = energy()
+    with open("job.last", "w") as out:
+        out.write("                 |  total energy      =   {:.10f}  |\n".format(value))
+        out.write("CONVERGENCY CRITERIA FULFILLED IN CYCLE 7\n")
+    with open("energy", "w") as out:
+        out.write("$energy      SCF               SCFKIN            SCFPOT\n")
+        for cycle in range(1, 8):
+            out.write("     {}   {:.10f}   0.0   0.0\n".format(cycle, value))
+        out.write("$end\n")
+    print("   ****  jobex : all done  ****")
+    return 0
+
+
+def orca(args):
+    inp = args[0] if args else "inp"
+    with open(inp, "r") as f:
+        content = f.read().lower()
+    print("                                 * O   R   C   A *  (fakeqm)")
+    if inp == "inpS":
+        print("CHEMICAL SHIELDING SUMMARY (ppm)")
+        print("--------------------------------")
+        print("")
+        print("")
+        print("  Nucleus  Element    Isotropic     Anisotropy")
+        print("  -------  -------  ------------   ------------")
+        for i, atom in nmr_atoms():
+            print("  {:5d}  {:>2}  {:12.3f}  {:12.3f}".format(
+                i - 1, atom.upper(), shielding(atom), 10.0))
+        print("")
+    elif inp == "inpJ":
+        print("NMR SPIN-SPIN COUPLING CONSTANTS")
+        print("--------------------------------")
+        for _ in range(4):
+            print("")
+        hydrogens = [i for i, atom in nmr_atoms() if atom == "h"]
+        for a in range(len(hydrogens)):
+            for b in range(a + 1, len(hydrogens)):
+                print(" NUCLEUS A = H {:4d} NUCLEUS B = H {:4d}".format(
+                    hydrogens[a] - 1, hydrogens[b] - 1))
+                print(" Total            0.000    0.000    0.000  iso=      7.000")
+    else:
+        if "freq" in content:
+            atoms, _ = read_coord()
+            print("G-E(el)                           ...  {:.8f} Eh".format(
+                0.0008 * 3 * len(atoms)))
+        for cycle in range(1, 8 if " opt" in content else 1):
+            print("GEOMETRY OPTIMIZATION CYCLE {:4d}".format(cycle))
+        print("FINAL SINGLE POINT ENERGY {:20.12f}".format(energy()))
+    print("                             ****ORCA TERMINATED NORMALLY****")
+    return 0
+
+
+def cosmotherm(args):
+    compounds = []
+    temperatures = []
+    with open(args[0] if args else "cosmotherm.inp", "r") as inp:
+        for line in inp:
+            items = line.split()
+            if line.startswith("f ="):
+                compounds.append(items[2].lower().replace(".cosmo", ""))
+            elif line.startswith("henry"):
+                tc = [x for x in items if x.startswith("tc=")][0]
+                temperatures.append(float(tc.split("=")[1]) + 273.15)
+    with open("cosmotherm.tab", "w") as out:
+        for job, temp in enumerate(temperatures, 1):
+            out.write(
+                "Settings  job {:3d} : T= {:8.2f} K ; x(1)= 1.0000\n".format(job, temp)
+            )
+            out.write("Nr Compound H ln(gamma) pv Gsolv\n")
+            for i, compound in enumerate(compounds[1:], 2):
+                gsolv = -5.0 + 0.01 * (temp - 298.15)
+                out.write("{:3d} {} 0.0 0.0 0.0 {:.5f}\n".format(i, compound, gsolv))
+    print("COSMOtherm (fakeqm) terminated normally")
+    return 0
+
+
+def escf(args):
+    print("   Nuclear coupling constants")
+    print("   --------------------------")
+    print("")
+    hydrogens = [i for i, atom in nmr_atoms() if atom == "h"]
+    for a in range(len(hydrogens)):
+        for b in range(a + 1, len(hydrogens)):
+            print("  h {:4d}  -  h {:4d}:   7.000".format(hydrogens[a], hydrogens[b]))
+    print("   -----------------------------------")
+    print("   ****  escf : all done  ****")
+    return 0
+
+
+def mpshift(args):
+    print("   >>>>> DFT MAGNETIC SHIELDINGS <<<<<")
+    for i, atom in nmr_atoms():
+        print("   ATOM  {} {:4d}  sigma= {:10.3f}".format(atom, i, shielding(atom)))
+    print("   ***  nmr shielding constants written onto general input/output file!  ***")
+    return 0
+
+
+def crest(args):
+    with open("cregen.enso", "w") as out:
+        out.write("cregen (fakeqm)\n")
+        out.write(" ALL UNIQUE\n")
+    print("CREST (fakeqm) terminated normally")
+    return 0
+
+
+programs = {
+    "xtb": xtb,
+    "cefine": cefine,
+    "ridft": ridft,
+    "jobex": jobex,
+    "orca": orca,
+    "cosmotherm": cosmotherm,
+    "escf": escf,
+    "mpshift": mpshift,
+    "crest": crest,
+}
+
+
+def main():
+    name = os.path.basename(sys.argv[0])
+    if name not in programs:
+        print("ERROR: fakeqm has to be called as one of {}!".format(
+            ", ".join(sorted(programs))))
+        return 1
+    time.sleep(float(os.environ.get("ENSO_BENCH_SLEEP", "0")))
+    return programs[name](sys.argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
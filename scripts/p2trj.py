@@ -30,25 +30,20 @@ def coord2xyz(pathin, commentary, pathout):
     bohr2ang = 0.52917721067
     with open(os.path.join(pathin, "coord"), "r", newline=None) as f:
         coord = f.readlines()
-    x = []
-    y = []
-    z = []
-    atom = []
+    coordxyz = []
     for line in coord[1:]:
         if "$" in line:  # stop at $end ...
             break
-        x.append(float(line.split()[0]) * bohr2ang)
-        y.append(float(line.split()[1]) * bohr2ang)
-        z.append(float(line.split()[2]) * bohr2ang)
-        atom.append(str(line.split()[3].lower()))
-    nat = int(len(x))
-    coordxyz = []
-    for i in range(len(x)):
+        tmp = line.split()
         coordxyz.append(
             "{:3} {: 19.10f}  {: 19.10f}  {: 19.10f}".format(
-                atom[i][0].upper() + atom[i][1:], x[i], y[i], z[i]
+                tmp[3][0].upper() + tmp[3][1:].lower(),
+                float(tmp[0]) * bohr2ang,
+                float(tmp[1]) * bohr2ang,
+                float(tmp[2]) * bohr2ang,
             )
         )
+    nat = len(coordxyz)
     with open(pathout, "a", newline=None) as out:
         out.write("  {}\n".format(nat))  ### number of atoms
         out.write("{}\n".format(str(commentary)))